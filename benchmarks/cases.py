@@ -0,0 +1,121 @@
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from benchmarks.synthetic import SyntheticScene, synthetic_frame
+
+ROOT_DIR = Path(__file__).parent.parent.absolute()
+# DetectionConfig refuses to load without a well-formed Google API key.
+# Benchmarks never call the API, so a placeholder is enough.
+os.environ.setdefault('GOOGLE_API_KEY', 'AIza' + '0' * 35)
+
+from vehicle_detection.config import DetectionConfig
+from vehicle_detection.database import DatabaseHandler
+from vehicle_detection.detector import VehicleDetectionProcessor
+from vehicle_detection.runtime import ConfigSnapshot
+from vehicle_detection.tracking import SeenTrackIds, RollingCounter
+from vehicle_detection.utils import process_frame, draw_area
+from vehicle_detection.violation_detector import ViolationDetector
+
+
+def _snapshot(frame_size):
+    return ConfigSnapshot(1, DetectionConfig(), frame_size, 'benchmark')
+
+
+def bench_process_frame(density, frame_size, stack):
+    """Draw boxes and labels for the vehicles inside the detection area."""
+    import cvzone  # noqa: F401 - fail setup, not timing, if it is missing
+    frame = synthetic_frame(frame_size)
+    area = _snapshot(frame_size).geometry.area
+    results = SyntheticScene(density, frame_size).results()
+    return lambda: process_frame(frame, next(results), area)
+
+
+def bench_draw_area(density, frame_size, stack):
+    """Outline the detection area."""
+    frame = synthetic_frame(frame_size)
+    area = _snapshot(frame_size).geometry.area
+    return lambda: draw_area(frame, area)
+
+
+def bench_update_vehicle_data(density, frame_size, stack):
+    """Count the vehicles of one frame (track ID bookkeeping and counters)."""
+    config = DetectionConfig()
+    # Only the counting state is needed; skip opening a source and loading a model
+    processor = VehicleDetectionProcessor.__new__(VehicleDetectionProcessor)
+    processor.vehicle_ids = SeenTrackIds(config.max_tracked_ids, config.track_id_ttl)
+    processor.vehicle_counts = RollingCounter(config.count_bucket)
+    results = SyntheticScene(density, frame_size).results()
+    return lambda: processor._update_vehicle_data(next(results))
+
+
+def bench_detect_violations(density, frame_size, stack):
+    """Run every violation rule over one frame's tracks."""
+    frame = synthetic_frame(frame_size)
+    detector = ViolationDetector(SimpleNamespace(settings=_snapshot(frame_size)))
+    detector.logger.disabled = True
+    results = SyntheticScene(density, frame_size).results()
+    return lambda: detector.detect_violations(frame, next(results))
+
+
+def _database(stack):
+    directory = stack.enter_context(tempfile.TemporaryDirectory())
+    db = DatabaseHandler(os.path.join(directory, 'benchmark.db'))
+    stack.callback(db.close_connection)
+    return db
+
+
+def _detections(scene):
+    while True:
+        for result in scene.frames:
+            boxes = result.boxes
+            yield list(zip(boxes.id.array.astype(int).tolist(), boxes.cls.array.astype(int).tolist(),
+                           boxes.conf.array.tolist()))
+
+
+def bench_insert_detection(density, frame_size, stack):
+    """Store one frame's detections a row (and a commit) at a time."""
+    db = _database(stack)
+    detections = _detections(SyntheticScene(density, frame_size))
+
+    def run():
+        now = time.time()
+        for vehicle_id, class_id, confidence in next(detections):
+            db.insert_detection(vehicle_id, class_id, confidence, now, 'benchmark')
+    return run
+
+
+def bench_insert_many(density, frame_size, stack):
+    """Store one frame's detections in a single transaction, as BatchedWriter does."""
+    db = _database(stack)
+    detections = _detections(SyntheticScene(density, frame_size))
+
+    def run():
+        now = time.time()
+        date = datetime.fromtimestamp(now).strftime('%Y-%m-%d')
+        db.insert_many('vehicle_detections', [(vehicle_id, class_id, confidence, now, date, 'benchmark')
+                                              for vehicle_id, class_id, confidence in next(detections)])
+    return run
+
+
+def bench_get_base64_image(density, frame_size, stack):
+    """JPEG-encode and base64 a frame for the web client."""
+    sys.path.insert(0, str(ROOT_DIR / 'web_app'))
+    from app import get_base64_image
+    frame = synthetic_frame(frame_size)
+    return lambda: get_base64_image(frame)
+
+
+# name -> (setup, whether the cost depends on the number of boxes)
+CASES = {
+    'process_frame': (bench_process_frame, True),
+    'draw_area': (bench_draw_area, False),
+    'update_vehicle_data': (bench_update_vehicle_data, True),
+    'detect_violations': (bench_detect_violations, True),
+    'insert_detection': (bench_insert_detection, True),
+    'insert_many': (bench_insert_many, True),
+    'get_base64_image': (bench_get_base64_image, False),
+}
@@ -0,0 +1,207 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import timeit
+from contextlib import ExitStack
+from datetime import datetime
+from cli import setup_logging
+from benchmarks.cases import CASES
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'baseline.json')
+
+
+def parse_size(value):
+    """Parse WIDTHxHEIGHT into a (width, height) tuple."""
+    width, height = value.lower().split('x')
+    return int(width), int(height)
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments.
+
+    Returns:
+        Parsed command line arguments
+    """
+    parser = argparse.ArgumentParser(
+        description='Time the per-frame hot paths on synthetic detections and compare to a baseline',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument(
+        '--case',
+        type=str,
+        choices=list(CASES),
+        action='append',
+        help='Benchmark to run (repeatable, default: all)'
+    )
+
+    parser.add_argument(
+        '--density',
+        type=int,
+        action='append',
+        help='Boxes per frame (repeatable, default: 10, 50 and 200)'
+    )
+
+    parser.add_argument(
+        '--frame-size',
+        type=parse_size,
+        default=(1280, 720),
+        help='Synthetic frame size (WIDTHxHEIGHT)'
+    )
+
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=7,
+        help='Timed rounds per benchmark'
+    )
+
+    parser.add_argument(
+        '--baseline',
+        type=str,
+        default=DEFAULT_BASELINE,
+        help='Baseline results to compare against (JSON)'
+    )
+
+    parser.add_argument(
+        '--save',
+        action='store_true',
+        help='Write the results to --baseline instead of comparing'
+    )
+
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.15,
+        help='Slowdown relative to the baseline that counts as a regression (0.15 = 15%%)'
+    )
+
+    parser.add_argument(
+        '--log-level',
+        type=str,
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+        default='WARNING',
+        help='Set the logging level'
+    )
+
+    return parser.parse_args()
+
+
+def machine():
+    """Identify the machine, since timings only compare on the same one."""
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def measure(run, repeat):
+    """Time ``run`` like timeit: enough calls per round to last 0.2 s.
+
+    Returns:
+        dict: Median and fastest seconds per call across the rounds
+    """
+    timer = timeit.Timer(run)
+    number, _ = timer.autorange()
+    rounds = [seconds / number for seconds in timer.repeat(repeat, number)]
+    return {'median': statistics.median(rounds), 'min': min(rounds), 'calls': number}
+
+
+def run_benchmarks(names, densities, frame_size, repeat):
+    """Run the benchmarks; a case whose setup fails is logged and skipped.
+
+    Returns:
+        dict: {'case[density]': measurement}
+    """
+    logger = logging.getLogger(__name__)
+    results = {}
+    for name in names:
+        setup, scales = CASES[name]
+        for density in densities if scales else [None]:
+            key = f'{name}[{density}]' if scales else name
+            with ExitStack() as stack:
+                try:
+                    run = setup(density, frame_size, stack)
+                except ImportError as e:
+                    logger.error(f"Skipping {key}: {e}")
+                    continue
+                results[key] = measure(run, repeat)
+            print(f"{key:<32}{results[key]['median'] * 1e6:>14.1f}{results[key]['min'] * 1e6:>14.1f}")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print each benchmark's change against the baseline.
+
+    The fastest rounds are compared: slower rounds mostly measure other
+    load on the machine, not the code.
+
+    Returns:
+        list: Benchmarks that got slower by more than ``threshold``
+    """
+    regressions = []
+    print(f"\n{'benchmark':<32}{'baseline min':>14}{'min us':>14}{'change':>10}")
+    for key, result in results.items():
+        previous = baseline['results'].get(key)
+        if previous is None:
+            print(f"{key:<32}{'-':>14}{result['min'] * 1e6:>14.1f}{'new':>10}")
+            continue
+        change = result['min'] / previous['min'] - 1
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(key)
+        elif change < -threshold:
+            flag = '  faster'
+        print(f"{key:<32}{previous['min'] * 1e6:>14.1f}{result['min'] * 1e6:>14.1f}{change:>+10.1%}{flag}")
+    return regressions
+
+
+def main():
+    """Run the benchmarks, then save them as the baseline or check them against it."""
+    args = parse_args()
+    setup_logging(args.log_level)
+    logger = logging.getLogger(__name__)
+
+    densities = args.density or [10, 50, 200]
+    print(f"{'benchmark':<32}{'median us':>14}{'min us':>14}")
+    results = run_benchmarks(args.case or list(CASES), densities, args.frame_size, args.repeat)
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'machine': machine(),
+                'frame_size': list(args.frame_size),
+                'results': results,
+            }, f, indent=2)
+        logger.warning(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        logger.warning(f"No baseline at {args.baseline}; run with --save to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('machine') != machine():
+        logger.warning(f"Baseline was recorded on a different machine ({baseline.get('machine')}); "
+                       f"timings may not be comparable")
+    if baseline.get('frame_size') != list(args.frame_size):
+        logger.warning(f"Baseline used frame size {baseline.get('frame_size')}, not {list(args.frame_size)}")
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        logger.error(f"{len(regressions)} benchmark(s) slower than baseline by more than "
+                     f"{args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
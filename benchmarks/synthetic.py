@@ -0,0 +1,131 @@
+import cv2
+import numpy as np
+
+# COCO class IDs the pipeline cares about
+NAMES = {0: 'person', 1: 'bicycle', 2: 'car', 3: 'motorcycle', 5: 'bus', 7: 'truck'}
+# Share of each class in a synthetic scene, roughly that of urban traffic
+CLASS_MIX = {2: 0.6, 7: 0.1, 5: 0.05, 3: 0.1, 1: 0.05, 0: 0.1}
+
+
+class SyntheticTensor:
+    """The slice of the torch.Tensor API the pipeline uses on YOLO outputs."""
+
+    __slots__ = ('array',)
+
+    def __init__(self, array):
+        self.array = array
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.array
+
+    def item(self):
+        return self.array.item()
+
+    def __getitem__(self, index):
+        return self.array[index]
+
+    def __len__(self):
+        return len(self.array)
+
+    @property
+    def shape(self):
+        return self.array.shape
+
+
+class SyntheticBoxes:
+    def __init__(self, ids, classes, confidences, xyxy):
+        """Stand-in for ultralytics Boxes: column tensors, iterable one box at a time.
+
+        Args:
+            ids: Track IDs, or None for an untracked result
+            classes: Class IDs
+            confidences: Detection confidences
+            xyxy: (n, 4) box corners in frame pixels
+        """
+        self.id = SyntheticTensor(ids) if ids is not None else None
+        self.cls = SyntheticTensor(classes)
+        self.conf = SyntheticTensor(confidences)
+        self.xyxy = SyntheticTensor(xyxy)
+
+    def __len__(self):
+        return len(self.cls)
+
+    def __iter__(self):
+        ids = self.id.array if self.id is not None else None
+        for i in range(len(self)):
+            yield SyntheticBoxes(ids[i:i + 1] if ids is not None else None, self.cls.array[i:i + 1],
+                                 self.conf.array[i:i + 1], self.xyxy.array[i:i + 1])
+
+
+class SyntheticResult:
+    """Stand-in for one ultralytics Results object from model.track()."""
+
+    names = NAMES
+
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+
+class SyntheticScene:
+    def __init__(self, density, frame_size=(1280, 720), frames=100, seed=0):
+        """Tracked vehicles driving down the frame, as model.track() would report them.
+
+        Every frame holds ``density`` boxes. Vehicles move a few pixels per
+        frame (so speeds, directions and parking can be evaluated), and
+        one that leaves the frame is replaced by a new track ID.
+
+        Args:
+            density: Boxes per frame
+            frame_size: (width, height) of the frames
+            frames: Distinct frames generated; results() cycles through them
+            seed: Random seed, so runs are comparable
+        """
+        width, height = frame_size
+        rng = np.random.RandomState(seed)
+        classes = list(CLASS_MIX)
+        self.frame_size = frame_size
+        self.frames = []
+
+        ids = np.arange(1, density + 1)
+        next_id = density + 1
+        kinds = rng.choice(classes, density, p=list(CLASS_MIX.values()))
+        sizes = rng.uniform(0.04, 0.12, (density, 2)) * (width, height)
+        centers = rng.uniform((0, 0), (width, height), (density, 2))
+        speeds = rng.uniform(0, 0.01 * height, density)
+        for _ in range(frames):
+            centers[:, 1] += speeds
+            gone = centers[:, 1] > height
+            for i in np.flatnonzero(gone):
+                ids[i] = next_id
+                next_id += 1
+                kinds[i] = rng.choice(classes, p=list(CLASS_MIX.values()))
+                centers[i] = (rng.uniform(0, width), 0)
+            xyxy = np.hstack([centers - sizes / 2, centers + sizes / 2]).astype(np.float32)
+            confidences = rng.uniform(0.3, 0.95, density).astype(np.float32)
+            self.frames.append(SyntheticResult(SyntheticBoxes(
+                ids.astype(np.float32), kinds.astype(np.float32), confidences, xyxy)))
+
+    def results(self):
+        """Yield the scene's results frame after frame, forever."""
+        while True:
+            yield from self.frames
+
+
+def synthetic_frame(frame_size=(1280, 720), seed=0):
+    """A BGR frame with a road-like gradient, noise and box-shaped vehicles.
+
+    Plain noise would make JPEG encoding unrealistically slow and a flat
+    image unrealistically fast.
+    """
+    width, height = frame_size
+    rng = np.random.RandomState(seed)
+    gradient = np.linspace(60, 160, height, dtype=np.float32)[:, None, None]
+    frame = np.clip(gradient + rng.normal(0, 8, (height, width, 3)), 0, 255).astype(np.uint8)
+    for _ in range(30):
+        x, y = rng.randint(0, width - 80), rng.randint(0, height - 60)
+        color = tuple(int(c) for c in rng.randint(0, 255, 3))
+        cv2.rectangle(frame, (x, y), (x + rng.randint(40, 80), y + rng.randint(30, 60)), color, -1)
+    return frame
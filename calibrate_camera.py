@@ -0,0 +1,111 @@
+import argparse
+import logging
+import os
+from cli import setup_logging
+from vehicle_detection.config import DetectionConfig
+from vehicle_detection.calibration import calibrate, collect_tracks
+from vehicle_detection.models import MODELS
+from vehicle_detection.profiler import profile_video
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments.
+
+    Returns:
+        Parsed command line arguments
+    """
+    parser = argparse.ArgumentParser(
+        description='Calibrate a camera from recorded footage and write its configuration file',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument(
+        '--video',
+        type=str,
+        required=True,
+        help='Recording from the camera to calibrate'
+    )
+
+    parser.add_argument(
+        '--camera-id',
+        type=str,
+        required=True,
+        help='Camera ID recorded with detections'
+    )
+
+    parser.add_argument(
+        '--config',
+        type=str,
+        help='Configuration to start from (YAML); model and thresholds are taken from it'
+    )
+
+    parser.add_argument(
+        '--output',
+        type=str,
+        help='Configuration file to write (default: configs/<camera-id>.yaml)'
+    )
+
+    parser.add_argument(
+        '--seconds',
+        type=float,
+        default=120.0,
+        help='Seconds of video, from the start, to track vehicles through'
+    )
+
+    parser.add_argument(
+        '--sample-fps',
+        type=float,
+        default=10.0,
+        help='Frames per second run through the tracker'
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='Worker processes for the scene profile (default: CPU count)'
+    )
+
+    parser.add_argument(
+        '--log-level',
+        type=str,
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+        default='INFO',
+        help='Set the logging level'
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    """Profile the footage, track vehicles, and write the calibrated config."""
+    args = parse_args()
+    setup_logging(args.log_level)
+    logger = logging.getLogger(__name__)
+
+    config = DetectionConfig.from_yaml(args.config) if args.config else DetectionConfig()
+    output = args.output or os.path.join('configs', f'{args.camera_id}.yaml')
+
+    try:
+        profile = profile_video(args.video, workers=args.workers)
+        model = MODELS.acquire(config.model_path, config.imgsz)
+        tracks, frame_size = collect_tracks(args.video, model, config,
+                                            seconds=args.seconds, sample_fps=args.sample_fps)
+    except (FileNotFoundError, RuntimeError) as e:
+        logger.error(f"Calibration failed: {e}")
+        return 1
+
+    values, summary = calibrate(tracks, frame_size, profile)
+    logger.info(f"Calibration evidence: {summary}")
+    for name, value in values.items():
+        logger.info(f"  {name}: {getattr(config, name)} -> {value}")
+        setattr(config, name, value)
+    config.camera_id = args.camera_id
+
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    config.save_yaml(output)
+    logger.info(f"Wrote {output}; start the camera with --config {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
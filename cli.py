@@ -2,6 +2,7 @@ import argparse
 import logging
 from pathlib import Path
 from typing import Optional
+from vehicle_detection.ingest import is_stream_url
 
 def setup_logging(level: str = 'INFO') -> None:
     """Setup logging configuration.
@@ -37,7 +38,7 @@ def parse_args() -> argparse.Namespace:
         '--video',
         type=str,
         required=True,
-        help='Path to the input video file'
+        help='Path to the input video file, a camera index, or a stream URL (rtsp://, http://, ...)'
     )
     
     parser.add_argument(
@@ -72,17 +73,18 @@ def validate_paths(video_path: str, config_path: Optional[str] = None, output_pa
     """Validate input and output paths.
     
     Args:
-        video_path: Path to input video file
+        video_path: Path to input video file, camera index or stream URL
         config_path: Path to configuration file (optional)
         output_path: Path to output directory (optional)
     
     Raises:
-        FileNotFoundError: If required files don't exist
+        FileNotFoundError: If required files don't exist (camera indexes and
+            stream URLs are not checked)
         ValueError: If paths are invalid
     """
-    # Validate video path
+    # Validate video path; cameras and streams are only known once opened
     video = Path(video_path)
-    if not video.exists():
+    if not (is_stream_url(video_path) or video_path.isdigit()) and not video.exists():
         raise FileNotFoundError(f'Video file not found: {video_path}')
     
     # Validate config path if provided
@@ -0,0 +1,134 @@
+import argparse
+import logging
+from datetime import datetime
+from cli import setup_logging
+from vehicle_detection.database import TABLE_COLUMNS
+from vehicle_detection.export import export_table, validate_columns, FORMATS
+
+
+def parse_time(value):
+    """Parse an ISO date/time or epoch seconds into epoch seconds."""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments.
+
+    Returns:
+        Parsed command line arguments
+    """
+    parser = argparse.ArgumentParser(
+        description='Export detections and violations to partitioned Parquet/Arrow files',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument(
+        '--database',
+        type=str,
+        default='vehicle_detection.db',
+        help='Path to the SQLite database'
+    )
+
+    parser.add_argument(
+        '--table',
+        type=str,
+        choices=sorted(TABLE_COLUMNS),
+        action='append',
+        help='Table to export (repeatable, default: all tables)'
+    )
+
+    parser.add_argument(
+        '--output',
+        type=str,
+        required=True,
+        help='Directory to write the partitioned files to'
+    )
+
+    parser.add_argument(
+        '--format',
+        type=str,
+        choices=sorted(FORMATS),
+        default='parquet',
+        help='Output file format'
+    )
+
+    parser.add_argument(
+        '--columns',
+        type=str,
+        help='Comma-separated list of columns to export'
+    )
+
+    parser.add_argument(
+        '--start',
+        type=parse_time,
+        help='Only export rows at or after this time (ISO format or epoch seconds)'
+    )
+
+    parser.add_argument(
+        '--end',
+        type=parse_time,
+        help='Only export rows before this time (ISO format or epoch seconds)'
+    )
+
+    parser.add_argument(
+        '--camera',
+        type=str,
+        help='Only export rows from this camera'
+    )
+
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=50000,
+        help='Number of rows read from the database per chunk'
+    )
+
+    parser.add_argument(
+        '--log-level',
+        type=str,
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+        default='INFO',
+        help='Set the logging level'
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    """Export the requested tables."""
+    args = parse_args()
+    setup_logging(args.log_level)
+    logger = logging.getLogger(__name__)
+
+    columns = [c.strip() for c in args.columns.split(',')] if args.columns else None
+    tables = args.table or sorted(TABLE_COLUMNS)
+
+    try:
+        # Reject bad columns before any table is written
+        for table in tables:
+            validate_columns(table, columns)
+        for table in tables:
+            files = export_table(
+                args.database,
+                table,
+                args.output,
+                fmt=args.format,
+                columns=columns,
+                start_time=args.start,
+                end_time=args.end,
+                camera_id=args.camera,
+                chunk_size=args.chunk_size
+            )
+            logger.info(f"Exported {table} to {len(files)} file(s)")
+    except (ValueError, ImportError) as e:
+        logger.error(f"Export failed: {e}")
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,106 @@
+import argparse
+import logging
+import os
+from multiprocessing.connection import Client
+from cli import setup_logging
+from vehicle_detection.detector import VehicleDetectionProcessor
+from vehicle_detection.violation_detector import ViolationDetector
+from vehicle_detection.ipc import SharedFrameRing, IPCSink
+from vehicle_detection.evidence import evidence_recorder
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments.
+
+    Returns:
+        Parsed command line arguments
+    """
+    parser = argparse.ArgumentParser(
+        description='Inference worker process for the web application',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument('--video', type=str, required=True, help='Video file path, camera index or stream URL')
+    parser.add_argument('--config', type=str, help='Path to the configuration file (YAML)')
+    parser.add_argument('--camera-id', type=str, help='Camera ID recorded with detections (overrides config)')
+    parser.add_argument('--address', type=str, required=True, help='host:port of the web tier')
+    parser.add_argument('--frames', type=str, required=True, help='Name of the shared frame ring')
+    parser.add_argument('--frame-size', type=str, default='1280x720', help='Shared frame size (WIDTHxHEIGHT)')
+    parser.add_argument('--fps', type=float, default=15.0, help='Maximum frame publish rate')
+    parser.add_argument(
+        '--log-level',
+        type=str,
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+        default='INFO',
+        help='Set the logging level'
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    """Run detection and publish results to the web tier that started us."""
+    args = parse_args()
+    setup_logging(args.log_level)
+    logger = logging.getLogger(__name__)
+
+    host, port = args.address.rsplit(':', 1)
+    authkey = bytes.fromhex(os.environ['TRAFFIC_IPC_AUTHKEY'])
+    width, height = (int(v) for v in args.frame_size.split('x'))
+
+    conn = Client((host, int(port)), authkey=authkey)
+    ring = SharedFrameRing((height, width, 3), name=args.frames)
+    detector = None
+    try:
+        detector = VehicleDetectionProcessor(args.video, args.config, loop=True)
+        detector.config.display_output = False
+        if args.camera_id:
+            detector.config.camera_id = args.camera_id
+        evidence = evidence_recorder(detector.config)
+        sink = IPCSink(conn, ring, ViolationDetector(detector), fps=args.fps, evidence=evidence)
+        detector.writer.add_listener(sink.on_rows_written)
+        if evidence:
+            detector.add_sink(evidence)
+        detector.add_sink(sink)
+        sink.send('hello', {
+            'database_path': detector.config.database_path,
+            'evidence_path': os.path.abspath(detector.config.evidence_path),
+            'pid': os.getpid()
+        })
+        reported = None
+
+        detector.start_processing()
+        # Block until the web tier asks us to stop or processing ends
+        while detector.is_processing:
+            if conn.poll(0.5):
+                message = conn.recv()
+                if message[0] == 'stop':
+                    break
+                if message[0] == 'config':
+                    # Applied by the pipeline at its next frame
+                    try:
+                        detector.update_config(message[1], source='api')
+                    except ValueError as e:
+                        sink.send('config', detector.runtime.describe(), str(e))
+            # Report new versions, including edits picked up from the config file
+            if detector.runtime.current is not reported:
+                reported = detector.runtime.current
+                sink.send('config', detector.runtime.describe(), None)
+    except (EOFError, OSError):
+        logger.info("Web tier disconnected")
+    except Exception as e:
+        logger.error(f"Inference worker failed: {e}")
+        conn.send(('error', str(e)))
+        return 1
+    finally:
+        if detector:
+            detector.stop_processing()
+            detector.writer.close()
+        ring.close()
+        conn.close()
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,177 @@
+import queue
+import shutil
+import socket
+import subprocess
+import threading
+import time
+from types import SimpleNamespace
+
+import cv2
+import pytest
+
+from vehicle_detection import ingest
+from vehicle_detection.ingest import LiveSource
+
+
+class FakeCapture:
+    """Capture whose read() returns the frames a test feeds it, in order.
+
+    Feeding None makes the next read fail, like a dropped connection.
+    Otherwise read() waits for a frame until the test is done with it.
+    """
+
+    def __init__(self, opened=True):
+        self.opened = opened
+        self.script = queue.Queue()
+        self.released = False
+        self.finished = threading.Event()
+
+    def feed(self, *frames):
+        for frame in frames:
+            self.script.put(frame)
+
+    def read(self):
+        while True:
+            try:
+                frame = self.script.get(timeout=0.01)
+            except queue.Empty:
+                if self.finished.is_set():
+                    return False, None
+                continue
+            return (frame is not None), frame
+
+    def get(self, prop):
+        return 0.0
+
+    def isOpened(self):
+        return self.opened
+
+    def release(self):
+        self.released = True
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.005)
+
+
+def close(source, *captures):
+    for cap in captures:
+        cap.finished.set()  # Unblock a read the source thread is waiting in
+    source.release()
+
+
+def test_reconnects_with_backoff(monkeypatch):
+    delays = []
+    sleep = time.sleep
+    monkeypatch.setattr(ingest, 'time', SimpleNamespace(
+        monotonic=time.monotonic, sleep=lambda seconds: delays.append(seconds) or sleep(0.001)))
+    monkeypatch.setattr(ingest, 'random', SimpleNamespace(uniform=lambda low, high: high))
+
+    first, restored = FakeCapture(), FakeCapture()
+    captures = [first, FakeCapture(opened=False), FakeCapture(opened=False),
+                FakeCapture(opened=False), restored]
+    source = LiveSource(lambda: captures.pop(0), 'fake', reconnect_delay=0.01, max_reconnect_delay=0.04)
+    try:
+        first.feed(1, None)
+        assert source.read() == (True, 1)
+        restored.feed(2)
+        assert source.read() == (True, 2)
+
+        assert first.released
+        assert delays == [0.01, 0.02, 0.04, 0.04]
+        health = source.health()
+        assert health['connected']
+        assert health['reconnects'] == 4
+    finally:
+        close(source, restored)
+
+
+def test_initial_open_failure_raises():
+    with pytest.raises(RuntimeError):
+        LiveSource(lambda: FakeCapture(opened=False), 'fake')
+
+
+def test_drops_frames_older_than_max_latency():
+    cap = FakeCapture()
+    source = LiveSource(lambda: cap, 'fake', buffer_frames=8, max_latency=0.05)
+    try:
+        cap.feed(1, 2, 3, 4)
+        wait_until(lambda: len(source.frames) == 4)
+        time.sleep(0.1)
+        # Everything is stale; only the newest frame is kept
+        assert source.read() == (True, 4)
+        assert source.dropped_frames == 3
+
+        cap.feed(5)
+        assert source.read() == (True, 5)
+        assert source.dropped_frames == 3
+    finally:
+        close(source, cap)
+
+
+def test_full_buffer_drops_oldest():
+    cap = FakeCapture()
+    source = LiveSource(lambda: cap, 'fake', buffer_frames=2, max_latency=10.0)
+    try:
+        cap.feed(1, 2, 3)
+        wait_until(lambda: source.dropped_frames == 1)
+        assert source.read() == (True, 2)
+        assert source.read() == (True, 3)
+    finally:
+        close(source, cap)
+
+
+def test_counts_each_stall_once():
+    cap = FakeCapture()
+    source = LiveSource(lambda: cap, 'fake', stall_timeout=0.05)
+    try:
+        cap.feed(1)
+        assert source.read() == (True, 1)
+        assert source.read() == (False, None)
+        assert source.read() == (False, None)
+        assert source.health()['stalls'] == 1
+
+        cap.feed(2)
+        assert source.read() == (True, 2)
+        assert source.read() == (False, None)
+        assert source.health()['stalls'] == 2
+    finally:
+        close(source, cap)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.mark.skipif(shutil.which('ffmpeg') is None, reason='ffmpeg is not installed')
+def test_reads_ffmpeg_served_stream():
+    url = f'http://127.0.0.1:{_free_port()}/live.ts'
+    server = subprocess.Popen(
+        ['ffmpeg', '-loglevel', 'error', '-re', '-f', 'lavfi', '-i', 'testsrc=size=320x240:rate=10',
+         '-c:v', 'mpeg2video', '-f', 'mpegts', '-listen', '1', url],
+        stdin=subprocess.DEVNULL)
+    try:
+        # The server needs a moment before it accepts connections
+        deadline = time.monotonic() + 10.0
+        while True:
+            try:
+                source = LiveSource(lambda: cv2.VideoCapture(url), url, stall_timeout=5.0)
+                break
+            except RuntimeError:
+                assert time.monotonic() < deadline, 'ffmpeg did not start serving'
+                time.sleep(0.2)
+        try:
+            success, frame = source.read()
+            assert success
+            assert frame.shape == (240, 320, 3)
+            assert source.health()['connected']
+        finally:
+            source.release()
+    finally:
+        server.kill()
+        server.wait()
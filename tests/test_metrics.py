@@ -0,0 +1,39 @@
+from collections import Counter
+
+from vehicle_detection.metrics import MetricsRegistry
+
+
+def _series(text):
+    """Sample lines of an exposition, keyed by name and labels."""
+    return [line.rsplit(' ', 1)[0] for line in text.splitlines() if not line.startswith('#')]
+
+
+def test_render_merges_overlapping_remote_families():
+    local = MetricsRegistry()
+    remote = MetricsRegistry()
+    for registry, seconds in ((local, 0.002), (remote, 0.004)):
+        stages = registry.histogram('traffic_stage_seconds', 'Time spent in each pipeline stage',
+                                    ('stream', 'stage'), buckets=(0.001, 0.01))
+        stages.observe(seconds, stream='cam', stage='drawing')
+        registry.counter('traffic_frames_total', 'Frames', ('stream',)).inc(3, stream='cam')
+
+    text = local.render(remote.collect())
+
+    duplicates = [series for series, count in Counter(_series(text)).items() if count > 1]
+    assert duplicates == []
+    assert text.count('# TYPE traffic_stage_seconds histogram') == 1
+    assert 'traffic_frames_total{stream="cam"} 6' in text
+    assert 'traffic_stage_seconds_count{stream="cam",stage="drawing"} 2' in text
+    assert 'traffic_stage_seconds_bucket{stream="cam",stage="drawing",le="0.01"} 2' in text
+
+
+def test_render_keeps_distinct_labels_apart():
+    local = MetricsRegistry()
+    remote = MetricsRegistry()
+    local.gauge('traffic_queue_depth', 'Queue depth', ('stream', 'queue')).set(1, stream='cam', queue='a')
+    remote.gauge('traffic_queue_depth', 'Queue depth', ('stream', 'queue')).set(2, stream='cam', queue='b')
+
+    text = local.render(remote.collect())
+
+    assert 'traffic_queue_depth{stream="cam",queue="a"} 1' in text
+    assert 'traffic_queue_depth{stream="cam",queue="b"} 2' in text
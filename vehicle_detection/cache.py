@@ -0,0 +1,82 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+def _json_default(value):
+    """Serialize numpy scalars (e.g. box coordinates) as plain numbers."""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+class CachedResponse:
+    """A cached query result, pre-serialized to JSON with its ETag."""
+
+    __slots__ = ('value', 'body', 'etag', 'expires_at', 'tags')
+
+    def __init__(self, value, ttl, tags):
+        self.value = value
+        self.body = json.dumps(value, sort_keys=True, default=_json_default).encode('utf-8')
+        self.etag = hashlib.sha1(self.body).hexdigest()
+        self.expires_at = time.monotonic() + ttl
+        self.tags = frozenset(tags)
+
+
+class QueryCache:
+    def __init__(self, max_entries=256):
+        """LRU cache for query results with per-entry TTLs and tag invalidation.
+
+        Args:
+            max_entries: Maximum number of results kept; the least recently
+                used entry is evicted first
+        """
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, ttl, compute, tags=()):
+        """Return the cached result for ``key``, computing it on a miss.
+
+        Args:
+            key: Hashable cache key
+            ttl: Seconds the result stays valid
+            compute: Zero-argument callable producing a JSON-serializable value
+            tags: Tags the result depends on, for invalidate()
+
+        Returns:
+            CachedResponse
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.expires_at > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Compute outside the lock so one slow query doesn't block other keys
+        entry = CachedResponse(compute(), ttl, tags)
+
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, tag):
+        """Drop every entry that depends on ``tag``."""
+        with self.lock:
+            stale = [key for key, entry in self.entries.items() if tag in entry.tags]
+            for key in stale:
+                del self.entries[key]
+        return len(stale)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
@@ -0,0 +1,151 @@
+import cv2
+import logging
+import math
+import numpy as np
+from vehicle_detection.geometry import REFERENCE_SIZE
+from vehicle_detection.profiler import compass_direction, suggest_stop_line
+
+VEHICLE_CLASSES = ('car', 'truck', 'bus', 'motorcycle', 'bicycle')
+# Typical passenger car length, used to estimate the ground scale
+CAR_LENGTH_METERS = 4.5
+# Tracks needed before detections are trusted over optical flow
+MIN_TRACKS = 5
+
+
+def collect_tracks(video_path, model, config, seconds=120.0, sample_fps=10.0):
+    """Track vehicles through the start of a video.
+
+    Reads the first ``seconds`` of the file sequentially and runs the
+    tracker on ``sample_fps`` frames per second.
+
+    Returns:
+        tuple: ({track_id: {'class': name, 'points': [(t, x, y, w, h), ...]}},
+        (width, height)). Times are video seconds; positions and sizes are
+        fractions of the frame size.
+    """
+    logger = logging.getLogger(__name__)
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open video {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    step = max(1, round(fps / sample_fps))
+    limit = int(seconds * fps)
+    inference_args = {'imgsz': config.imgsz} if config.imgsz else {}
+
+    tracks = {}
+    index = 0
+    try:
+        while index < limit and cap.grab():
+            index += 1
+            if (index - 1) % step:
+                continue
+            success, frame = cap.retrieve()
+            if not success:
+                break
+            results = model.track(frame, persist=True, verbose=False,
+                                  conf=config.confidence_threshold, iou=config.nms_threshold,
+                                  **inference_args)
+            boxes = results[0].boxes if results else None
+            if boxes is None or boxes.id is None:
+                continue
+            names = results[0].names
+            ids = boxes.id.cpu().numpy().astype(int)
+            classes = boxes.cls.cpu().numpy().astype(int)
+            for track_id, class_id, (x1, y1, x2, y2) in zip(ids, classes, boxes.xyxy.cpu().numpy()):
+                if names[class_id] not in VEHICLE_CLASSES:
+                    continue
+                track = tracks.setdefault(int(track_id), {'class': names[class_id], 'points': []})
+                track['points'].append(((index - 1) / fps, (x1 + x2) / 2 / width, (y1 + y2) / 2 / height,
+                                        (x2 - x1) / width, (y2 - y1) / height))
+    finally:
+        cap.release()
+    logger.info(f"Collected {len(tracks)} vehicle tracks from {index / fps:.0f}s of video")
+    return tracks, (width, height)
+
+
+def calibrate(tracks, frame_size, profile=None):
+    """Derive camera configuration values from vehicle tracks and a scene profile.
+
+    Detections are preferred; the optical-flow profile fills in whatever
+    too few tracks were seen to estimate.
+
+    Args:
+        tracks: Output of collect_tracks()
+        frame_size: (width, height) of the video
+        profile: Optional scene profile from profile_video()
+
+    Returns:
+        tuple: (config values to set, summary of the evidence behind them)
+    """
+    width, height = frame_size
+    moving = []
+    for track in tracks.values():
+        points = track['points']
+        if len(points) < 3:
+            continue
+        t0, x0, y0 = points[0][:3]
+        t1, x1, y1 = points[-1][:3]
+        # Displacement in pixels, so horizontal and vertical motion compare fairly
+        dx, dy = (x1 - x0) * width, (y1 - y0) * height
+        if t1 > t0 and math.hypot(dx, dy) > 0.02 * width:
+            moving.append((track, dx, dy, t1 - t0))
+
+    values = {}
+    summary = {'tracks': len(tracks), 'moving_tracks': len(moving)}
+    flow = (profile or {}).get('direction', {})
+    zones = (profile or {}).get('suggested_zones', {})
+
+    # Direction of travel and whether it is consistent enough for wrong-way checks
+    if len(moving) >= MIN_TRACKS:
+        directions = [compass_direction(dx, dy) for _, dx, dy, _ in moving]
+        direction = max(set(directions), key=directions.count)
+        agreement = directions.count(direction) / len(directions)
+    else:
+        direction, agreement = flow.get('dominant'), flow.get('consistency', 0.0)
+    if direction:
+        values['wrong_way_direction'] = direction
+        values['detect_wrong_way'] = agreement >= 0.8
+        summary['direction_agreement'] = round(agreement, 3)
+
+    # Monitored area: hull of the moving vehicles' boxes. Parked cars and
+    # other stationary detections off the road would only widen it.
+    if len(moving) >= MIN_TRACKS:
+        points = []
+        for track, _, _, _ in moving:
+            for _, x, y, w, h in track['points']:
+                points.extend([(x - w / 2, y - h / 2), (x + w / 2, y + h / 2),
+                               (x - w / 2, y + h / 2), (x + w / 2, y - h / 2)])
+        pixels = np.clip(np.array(points) * (width, height), 0, (width, height)).astype(np.float32)
+        hull = cv2.convexHull(pixels)
+        polygon = cv2.approxPolyDP(hull, 0.02 * cv2.arcLength(hull, True), True).reshape(-1, 2)
+        values['default_area'] = [[round(float(x) / width, 4), round(float(y) / height, 4)] for x, y in polygon]
+    elif zones.get('default_area'):
+        values['default_area'] = zones['default_area']
+
+    if direction and 'default_area' in values:
+        values['red_light_line'] = suggest_stop_line(values['default_area'], direction,
+                                                     (profile or {}).get('light_candidates', []))
+
+    # Ground scale from the length of cars along the direction of travel
+    lengths = [
+        point[3] * width if compass_direction(dx, dy) in ('east', 'west') else point[4] * height
+        for track, dx, dy, _ in moving if track['class'] == 'car'
+        for point in track['points']
+    ]
+    if len(lengths) >= MIN_TRACKS:
+        frame_meters_per_pixel = CAR_LENGTH_METERS / float(np.median(lengths))
+        values['meters_per_pixel'] = round(frame_meters_per_pixel * width / REFERENCE_SIZE[0], 4)
+        summary['median_car_length_px'] = round(float(np.median(lengths)), 1)
+
+        # Speed limit at the 85th percentile of observed speeds, in 5 km/h steps
+        speeds = [math.hypot(dx, dy) * frame_meters_per_pixel / duration * 3.6
+                  for _, dx, dy, duration in moving]
+        percentile = float(np.percentile(speeds, 85))
+        values['speed_threshold'] = float(max(10, 5 * math.ceil(percentile / 5)))
+        # Speeds are measured rather than guessed, so no safety margin is applied
+        values['speed_multiplier'] = 1.0
+        summary['speed_p85_kmh'] = round(percentile, 1)
+
+    return values, summary
@@ -0,0 +1,258 @@
+import abc
+import cv2
+import logging
+import os
+import queue
+import re
+import subprocess
+import sys
+import threading
+import numpy as np
+
+CAPTURE_BACKENDS = ('opencv', 'pyav', 'ffmpeg')
+
+
+def _require_av():
+    try:
+        import av
+    except ImportError as e:
+        raise ImportError("The 'pyav' capture backend requires PyAV (pip install av)") from e
+    return av
+
+
+class ThreadedCapture(abc.ABC):
+    """Read-ahead capture that decodes into a pool of preallocated frames.
+
+    Implements the subset of the cv2.VideoCapture interface the detector
+    uses (read, grab, get, set to rewind, isOpened, release). A background
+    thread decodes up to ``read_ahead`` frames ahead of the consumer, each
+    into the next of ``buffers`` preallocated arrays. A returned frame stays
+    valid until ``buffers - read_ahead`` further frames have been read;
+    consumers that keep frames longer must copy them (``pooled`` is True).
+
+    Subclasses implement _open() (open the source), _decode_into() (fill
+    a buffer from the decoder thread) and _close() (release the source).
+    """
+
+    pooled = True
+
+    def __init__(self, size, fps, buffers=32, read_ahead=4):
+        self.width, self.height = size
+        self.fps = fps
+        self.pool = [np.empty((self.height, self.width, 3), np.uint8) for _ in range(buffers)]
+        self.next_buffer = 0
+        self.read_ahead = read_ahead
+        self.ready = queue.Queue(maxsize=read_ahead)
+        self.logger = logging.getLogger(__name__)
+        self.running = False
+        self.thread = None
+
+    def _start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='capture-decoder', daemon=True)
+        self.thread.start()
+
+    def _stop(self):
+        self.running = False
+        # Unblock a decoder waiting for room in the queue
+        while self.thread and self.thread.is_alive():
+            try:
+                self.ready.get_nowait()
+            except queue.Empty:
+                pass
+            self.thread.join(timeout=0.1)
+        self.ready = queue.Queue(maxsize=self.read_ahead)
+
+    def _run(self):
+        while self.running:
+            buffer = self.pool[self.next_buffer]
+            self.next_buffer = (self.next_buffer + 1) % len(self.pool)
+            try:
+                success = self._decode_into(buffer)
+            except Exception as e:
+                self.logger.error(f"Error decoding frame: {e}")
+                success = False
+            self.ready.put(buffer if success else None)
+            if not success:
+                break
+
+    @abc.abstractmethod
+    def _decode_into(self, buffer):
+        """Decode the next frame into ``buffer``; return False at end of stream."""
+
+    @abc.abstractmethod
+    def _open(self):
+        """Open the source."""
+
+    @abc.abstractmethod
+    def _close(self):
+        """Release the source."""
+
+    def read(self):
+        if not self.running and self.ready.empty():
+            return False, None
+        frame = self.ready.get()
+        if frame is None:
+            self.running = False
+            return False, None
+        return True, frame
+
+    def grab(self):
+        return self.read()[0]
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.width
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.height
+        return 0.0
+
+    def set(self, prop, value):
+        """Only rewinding (CAP_PROP_POS_FRAMES to 0) is supported."""
+        if prop != cv2.CAP_PROP_POS_FRAMES or value != 0:
+            return False
+        self._stop()
+        self._close()
+        self._open()
+        self._start()
+        return True
+
+    def isOpened(self):
+        return self.thread is not None
+
+    def release(self):
+        self._stop()
+        self._close()
+        self.thread = None
+
+
+class PyAVCapture(ThreadedCapture):
+    def __init__(self, source, size=None, threads=0, buffers=32, read_ahead=4, timeout=None):
+        """Decode with PyAV using frame/slice threading.
+
+        Frames are scaled and converted to BGR by libswscale straight from the
+        decoded picture, so full-resolution BGR frames are never materialised
+        in Python.
+
+        Args:
+            source: File path, URL, or camera index (V4L2 on Linux)
+            size: (width, height) to scale to; None keeps the native size
+            threads: Decoder threads; 0 lets FFmpeg choose
+            buffers: Preallocated frames in the pool
+            read_ahead: Frames decoded ahead of the consumer
+            timeout: Seconds to wait when opening or reading a network stream
+        """
+        self.av = _require_av()
+        self.source = source
+        self.threads = threads
+        self.timeout = timeout
+        self._open()
+        context = self.video.codec_context
+        super().__init__(tuple(size) if size else (context.width, context.height),
+                         float(self.video.average_rate or 0), buffers, read_ahead)
+        self._start()
+
+    def _open(self):
+        if isinstance(self.source, int) or str(self.source).isdigit():
+            self.container = self.av.open(f'/dev/video{int(self.source)}', format='v4l2')
+        else:
+            self.container = self.av.open(str(self.source), timeout=self.timeout)
+        self.video = self.container.streams.video[0]
+        self.video.thread_type = 'AUTO'
+        self.video.codec_context.thread_count = self.threads
+        self.frames = self.container.decode(self.video)
+
+    def _close(self):
+        self.container.close()
+
+    def _decode_into(self, buffer):
+        try:
+            frame = next(self.frames)
+        except StopIteration:
+            return False
+        picture = frame.reformat(width=self.width, height=self.height, format='bgr24')
+        plane = picture.planes[0]
+        # Rows may be padded; copy only the visible part of each line
+        rows = np.frombuffer(plane, np.uint8).reshape(self.height, plane.line_size)
+        np.copyto(buffer.reshape(self.height, self.width * 3), rows[:, :self.width * 3])
+        return True
+
+
+class FFmpegCapture(ThreadedCapture):
+    def __init__(self, source, size=None, threads=0, buffers=32, read_ahead=4, timeout=None):
+        """Decode with an ffmpeg subprocess writing raw BGR frames to a pipe.
+
+        Decoding and scaling run in the ffmpeg process with its own threads.
+        Frames are read straight into the preallocated pool. The executable
+        is taken from $FFMPEG_BINARY, or 'ffmpeg' on the PATH.
+
+        Args:
+            source: File path, URL, or camera index (V4L2 on Linux)
+            size: (width, height) to scale to; None keeps the native size
+            threads: Decoder threads; 0 lets FFmpeg choose
+            buffers: Preallocated frames in the pool
+            read_ahead: Frames decoded ahead of the consumer
+            timeout: Seconds to wait when opening or reading a network stream
+        """
+        self.binary = os.environ.get('FFMPEG_BINARY', 'ffmpeg')
+        self.threads = threads
+        self.timeout = timeout
+        if isinstance(source, int) or str(source).isdigit():
+            self.input_args = ['-f', 'v4l2', '-i', f'/dev/video{int(source)}']
+        elif timeout and '://' in str(source):
+            # RTSP names its socket timeout differently from other protocols
+            option = '-timeout' if str(source).lower().startswith('rtsp') else '-rw_timeout'
+            self.input_args = [option, str(int(timeout * 1e6)), '-i', str(source)]
+        else:
+            self.input_args = ['-i', str(source)]
+        native_size, fps = self._probe()
+        self.process = None
+        super().__init__(tuple(size) if size else native_size, fps, buffers, read_ahead)
+        self._open()
+        self._start()
+
+    def _probe(self):
+        """Read the native size and frame rate from ffmpeg's stream description."""
+        result = subprocess.run([self.binary, '-hide_banner'] + self.input_args,
+                                capture_output=True, text=True, timeout=self.timeout)
+        match = re.search(r'Video: .*?(\d{2,5})x(\d{2,5})', result.stderr)
+        if not match:
+            raise RuntimeError(f"ffmpeg could not open video source: {self.input_args[-1]}")
+        fps = re.search(r'(\d+(?:\.\d+)?) fps', result.stderr)
+        return (int(match.group(1)), int(match.group(2))), float(fps.group(1)) if fps else 0.0
+
+    def _open(self):
+        command = [self.binary, '-loglevel', 'error', '-threads', str(self.threads)] + self.input_args + [
+            '-an', '-vf', f'scale={self.width}:{self.height}',
+            '-pix_fmt', 'bgr24', '-f', 'rawvideo', 'pipe:1'
+        ]
+        self.process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=sys.stderr,
+                                        bufsize=self.width * self.height * 3)
+
+    def _close(self):
+        if self.process:
+            self.process.kill()
+            self.process.wait()
+            self.process.stdout.close()
+            self.process = None
+
+    def _decode_into(self, buffer):
+        view = memoryview(buffer).cast('B')
+        filled = 0
+        while filled < len(view):
+            count = self.process.stdout.readinto(view[filled:])
+            if not count:
+                return False
+            filled += count
+        return True
+
+
+def open_capture(source, backend, size=None, threads=0, buffers=32, timeout=None):
+    """Open a PyAV or ffmpeg capture for ``source`` (see CAPTURE_BACKENDS)."""
+    if backend == 'pyav':
+        return PyAVCapture(source, size, threads, buffers, timeout=timeout)
+    if backend == 'ffmpeg':
+        return FFmpegCapture(source, size, threads, buffers, timeout=timeout)
+    raise ValueError(f"Unknown capture backend: {backend}")
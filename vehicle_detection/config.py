@@ -13,15 +13,65 @@ class DetectionConfig:
     
     # Video processing
     frame_skip: int = 0  # Process every nth frame (0 means process all frames)
+    pace_to_source_fps: bool = True  # Play video files back no faster than their frame rate
+    config_poll_interval: float = 1.0  # Seconds between checks of the config file for edits (0 disables)
     display_output: bool = True
     save_output: bool = False
     output_path: Optional[str] = None
+    output_segment_seconds: float = 60.0  # Duration of each recorded video segment
+    output_codec: str = 'mp4v'  # FourCC used for recorded segments
+    output_extension: str = '.mp4'
     
-    # Detection area (can be overridden)
-    default_area: List[Tuple[int, int]] = None
+    # Capture backend: 'opencv', or 'pyav'/'ffmpeg' for threaded decoding
+    # that scales in the decoder and reuses preallocated frame buffers
+    capture_backend: str = 'opencv'
+    capture_size: Optional[List[int]] = None  # [width, height] to decode to; None keeps the source size
+    capture_threads: int = 0  # Decoder threads (0 lets FFmpeg choose)
+    capture_buffers: int = 32  # Preallocated frames in the decode pool
+    
+    # Live sources (cameras and RTSP/HTTP streams)
+    live_buffer_frames: int = 8  # Frames buffered between the reader and the pipeline
+    max_latency: float = 0.5  # Seconds a buffered frame may wait before it is dropped
+    stall_timeout: float = 5.0  # Seconds without frames before the source counts as stalled
+    reconnect_delay: float = 0.5  # First reconnect delay, doubled per failed attempt
+    max_reconnect_delay: float = 30.0
+    
+    # Violation evidence (pre-roll clip and cropped still per vehicle and
+    # violation type). Off by default: files are never deleted automatically.
+    save_evidence: bool = False
+    evidence_path: str = 'evidence'
+    evidence_preroll: float = 5.0  # Seconds of video kept before a violation
+    evidence_postroll: float = 2.0  # Seconds recorded after a violation
+    evidence_buffer_mb: float = 32.0  # Memory budget of the pre-roll buffer per stream
+    evidence_fps: float = 10.0
+    
+    # Counting
+    track_id_ttl: float = 300.0  # Seconds an unseen track ID is remembered
+    max_tracked_ids: int = 10000  # Upper bound on remembered track IDs
+    count_bucket: str = '%Y-%m-%d'  # strftime format; counts reset when it changes
+    
+    # Inference size (pixels, longest side) the model letterboxes frames to;
+    # None keeps the model's default. Boxes come back in frame coordinates.
+    imgsz: Optional[int] = None
+    
+    # Zones and lines as (x, y) fractions of the frame size, scaled to each
+    # stream's resolution at startup. Pixel coordinates (values above 1) from
+    # older configurations are read relative to zone_reference_size.
+    default_area: List[Tuple[float, float]] = None
+    red_light_line: List[Tuple[float, float]] = None
+    restricted_areas: List[List[Tuple[float, float]]] = None  # No-parking zones
+    zone_reference_size: Tuple[int, int] = (1920, 1080)
+    
+    # Violation rules (see calibrate_camera.py to derive them from footage)
+    wrong_way_direction: str = 'south'  # Proper direction of travel: north, south, east or west
+    detect_wrong_way: bool = False
+    speed_threshold: float = 20.0  # km/h
+    speed_multiplier: float = 1.5  # Applied to measured speeds before comparing to the threshold
+    meters_per_pixel: float = 0.15  # Ground distance per pixel, scaled to a 1920-pixel-wide frame
     
     # Database settings
     database_path: str = 'vehicle_detection.db'
+    camera_id: str = 'default'  # Identifies this stream's rows in the database
     
     # API settings
     google_api_key: Optional[str] = None
@@ -29,15 +79,22 @@ class DetectionConfig:
     def __post_init__(self):
         if self.default_area is None:
             # Using a combined ROI that covers both lanes
-            # Assuming 1920x1080 as base resolution
-            w, h = 1920, 1080
-            
-            # Define a wider area that covers both lanes
             self.default_area = [
-                (int(w*0.1), h),         # bottom left
-                (int(w*0.9), h),         # bottom right
-                (int(w*0.9), int(h*0.4)), # top right
-                (int(w*0.1), int(h*0.4))  # top left
+                (0.1, 1.0),  # bottom left
+                (0.9, 1.0),  # bottom right
+                (0.9, 0.4),  # top right
+                (0.1, 0.4)   # top left
+            ]
+        
+        if self.red_light_line is None:
+            # Spans both lanes at 70% of the height
+            self.red_light_line = [(0.1, 0.7), (0.9, 0.7)]
+        
+        if self.restricted_areas is None:
+            # Left and right lane no-parking zones
+            self.restricted_areas = [
+                [(0.15, 0.6), (0.35, 0.6), (0.35, 0.8), (0.15, 0.8)],
+                [(0.65, 0.6), (0.85, 0.6), (0.85, 0.8), (0.65, 0.8)]
             ]
         
         # Load API key from environment
@@ -64,11 +121,44 @@ class DetectionConfig:
             'confidence_threshold': self.confidence_threshold,
             'nms_threshold': self.nms_threshold,
             'frame_skip': self.frame_skip,
+            'pace_to_source_fps': self.pace_to_source_fps,
+            'config_poll_interval': self.config_poll_interval,
             'display_output': self.display_output,
             'save_output': self.save_output,
             'output_path': self.output_path,
-            'default_area': self.default_area,
-            'database_path': self.database_path
+            'output_segment_seconds': self.output_segment_seconds,
+            'output_codec': self.output_codec,
+            'output_extension': self.output_extension,
+            'capture_backend': self.capture_backend,
+            'capture_size': self.capture_size,
+            'capture_threads': self.capture_threads,
+            'capture_buffers': self.capture_buffers,
+            'live_buffer_frames': self.live_buffer_frames,
+            'max_latency': self.max_latency,
+            'stall_timeout': self.stall_timeout,
+            'reconnect_delay': self.reconnect_delay,
+            'max_reconnect_delay': self.max_reconnect_delay,
+            'save_evidence': self.save_evidence,
+            'evidence_path': self.evidence_path,
+            'evidence_preroll': self.evidence_preroll,
+            'evidence_postroll': self.evidence_postroll,
+            'evidence_buffer_mb': self.evidence_buffer_mb,
+            'evidence_fps': self.evidence_fps,
+            'track_id_ttl': self.track_id_ttl,
+            'max_tracked_ids': self.max_tracked_ids,
+            'count_bucket': self.count_bucket,
+            'imgsz': self.imgsz,
+            'default_area': [list(point) for point in self.default_area],
+            'red_light_line': [list(point) for point in self.red_light_line],
+            'restricted_areas': [[list(point) for point in area] for area in self.restricted_areas],
+            'zone_reference_size': list(self.zone_reference_size),
+            'wrong_way_direction': self.wrong_way_direction,
+            'detect_wrong_way': self.detect_wrong_way,
+            'speed_threshold': self.speed_threshold,
+            'speed_multiplier': self.speed_multiplier,
+            'meters_per_pixel': self.meters_per_pixel,
+            'database_path': self.database_path,
+            'camera_id': self.camera_id
         }
         
         with open(config_path, 'w') as f:
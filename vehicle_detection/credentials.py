@@ -1,24 +1,34 @@
 import os
 from pathlib import Path
 from typing import Optional
+from functools import lru_cache
 from dotenv import load_dotenv
 
+@lru_cache(maxsize=None)
+def _load_environment(env_path: Optional[str] = None) -> None:
+    """Load a .env file into the environment, once per process and path."""
+    if env_path:
+        load_dotenv(env_path)
+    else:
+        # Look for .env file in the project root
+        default_env_path = Path(__file__).parent.parent / '.env'
+        if default_env_path.exists():
+            load_dotenv(default_env_path)
+        else:
+            load_dotenv()  # Try to load from current directory
+
+
 class CredentialsManager:
     def __init__(self, env_path: Optional[str] = None):
         """Initialize the credentials manager.
         
+        The .env file is only read the first time; later instances (one per
+        DetectionConfig) reuse the loaded environment.
+        
         Args:
             env_path: Path to the .env file (optional)
         """
-        if env_path:
-            load_dotenv(env_path)
-        else:
-            # Look for .env file in the project root
-            default_env_path = Path(__file__).parent.parent / '.env'
-            if default_env_path.exists():
-                load_dotenv(default_env_path)
-            else:
-                load_dotenv()  # Try to load from current directory
+        _load_environment(env_path)
     
     @staticmethod
     def get_google_api_key() -> Optional[str]:
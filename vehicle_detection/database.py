@@ -2,6 +2,37 @@ import sqlite3
 from datetime import datetime
 import threading
 import logging
+from vehicle_detection.metrics import STAGE_SECONDS, QUEUE_DEPTH, ROWS_WRITTEN
+
+# Columns that may be requested from each table. Used to validate column
+# projections before they are interpolated into SQL.
+TABLE_COLUMNS = {
+    'vehicle_detections': (
+        'id', 'camera_id', 'vehicle_id', 'class_id', 'confidence',
+        'timestamp', 'detection_date'
+    ),
+    'violations': (
+        'id', 'camera_id', 'vehicle_id', 'violation_type', 'vehicle_type',
+        'confidence', 'speed', 'location_x', 'location_y', 'details',
+        'timestamp', 'detection_date', 'clip_path', 'image_path'
+    ),
+}
+
+# Columns written by insert_many(), in row tuple order
+INSERT_COLUMNS = {
+    'vehicle_detections': ('vehicle_id', 'class_id', 'confidence', 'timestamp',
+                           'detection_date', 'camera_id'),
+    'violations': ('camera_id', 'vehicle_id', 'violation_type', 'vehicle_type', 'confidence',
+                   'speed', 'location_x', 'location_y', 'details', 'timestamp',
+                   'detection_date', 'clip_path', 'image_path'),
+}
+
+# Equality filters accepted by the history queries, keyed by table. Each one
+# is backed by a (column, timestamp) index so filtered pages stay seekable.
+FILTER_COLUMNS = {
+    'vehicle_detections': ('camera_id', 'class_id', 'vehicle_id'),
+    'violations': ('camera_id', 'violation_type', 'vehicle_type', 'vehicle_id'),
+}
 
 class DatabaseHandler:
     def __init__(self, db_path):
@@ -43,15 +74,56 @@ class DatabaseHandler:
                     class_id INTEGER NOT NULL,
                     confidence REAL NOT NULL,
                     timestamp REAL NOT NULL,
-                    detection_date TEXT NOT NULL
+                    detection_date TEXT NOT NULL,
+                    camera_id TEXT NOT NULL DEFAULT 'default'
                 )
             """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS violations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    camera_id TEXT NOT NULL DEFAULT 'default',
+                    vehicle_id INTEGER NOT NULL,
+                    violation_type TEXT NOT NULL,
+                    vehicle_type TEXT,
+                    confidence REAL,
+                    speed REAL,
+                    location_x INTEGER,
+                    location_y INTEGER,
+                    details TEXT,
+                    timestamp REAL NOT NULL,
+                    detection_date TEXT NOT NULL,
+                    clip_path TEXT,
+                    image_path TEXT
+                )
+            """)
+            # Databases created before camera support lack the camera column
+            columns = [row[1] for row in cursor.execute("PRAGMA table_info(vehicle_detections)")]
+            if 'camera_id' not in columns:
+                cursor.execute("ALTER TABLE vehicle_detections ADD COLUMN camera_id TEXT NOT NULL DEFAULT 'default'")
+            # ... and violations tables created before evidence capture lack the links
+            columns = [row[1] for row in cursor.execute("PRAGMA table_info(violations)")]
+            for column in ('clip_path', 'image_path'):
+                if column not in columns:
+                    cursor.execute(f"ALTER TABLE violations ADD COLUMN {column} TEXT")
+            # Exports walk the tables partition by partition (date, camera)
+            for table in TABLE_COLUMNS:
+                cursor.execute(f"""
+                    CREATE INDEX IF NOT EXISTS idx_{table}_partition
+                    ON {table} (detection_date, camera_id, timestamp)
+                """)
+                # History pages seek on (timestamp, id), optionally behind a filter
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_time ON {table} (timestamp)")
+                for column in FILTER_COLUMNS[table]:
+                    cursor.execute(f"""
+                        CREATE INDEX IF NOT EXISTS idx_{table}_{column}_time
+                        ON {table} ({column}, timestamp)
+                    """)
             connection.commit()
         except sqlite3.Error as e:
             self.logger.error(f"Error creating tables: {e}")
             raise
 
-    def insert_detection(self, vehicle_id, class_id, confidence, timestamp):
+    def insert_detection(self, vehicle_id, class_id, confidence, timestamp, camera_id='default'):
         """Insert a new vehicle detection record with proper error handling."""
         with self.lock:
             try:
@@ -60,9 +132,9 @@ class DatabaseHandler:
                 detection_date = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
                 cursor.execute("""
                     INSERT INTO vehicle_detections 
-                    (vehicle_id, class_id, confidence, timestamp, detection_date)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (vehicle_id, class_id, confidence, timestamp, detection_date))
+                    (vehicle_id, class_id, confidence, timestamp, detection_date, camera_id)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (vehicle_id, class_id, confidence, timestamp, detection_date, camera_id))
                 connection.commit()
             except sqlite3.Error as e:
                 self.logger.error(f"Error inserting detection: {e}")
@@ -70,7 +142,249 @@ class DatabaseHandler:
                 if "closed database" in str(e).lower():
                     self.local.connection = None
                     self.logger.info("Attempting to reconnect to database")
-                    return self.insert_detection(vehicle_id, class_id, confidence, timestamp)
+                    return self.insert_detection(vehicle_id, class_id, confidence, timestamp, camera_id)
+                raise
+
+    def insert_violation(self, violation, camera_id='default'):
+        """Insert a violation dict as produced by ViolationDetector."""
+        with self.lock:
+            try:
+                connection = self._get_connection()
+                cursor = connection.cursor()
+                cursor.execute("""
+                    INSERT INTO violations
+                    (camera_id, vehicle_id, violation_type, vehicle_type, confidence, speed,
+                     location_x, location_y, details, timestamp, detection_date,
+                     clip_path, image_path)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, self._violation_row(violation, camera_id))
+                connection.commit()
+                return cursor.lastrowid
+            except sqlite3.Error as e:
+                self.logger.error(f"Error inserting violation: {e}")
+                # Try to reconnect if the database is closed
+                if "closed database" in str(e).lower():
+                    self.local.connection = None
+                    self.logger.info("Attempting to reconnect to database")
+                    return self.insert_violation(violation, camera_id)
+                raise
+
+    def insert_many(self, table, rows):
+        """Insert pre-built row tuples in a single transaction.
+
+        Rows follow INSERT_COLUMNS[table]; violation rows come from
+        _violation_row().
+
+        Returns:
+            list: The ids assigned to the rows, in order
+        """
+        insert_columns = INSERT_COLUMNS[table]
+        with self.lock:
+            try:
+                connection = self._get_connection()
+                with connection:
+                    connection.executemany(f"""
+                        INSERT INTO {table} ({', '.join(insert_columns)})
+                        VALUES ({', '.join('?' * len(insert_columns))})
+                    """, rows)
+                    # AUTOINCREMENT ids within one transaction are consecutive
+                    last_id = connection.execute("SELECT last_insert_rowid()").fetchone()[0]
+                return list(range(last_id - len(rows) + 1, last_id + 1))
+            except sqlite3.Error as e:
+                self.logger.error(f"Error inserting into {table}: {e}")
+                # Try to reconnect if the database is closed
+                if "closed database" in str(e).lower():
+                    self.local.connection = None
+                    self.logger.info("Attempting to reconnect to database")
+                    return self.insert_many(table, rows)
+                raise
+
+    @staticmethod
+    def _violation_row(violation, camera_id):
+        """Flatten a violation dict into a row for the violations table."""
+        timestamp = violation.get('timestamp')
+        if isinstance(timestamp, str):
+            # The helmet check reports a formatted time instead of an epoch
+            timestamp = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S').timestamp()
+        elif timestamp is None:
+            timestamp = datetime.now().timestamp()
+        location = violation.get('location') or (None, None)
+        return (
+            camera_id,
+            int(violation['vehicle_id']),
+            violation['type'],
+            violation.get('vehicle_type'),
+            violation.get('confidence'),
+            violation.get('speed'),
+            int(location[0]) if location[0] is not None else None,
+            int(location[1]) if location[1] is not None else None,
+            violation.get('details'),
+            float(timestamp),
+            datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d'),
+            violation.get('clip_path'),
+            violation.get('image_path'),
+        )
+
+    def iter_rows(self, table, columns=None, start_time=None, end_time=None,
+                  camera_id=None, chunk_size=10000):
+        """Stream rows of a table in chunks of at most ``chunk_size`` rows.
+
+        Column projection and the time/camera filters are applied in SQL, so
+        only the requested data ever leaves SQLite. Rows are read through a
+        dedicated read-only connection, which keeps long exports from holding
+        the writer lock.
+
+        Yields:
+            tuple: (column names, list of row tuples) for each chunk
+        """
+        if table not in TABLE_COLUMNS:
+            raise ValueError(f"Unknown table: {table}")
+        columns = list(columns or TABLE_COLUMNS[table])
+        unknown = [c for c in columns if c not in TABLE_COLUMNS[table]]
+        if unknown:
+            raise ValueError(f"Unknown columns for {table}: {', '.join(unknown)}")
+
+        clauses, params = [], []
+        if start_time is not None:
+            # The date bound lets SQLite seek the partition index
+            clauses.append("detection_date >= ? AND timestamp >= ?")
+            params += [datetime.fromtimestamp(start_time).strftime('%Y-%m-%d'), start_time]
+        if end_time is not None:
+            clauses.append("detection_date <= ? AND timestamp < ?")
+            params += [datetime.fromtimestamp(end_time).strftime('%Y-%m-%d'), end_time]
+        if camera_id is not None:
+            clauses.append("camera_id = ?")
+            params.append(camera_id)
+
+        query = f"SELECT {', '.join(columns)} FROM {table}"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY detection_date, camera_id, timestamp"
+
+        connection = self._read_connection()
+        try:
+            cursor = connection.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield columns, rows
+        finally:
+            connection.close()
+
+    def _read_connection(self):
+        """Open a private read-only connection for long-running reads."""
+        connection = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        connection.execute('PRAGMA busy_timeout = 30000')
+        return connection
+
+    @staticmethod
+    def _history_query(table, filters, after, limit=None):
+        """Build the keyset query for a page of history, newest first.
+
+        ``after`` is the (timestamp, id) of the last row already seen. Seeking
+        past it with an indexed range instead of OFFSET means every page costs
+        the same no matter how deep it is.
+        """
+        if table not in TABLE_COLUMNS:
+            raise ValueError(f"Unknown table: {table}")
+        filters = dict(filters or {})
+        start_time = filters.pop('start_time', None)
+        end_time = filters.pop('end_time', None)
+        unknown = [k for k in filters if k not in FILTER_COLUMNS[table]]
+        if unknown:
+            raise ValueError(f"Unknown filters for {table}: {', '.join(unknown)}")
+
+        clauses, params = [], []
+        for column, value in filters.items():
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if start_time is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start_time)
+        if end_time is not None:
+            clauses.append("timestamp < ?")
+            params.append(end_time)
+        if after is not None:
+            # Written as a plain range on timestamp so the index can seek to it
+            clauses.append("timestamp <= ? AND (timestamp < ? OR id < ?)")
+            params += [after[0], after[0], after[1]]
+
+        query = f"SELECT {', '.join(TABLE_COLUMNS[table])} FROM {table}"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY timestamp DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return query, params
+
+    def get_history_page(self, table, filters=None, after=None, limit=100):
+        """Get one page of history rows, newest first.
+
+        Args:
+            table: 'vehicle_detections' or 'violations'
+            filters: Dict of column equality filters plus optional
+                start_time/end_time (epoch seconds)
+            after: (timestamp, id) of the last row of the previous page
+            limit: Maximum number of rows to return
+
+        Returns:
+            tuple: (list of row dicts, (timestamp, id) cursor for the next page or None)
+        """
+        query, params = self._history_query(table, filters, after, limit + 1)
+        with self.lock:
+            try:
+                cursor = self._get_connection().execute(query, params)
+                rows = cursor.fetchall()
+            except sqlite3.Error as e:
+                self.logger.error(f"Error getting history page: {e}")
+                raise
+
+        columns = TABLE_COLUMNS[table]
+        items = [dict(zip(columns, row)) for row in rows[:limit]]
+        # One extra row was fetched only to learn whether another page exists
+        next_after = (items[-1]['timestamp'], items[-1]['id']) if len(rows) > limit else None
+        return items, next_after
+
+    def iter_history(self, table, filters=None, after=None, chunk_size=1000):
+        """Stream all matching history rows as dicts, newest first.
+
+        Uses a private read-only cursor, so callers can forward rows as they
+        arrive without buffering the result set.
+        """
+        query, params = self._history_query(table, filters, after)
+        columns = TABLE_COLUMNS[table]
+        connection = self._read_connection()
+        try:
+            cursor = connection.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(columns, row))
+        finally:
+            connection.close()
+
+    def get_rows_since(self, table, since_id, limit=1000):
+        """Get rows with an id greater than ``since_id``, oldest first.
+
+        Used to backfill clients that reconnect with the last id they saw.
+        """
+        if table not in TABLE_COLUMNS:
+            raise ValueError(f"Unknown table: {table}")
+        columns = TABLE_COLUMNS[table]
+        with self.lock:
+            try:
+                cursor = self._get_connection().execute(f"""
+                    SELECT {', '.join(columns)} FROM {table}
+                    WHERE id > ? ORDER BY id LIMIT ?
+                """, (since_id, limit))
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            except sqlite3.Error as e:
+                self.logger.error(f"Error getting rows since {since_id}: {e}")
                 raise
 
     def get_daily_counts(self, date=None):
@@ -117,4 +431,103 @@ class DatabaseHandler:
         except Exception as e:
             # Just log the error, don't raise during garbage collection
             if self.logger:
-                self.logger.error(f"Error in __del__: {e}")
\ No newline at end of file
+                self.logger.error(f"Error in __del__: {e}")
+
+
+class BatchedWriter:
+    def __init__(self, db, flush_interval=0.5, max_batch=500, stream='default'):
+        """Buffer inserts and write them in batches on a background thread.
+
+        Committing one row at a time costs a disk sync per detection on the
+        inference thread. Queued rows are instead written every
+        ``flush_interval`` seconds, or as soon as ``max_batch`` rows are waiting.
+
+        Args:
+            db: DatabaseHandler to write to
+            flush_interval: Maximum seconds a row waits before being written
+            max_batch: Number of pending rows that triggers an early flush
+            stream: Stream (camera) label for metrics
+        """
+        self.db = db
+        self.stream = stream
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.logger = logging.getLogger(__name__)
+        self.pending = {table: [] for table in TABLE_COLUMNS}
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def add_listener(self, listener):
+        """Register ``listener(table, buckets, rows)`` to be called after each flush.
+
+        ``buckets`` is the set of (detection_date, camera_id) pairs that
+        received new rows; ``rows`` are the written rows as dicts, including
+        their new ``id``.
+        """
+        self.listeners.append(listener)
+
+    def add_detection(self, vehicle_id, class_id, confidence, timestamp, camera_id='default'):
+        """Queue a vehicle detection record."""
+        detection_date = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
+        self._add('vehicle_detections', (vehicle_id, class_id, confidence, timestamp,
+                                         detection_date, camera_id))
+
+    def add_violation(self, violation, camera_id='default'):
+        """Queue a violation dict as produced by ViolationDetector."""
+        self._add('violations', DatabaseHandler._violation_row(violation, camera_id))
+
+    def _add(self, table, row):
+        with self.lock:
+            self.pending[table].append(row)
+            size = sum(len(rows) for rows in self.pending.values())
+        QUEUE_DEPTH.set(size, stream=self.stream, queue='db_writer')
+        if size >= self.max_batch:
+            self.wake.set()
+
+    def flush(self):
+        """Write all queued rows now."""
+        with self.flush_lock:
+            with self.lock:
+                batches = {table: rows for table, rows in self.pending.items() if rows}
+                self.pending = {table: [] for table in TABLE_COLUMNS}
+            QUEUE_DEPTH.set(0, stream=self.stream, queue='db_writer')
+
+            for table, rows in batches.items():
+                try:
+                    with STAGE_SECONDS.time(stream=self.stream, stage='db_flush'):
+                        ids = self.db.insert_many(table, rows)
+                except sqlite3.Error as e:
+                    self.logger.error(f"Dropped {len(rows)} {table} rows: {e}")
+                    continue
+                ROWS_WRITTEN.inc(len(rows), stream=self.stream, table=table)
+                if not self.listeners:
+                    continue
+
+                columns = INSERT_COLUMNS[table]
+                written = [dict(zip(columns, row), id=row_id) for row, row_id in zip(rows, ids)]
+                buckets = {(row['detection_date'], row['camera_id']) for row in written}
+                for listener in self.listeners:
+                    try:
+                        listener(table, buckets, written)
+                    except Exception as e:
+                        self.logger.error(f"Error in write listener: {e}")
+
+    def _run(self):
+        while self.running:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            self.flush()
+        self.db.close_connection()
+
+    def close(self):
+        """Flush remaining rows and stop the background thread."""
+        if self.running:
+            self.running = False
+            self.wake.set()
+            self.thread.join(timeout=5.0)
+            self.flush()
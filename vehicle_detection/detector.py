@@ -1,22 +1,32 @@
 import cv2
-import numpy as np
-from ultralytics import YOLO
-import cvzone
 import time
 import threading
 import logging
 from pathlib import Path
-from vehicle_detection.database import DatabaseHandler
-from vehicle_detection.utils import process_frame, draw_area, calculate_fps
+from vehicle_detection.database import DatabaseHandler, BatchedWriter
+from vehicle_detection.utils import calculate_fps
 from vehicle_detection.config import DetectionConfig
+from vehicle_detection.tracking import SeenTrackIds, RollingCounter
+from vehicle_detection.pipeline import FrameEvent, DatabaseSink, AnnotationSink, DisplaySink
+from vehicle_detection.recording import SegmentedVideoSink
+from vehicle_detection.capture import open_capture
+from vehicle_detection.geometry import REFERENCE_SIZE
+from vehicle_detection.runtime import RuntimeConfig, ConfigWatcher
+from vehicle_detection.ingest import LiveSource, is_stream_url
+from vehicle_detection.models import MODELS, PhaseTimer
+from vehicle_detection.metrics import STAGE_SECONDS, FRAMES, ACTIVE_TRACKS, TRACKED_IDS, CONFIG_VERSION
 
 class VehicleDetectionProcessor:
-    def __init__(self, video_path, config_path=None):
+    def __init__(self, video_path, config_path=None, loop=False):
         """Initialize the vehicle detection processor.
         
+        The processor owns the single capture and inference loop. Outputs
+        (display, files, database, web) are FrameSinks fed from that loop.
+        
         Args:
-            video_path: Path to the video file
+            video_path: Path to the video file, a camera index, or a stream URL
             config_path: Path to the configuration file (optional)
+            loop: Restart video files from the beginning when they end
         """
         # Setup logging
         self.logger = logging.getLogger(__name__)
@@ -27,192 +37,348 @@ class VehicleDetectionProcessor:
             handler.setFormatter(formatter)
             self.logger.addHandler(handler)
         
+        # Time each phase; restarts should be dominated by opening the source
+        self.startup = PhaseTimer('Detector startup')
+        
         # Load configuration
-        self.config = DetectionConfig.from_yaml(config_path) if config_path else DetectionConfig()
-        
-        # Initialize video capture
-        self.video_path = video_path
-        
-        # Handle different video source types
-        if isinstance(video_path, (str, Path)) and str(video_path).isdigit():
-            # This is a camera index
-            self.logger.info(f"Using camera with index: {video_path}")
-            self.cap = cv2.VideoCapture(int(video_path))
-        else:
-            # This is a file path
-            try:
-                # Convert to Path object for better path handling
-                if isinstance(video_path, str):
-                    self.video_path = Path(video_path)
+        with self.startup.phase('config'):
+            self.config_path = config_path
+            self.config = DetectionConfig.from_yaml(config_path) if config_path else DetectionConfig()
+        
+        with self.startup.phase('capture'):
+            # Initialize video capture
+            self.video_path = video_path
+        
+            self.loop = loop
+            self.is_live = isinstance(video_path, int) or str(video_path).isdigit() or is_stream_url(video_path)
+        
+            # Handle different video source types
+            if self.is_live:
+                # Camera index or network stream; read through a reconnecting buffer
+                source = video_path if is_stream_url(video_path) else int(video_path)
+                self.logger.info(f"Using live source: {video_path}")
+                self.cap = LiveSource(
+                    lambda: self._open_capture(source),
+                    str(video_path),
+                    buffer_frames=self.config.live_buffer_frames,
+                    max_latency=self.config.max_latency,
+                    stall_timeout=self.config.stall_timeout,
+                    reconnect_delay=self.config.reconnect_delay,
+                    max_reconnect_delay=self.config.max_reconnect_delay
+                )
+            else:
+                # This is a file path
+                try:
+                    # Convert to Path object for better path handling
+                    if isinstance(video_path, str):
+                        self.video_path = Path(video_path)
                 
-                # Check if file exists
-                if not Path(self.video_path).exists():
-                    # Try to find the file in the current directory
-                    current_dir = Path.cwd()
-                    potential_paths = [
-                        current_dir / 'my.mp4',
-                        current_dir.parent / 'my.mp4',
-                        Path(video_path).absolute()
-                    ]
+                    # Check if file exists
+                    if not Path(self.video_path).exists():
+                        # Try to find the file in the current directory
+                        current_dir = Path.cwd()
+                        potential_paths = [
+                            current_dir / 'my.mp4',
+                            current_dir.parent / 'my.mp4',
+                            Path(video_path).absolute()
+                        ]
                     
-                    for path in potential_paths:
-                        if path.exists():
-                            self.logger.info(f"Found video at: {path}")
-                            self.video_path = path
-                            break
-                    else:
-                        raise FileNotFoundError(f"Video file not found: {video_path}")
+                        for path in potential_paths:
+                            if path.exists():
+                                self.logger.info(f"Found video at: {path}")
+                                self.video_path = path
+                                break
+                        else:
+                            raise FileNotFoundError(f"Video file not found: {video_path}")
                 
-                self.logger.info(f"Opening video file: {self.video_path}")
-                self.cap = cv2.VideoCapture(str(self.video_path))
-            except Exception as e:
-                self.logger.error(f"Error setting up video capture: {e}")
-                raise
+                    self.logger.info(f"Opening video file: {self.video_path}")
+                    self.cap = self._open_capture(str(self.video_path))
+                    if not self.cap.isOpened() and self.config.capture_backend == 'opencv':
+                        self.logger.info("Attempting with FFMPEG backend...")
+                        self.cap = cv2.VideoCapture(str(self.video_path), cv2.CAP_FFMPEG)
+                except Exception as e:
+                    self.logger.error(f"Error setting up video capture: {e}")
+                    raise
         
-        if not self.cap.isOpened():
-            raise RuntimeError(f"Failed to open video source: {video_path}")
+            if not self.cap.isOpened():
+                raise RuntimeError(f"Failed to open video source: {video_path}")
         
         # Initialize YOLO model
         try:
-            self.model = YOLO(self.config.model_path)
+            # Loaded and warmed up once per process, then reused across restarts
+            self.model = MODELS.acquire(self.config.model_path, self.config.imgsz, self.startup)
             self.logger.info(f"Loaded YOLO model: {self.config.model_path}")
         except Exception as e:
             self.logger.error(f"Failed to load YOLO model: {e}")
             raise
         
-        # Set detection area
-        self.area_coordinates = np.array(self.config.default_area, np.int32)
+        # Scale zones and lines to this source's resolution
+        self.frame_size = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                           int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        if not all(self.frame_size):
+            self.logger.warning(f"Source did not report its resolution; assuming {REFERENCE_SIZE}")
+            self.frame_size = REFERENCE_SIZE
+        # Thresholds, zones and rules can change while running; the loop
+        # switches to a new version between frames
+        self.runtime = RuntimeConfig(self.config, self.frame_size)
+        self.settings = self.runtime.current
+        self.geometry = self.settings.geometry
+        self.area_coordinates = self.geometry.area
+        self.config_watcher = None
+        self.logger.info(f"Frame size {self.frame_size[0]}x{self.frame_size[1]}, "
+                         f"inference size {self.config.imgsz or 'model default'}")
         
-        # Initialize database handler
-        self.db = DatabaseHandler(self.config.database_path)
+        # Initialize database handler; detections are written in batches
+        with self.startup.phase('database'):
+            self.db = DatabaseHandler(self.config.database_path)
+            self.writer = BatchedWriter(self.db, stream=self.config.camera_id)
         
         # Initialize tracking variables
-        self.vehicle_counts = {}
-        self.vehicle_ids = set()
+        self.vehicle_counts = RollingCounter(self.config.count_bucket)
+        self.vehicle_ids = SeenTrackIds(self.config.max_tracked_ids, self.config.track_id_ttl)
         self.last_detection_time = time.time()
         self.frame_count = 0
         
+        # The model letterboxes to imgsz and maps boxes back to frame pixels
+        self.inference_args = {'imgsz': self.config.imgsz} if self.config.imgsz else {}
+        
+        # Source frame rate, used to play files back in real time
+        self.source_fps = self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+        
+        # Outputs fed by the processing loop, in addition to the default ones
+        self.sinks = []
+        self.active_sinks = []
+        
         # Processing flags
         self.is_processing = False
         self.processing_thread = None
         
         self.logger.info("Vehicle Detection Processor initialized successfully")
+        self.startup.finish()
+        self.logger.info(self.startup.report())
+
+    def _open_capture(self, source):
+        """Open ``source`` with the configured capture backend."""
+        backend = self.config.capture_backend
+        # Network reads must time out so a dead stream can be reconnected
+        timeout = self.config.stall_timeout if is_stream_url(source) else None
+        if backend == 'opencv':
+            if timeout:
+                milliseconds = int(timeout * 1000)
+                return cv2.VideoCapture(source, cv2.CAP_FFMPEG, [
+                    cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, milliseconds,
+                    cv2.CAP_PROP_READ_TIMEOUT_MSEC, milliseconds
+                ])
+            return cv2.VideoCapture(source)
+        self.logger.info(f"Decoding with the {backend} backend")
+        return open_capture(source, backend, self.config.capture_size,
+                            self.config.capture_threads, self.config.capture_buffers, timeout)
+
+    def add_sink(self, sink):
+        """Attach an extra output; sinks run in the order they were added."""
+        self.sinks.append(sink)
+
+    def _default_sinks(self):
+        """Build the configured outputs: database, then display and recording."""
+        sinks = [DatabaseSink(self.writer, self.config.camera_id)]
+        save = self.config.save_output and self.config.output_path
+        if self.config.display_output or save:
+            sinks.append(AnnotationSink(self.area_coordinates))
+        if self.config.display_output:
+            sinks.append(DisplaySink())
+        if save:
+            sinks.append(SegmentedVideoSink(
+                self.config.output_path,
+                segment_seconds=self.config.output_segment_seconds,
+                codec=self.config.output_codec,
+                extension=self.config.output_extension
+            ))
+        return sinks
+
+    def update_config(self, values, source='api'):
+        """Change reloadable settings of the running pipeline (see RuntimeConfig.update)."""
+        return self.runtime.update(values, source)
+
+    def _apply_settings(self, settings):
+        """Switch to a new runtime configuration between two frames."""
+        self.settings = settings
+        self.config = settings.config
+        self.geometry = settings.geometry
+        self.area_coordinates = settings.geometry.area
+        for sink in self.active_sinks:
+            sink.on_config(self)
+        CONFIG_VERSION.set(settings.version, stream=self.config.camera_id)
+        self.logger.info(f"Running configuration version {settings.version} from {settings.source}")
 
     def start_processing(self):
         """Start the vehicle detection processing in a separate thread."""
         if not self.is_processing:
             self.is_processing = True
+            if self.config_path and self.config.config_poll_interval > 0 and not self.config_watcher:
+                self.config_watcher = ConfigWatcher(self.config_path, self.runtime,
+                                                    self.config.config_poll_interval)
             self.processing_thread = threading.Thread(target=self._process_video)
+            self.processing_thread.daemon = True
             self.processing_thread.start()
 
     def stop_processing(self):
         """Stop the vehicle detection processing."""
         self.is_processing = False
-        if self.processing_thread:
+        if self.config_watcher:
+            self.config_watcher.stop()
+            self.config_watcher = None
+        if self.processing_thread and self.processing_thread is not threading.current_thread():
             self.processing_thread.join()
+        if hasattr(self, 'writer'):
+            self.writer.flush()
+
+    def _read_frame(self):
+        """Read the next frame to process, honouring frame skip and looping."""
+        # Skip frames if configured
+        if self.config.frame_skip > 0:
+            for _ in range(self.config.frame_skip):
+                self.cap.grab()
+        
+        success, frame = self.cap.read()
+        if not success and self.loop and not self.is_live:
+            # Loop back to the beginning of the file
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self.cap.read()
+        return success, frame
+
+    def _pace(self, started):
+        """Hold file playback to the source frame rate.
+
+        Live sources are paced by the device, so only files are throttled.
+        Nothing is slept if processing is already slower than real time.
+        """
+        if self.is_live or not self.config.pace_to_source_fps or self.source_fps <= 0:
+            return
+        frame_period = (self.config.frame_skip + 1) / self.source_fps
+        remaining = frame_period - (time.perf_counter() - started)
+        if remaining > 0:
+            time.sleep(remaining)
 
     def _process_video(self):
         """Main video processing loop."""
+        # camera_id may have been set after construction; metrics follow it
+        stream = self.writer.stream = self.config.camera_id
+        if self.is_live:
+            self.cap.stream = stream
+        self.active_sinks = self._default_sinks() + self.sinks
+        for sink in self.active_sinks:
+            sink.on_start(self)
+        CONFIG_VERSION.set(self.settings.version, stream=stream)
+        
         try:
             frame_time = time.time()
             while self.is_processing:
-                # Skip frames if configured
-                if self.config.frame_skip > 0:
-                    for _ in range(self.config.frame_skip):
-                        self.cap.read()
-                
-                success, frame = self.cap.read()
+                # Pick up a newer configuration only here, between frames
+                if self.runtime.current is not self.settings:
+                    self._apply_settings(self.runtime.current)
+                started = time.perf_counter()
+                success, frame = self._read_frame()
                 if not success:
+                    if self.is_live:
+                        # The live source is reconnecting; keep waiting for frames
+                        continue
                     self.logger.info("End of video reached")
                     break
                 
                 self.frame_count += 1
+                inferring = time.perf_counter()
+                STAGE_SECONDS.observe(inferring - started, stream=stream, stage='capture')
+                FRAMES.inc(stream=stream)
                 
                 try:
                     # Process frame and get detections
                     results = self.model.track(frame, persist=True,
                                              conf=self.config.confidence_threshold,
-                                             iou=self.config.nms_threshold)
+                                             iou=self.config.nms_threshold,
+                                             **self.inference_args)
+                    result = results[0] if results else None
+                    tracking = time.perf_counter()
+                    STAGE_SECONDS.observe(tracking - inferring, stream=stream, stage='inference')
                     
-                    if results and results[0].boxes.id is not None:
-                        # Process detections and update counts
-                        processed_frame = process_frame(frame, results[0], self.area_coordinates)
-                        
-                        # Update vehicle counts and database
-                        self._update_vehicle_data(results[0])
-                        
-                        # Draw detection area
-                        processed_frame = draw_area(processed_frame, self.area_coordinates)
-                        
-                        # Calculate and display FPS
-                        fps = calculate_fps(time.time() - frame_time)
-                        cv2.putText(processed_frame, f'FPS: {fps:.1f}', (20, 30),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                        
-                        try:
-                            # Only attempt to display if GUI is available
-                            if self.config.display_output:
-                                cv2.imshow('Vehicle Detection', processed_frame)
-                                if cv2.waitKey(1) & 0xFF == ord('q'):
-                                    self.logger.info("Processing stopped by user")
-                                    break
-                        except cv2.error:
-                            self.logger.warning("GUI display not available")
-                            # Continue processing without display
-                            pass
-                        
-                        # Save output if enabled
-                        if self.config.save_output and self.config.output_path:
-                            output_path = Path(self.config.output_path)
-                            output_path.parent.mkdir(parents=True, exist_ok=True)
-                            cv2.imwrite(str(output_path / f'frame_{self.frame_count}.jpg'), processed_frame)
+                    # Update vehicle counts
+                    now = time.time()
+                    new_detections = []
+                    active_tracks = 0
+                    if result is not None and result.boxes.id is not None:
+                        new_detections = self._update_vehicle_data(result, now)
+                        active_tracks = len(result.boxes)
+                    STAGE_SECONDS.observe(time.perf_counter() - tracking, stream=stream, stage='tracking')
+                    ACTIVE_TRACKS.set(active_tracks, stream=stream)
+                    TRACKED_IDS.set(len(self.vehicle_ids), stream=stream)
                     
-                    frame_time = time.time()
+                    event = FrameEvent(frame, result, self.frame_count, now,
+                                       calculate_fps(now - frame_time), new_detections)
+                    frame_time = now
                     
+                    # Hand the frame to every output
+                    for sink in self.active_sinks:
+                        if sink.on_frame(event) is False:
+                            self.is_processing = False
+                
                 except Exception as e:
                     self.logger.error(f"Error processing frame {self.frame_count}: {e}")
                     continue
+                
+                self._pace(started)
         
         except Exception as e:
             self.logger.error(f"Error in video processing loop: {e}")
         finally:
+            self.is_processing = False
+            for sink in self.active_sinks:
+                try:
+                    sink.on_stop(self)
+                except Exception as e:
+                    self.logger.error(f"Error stopping sink {type(sink).__name__}: {e}")
             self.cap.release()
-            try:
-                cv2.destroyAllWindows()
-            except cv2.error:
-                self.logger.warning("Failed to destroy windows - GUI might not be available")
+            self.release_model()
             self.logger.info("Video processing completed")
 
-    def _update_vehicle_data(self, result):
-        """Update vehicle detection data and database."""
-        current_time = time.time()
+    def _update_vehicle_data(self, result, current_time=None):
+        """Update vehicle counts from a tracking result.
+        
+        Returns:
+            list: (vehicle_id, class_id, confidence) for vehicles counted for
+            the first time on this frame
+        """
+        current_time = time.time() if current_time is None else current_time
+        new_detections = []
         boxes = result.boxes
         for box in boxes:
             vehicle_id = int(box.id.item())
-            if vehicle_id not in self.vehicle_ids:
-                self.vehicle_ids.add(vehicle_id)
+            # Every sighting refreshes the ID so it stays known while tracked
+            if self.vehicle_ids.add(vehicle_id, current_time):
                 class_id = int(box.cls.item())
                 confidence = float(box.conf.item())
-                
-                # Update database
-                self.db.insert_detection(
-                    vehicle_id=vehicle_id,
-                    class_id=class_id,
-                    confidence=confidence,
-                    timestamp=current_time
-                )
+                new_detections.append((vehicle_id, class_id, confidence))
                 
                 # Update counts
                 vehicle_type = result.names[class_id]
-                self.vehicle_counts[vehicle_type] = self.vehicle_counts.get(vehicle_type, 0) + 1
+                self.vehicle_counts.increment(vehicle_type, current_time)
+        return new_detections
 
     def get_vehicle_counts(self):
-        """Return the current vehicle counts."""
-        return self.vehicle_counts
+        """Return the vehicle counts for the current time bucket."""
+        return self.vehicle_counts.counts()
+
+    def release_model(self):
+        """Hand the model back to the registry for the next processor."""
+        model, self.model = getattr(self, 'model', None), None
+        if model is not None:
+            MODELS.release(model)
 
     def __del__(self):
         """Cleanup resources."""
-        self.stop_processing()
+        # Construction may have failed (or been skipped) before the thread state existed
+        if hasattr(self, 'processing_thread'):
+            self.stop_processing()
+        if hasattr(self, 'writer'):
+            self.writer.close()
         if hasattr(self, 'cap'):
             self.cap.release()
-        cv2.destroyAllWindows()
\ No newline at end of file
+        self.release_model()
\ No newline at end of file
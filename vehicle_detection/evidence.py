@@ -0,0 +1,291 @@
+import cv2
+import logging
+import queue
+import threading
+import time
+import numpy as np
+from collections import OrderedDict, deque
+from datetime import datetime
+from pathlib import Path
+from vehicle_detection.pipeline import FrameSink
+from vehicle_detection.metrics import DROPPED_FRAMES, QUEUE_DEPTH, STAGE_SECONDS
+
+
+class PrerollBuffer:
+    def __init__(self, max_bytes, max_seconds):
+        """Recent JPEG frames, bounded by total size and by age.
+
+        Args:
+            max_bytes: Maximum total size of the stored JPEG data
+            max_seconds: Frames older than this (relative to the newest) are dropped
+        """
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.frames = deque()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def append(self, timestamp, jpeg):
+        with self.lock:
+            self.frames.append((timestamp, jpeg))
+            self.size += len(jpeg)
+            while self.frames and (self.size > self.max_bytes
+                                   or self.frames[0][0] < timestamp - self.max_seconds):
+                self.size -= len(self.frames.popleft()[1])
+
+    def between(self, start, end):
+        """Return (timestamp, jpeg) pairs with start <= timestamp <= end, oldest first."""
+        with self.lock:
+            return [(t, jpeg) for t, jpeg in self.frames if start <= t <= end]
+
+    @property
+    def latest_timestamp(self):
+        with self.lock:
+            return self.frames[-1][0] if self.frames else None
+
+
+class EvidenceRecorder(FrameSink):
+    def __init__(self, output_path, preroll=5.0, postroll=2.0, max_bytes=32 * 1024 * 1024,
+                 fps=10.0, max_size=960, quality=70, max_queue=64, max_captures=1000):
+        """Pipeline sink that keeps a compressed pre-roll and saves violation evidence.
+
+        Frames are sampled at ``fps``, downscaled on the processing thread
+        and handed to an encoder thread, which JPEG-encodes them into a
+        PrerollBuffer. capture() crops the offending vehicle and queues the
+        violation; the encoder thread writes the cropped still and passes
+        the clip to a clip thread. Once ``postroll`` seconds of frames have
+        arrived, that thread writes an MJPEG clip covering ``preroll``
+        seconds before to ``postroll`` seconds after. Writing a clip takes a
+        while, so it is kept off the encoder thread, which would otherwise
+        drop the frames the next clip needs.
+        The processing thread never blocks: when the queue is full, frames
+        and captures are dropped and counted.
+
+        Rules may report the same vehicle again and again (e.g. every second
+        it stays in a restricted area). Only the first violation of each
+        type per vehicle is captured; later ones link to the same files.
+
+        Files are named ``<date>/<camera>/<time>_<vehicle>_<type>.{avi,jpg}``
+        under ``output_path``; capture() returns these relative paths so they
+        can be stored with the violation before the files exist.
+
+        Args:
+            output_path: Directory evidence is written to
+            preroll: Seconds of video kept before a violation
+            postroll: Seconds of video recorded after a violation
+            max_bytes: Memory budget of the pre-roll buffer
+            fps: Frame rate of the buffer and of the clips
+            max_size: Longest side of buffered frames; the stream's aspect ratio is kept
+            quality: JPEG quality of buffered frames
+            max_queue: Frames and captures that may wait for the encoder thread
+            max_captures: (vehicle, type) pairs remembered to skip repeated captures
+        """
+        self.output_path = Path(output_path)
+        self.preroll = preroll
+        self.postroll = postroll
+        self.fps = fps
+        self.max_size = max_size
+        self.source_shape = None  # (height, width) frame_size was derived from
+        self.frame_size = None
+        self.quality = quality
+        self.buffer = PrerollBuffer(max_bytes, preroll + postroll)
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.clip_queue = queue.Queue()  # (timestamp, path); at most one per capture
+        self.captured = OrderedDict()  # (vehicle_id, type) -> paths, oldest first
+        self.max_captures = max_captures
+        self.last_sample = 0.0
+        self.stream = 'default'
+        self.logger = logging.getLogger(__name__)
+        self.running = False
+        self.thread = None
+        self.clip_thread = None
+
+    def on_start(self, processor):
+        self.stream = processor.config.camera_id
+        width, height = processor.frame_size
+        self._fit((height, width))
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='evidence-encoder', daemon=True)
+        self.thread.start()
+        self.clip_thread = threading.Thread(target=self._run_clips, name='evidence-clips', daemon=True)
+        self.clip_thread.start()
+
+    def _fit(self, shape):
+        """Size buffered frames to fit ``max_size`` with the aspect ratio of ``shape``."""
+        height, width = shape
+        scale = min(1.0, self.max_size / max(width, height))
+        # Even dimensions, which video codecs prefer
+        self.frame_size = (max(2, int(width * scale) // 2 * 2), max(2, int(height * scale) // 2 * 2))
+        self.source_shape = shape
+
+    def on_frame(self, event):
+        if event.timestamp - self.last_sample >= 1.0 / self.fps:
+            self.last_sample = event.timestamp
+            if event.frame.shape[:2] != self.source_shape:
+                # The source reported another size, or reconnected at a new one
+                self._fit(event.frame.shape[:2])
+            self._offer(('frame', event.timestamp, cv2.resize(event.frame, self.frame_size)))
+        return True
+
+    def on_stop(self, processor):
+        self.running = False
+        try:
+            # Wake the writer now rather than at its next poll
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass
+        if self.thread:
+            self.thread.join(timeout=10.0)
+        # The encoder has queued its last clip; write whatever is pending
+        self.clip_queue.put(None)
+        if self.clip_thread:
+            self.clip_thread.join(timeout=30.0)
+
+    def capture(self, violation, event):
+        """Queue evidence for a violation detected on ``event``'s frame.
+
+        Returns:
+            dict: ``clip_path`` and ``image_path`` relative to output_path,
+            or None if the capture had to be dropped
+        """
+        key = (violation['vehicle_id'], violation['type'])
+        if key in self.captured:
+            return self.captured[key]
+        crop = self._crop(violation['vehicle_id'], event)
+        moment = datetime.fromtimestamp(event.timestamp)
+        base = (Path(moment.strftime('%Y-%m-%d')) / self.stream /
+                f"{moment.strftime('%H%M%S_%f')}_{violation['vehicle_id']}_{violation['type']}")
+        paths = {'clip_path': base.with_suffix('.avi').as_posix(),
+                 'image_path': base.with_suffix('.jpg').as_posix()}
+        if not self._offer(('violation', event.timestamp, crop, paths)):
+            return None
+        self.captured[key] = paths
+        if len(self.captured) > self.max_captures:
+            self.captured.popitem(last=False)
+        return paths
+
+    def _crop(self, vehicle_id, event):
+        """Copy the offending vehicle's box (with some context) out of the frame."""
+        if event.has_tracks:
+            ids = event.result.boxes.id.cpu().numpy().astype(int)
+            matches = np.flatnonzero(ids == int(vehicle_id))
+            if len(matches):
+                x1, y1, x2, y2 = event.result.boxes.xyxy.cpu().numpy()[matches[0]].astype(int)
+                margin_x, margin_y = (x2 - x1) // 4, (y2 - y1) // 4
+                height, width = event.frame.shape[:2]
+                crop = event.frame[max(y1 - margin_y, 0):min(y2 + margin_y, height),
+                                   max(x1 - margin_x, 0):min(x2 + margin_x, width)]
+                if crop.size:
+                    return crop.copy()
+        # Vehicle not found on this frame; keep the whole scene instead
+        return cv2.resize(event.frame, self.frame_size)
+
+    def _offer(self, item):
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            DROPPED_FRAMES.inc(stream=self.stream, queue='evidence')
+            return False
+        finally:
+            QUEUE_DEPTH.set(self.queue.qsize(), stream=self.stream, queue='evidence')
+
+    def _run(self):
+        while self.running or not self.queue.empty():
+            try:
+                item = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if item is None:
+                continue
+            try:
+                self._handle(item)
+            except Exception as e:
+                self.logger.error(f"Error writing violation evidence: {e}")
+
+    def _run_clips(self):
+        pending = []
+        stopping = False
+        while not stopping or pending:
+            try:
+                item = self.clip_queue.get(timeout=0.2)
+                if item is None:
+                    stopping = True
+                else:
+                    pending.append(item)
+            except queue.Empty:
+                pass
+            pending = self._write_due_clips(pending, final=stopping)
+
+    def _handle(self, item):
+        kind, timestamp, image = item[:3]
+        if kind == 'frame':
+            success, jpeg = cv2.imencode('.jpg', image, [int(cv2.IMWRITE_JPEG_QUALITY), self.quality])
+            if success:
+                self.buffer.append(timestamp, jpeg.tobytes())
+            return
+
+        paths = item[3]
+        image_path = self.output_path / paths['image_path']
+        image_path.parent.mkdir(parents=True, exist_ok=True)
+        cv2.imwrite(str(image_path), image, [int(cv2.IMWRITE_JPEG_QUALITY), 90])
+        self.clip_queue.put((timestamp, self.output_path / paths['clip_path']))
+
+    def _write_due_clips(self, pending, final=False):
+        """Write clips whose post-roll has been buffered (or all of them when stopping).
+
+        Returns:
+            list: The clips still waiting for their post-roll
+        """
+        latest = self.buffer.latest_timestamp
+        remaining = []
+        for timestamp, path in pending:
+            # Also give up waiting if frames stopped arriving
+            due = (latest is not None and latest >= timestamp + self.postroll) \
+                or time.time() >= timestamp + self.postroll + 5.0
+            if due or final:
+                try:
+                    self._write_clip(path, self.buffer.between(timestamp - self.preroll,
+                                                              timestamp + self.postroll))
+                except Exception as e:
+                    self.logger.error(f"Error writing evidence clip {path}: {e}")
+            else:
+                remaining.append((timestamp, path))
+        return remaining
+
+    def _write_clip(self, path, frames):
+        if not frames:
+            self.logger.warning(f"No buffered frames for evidence clip {path}")
+            return
+        with STAGE_SECONDS.time(stream=self.stream, stage='evidence'):
+            path.parent.mkdir(parents=True, exist_ok=True)
+            writer = None
+            try:
+                for _, jpeg in frames:
+                    frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+                    if frame is None:
+                        continue
+                    size = (frame.shape[1], frame.shape[0])
+                    if writer is None:
+                        writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), self.fps, size)
+                        clip_size = size
+                    elif size != clip_size:
+                        # The source changed size during the clip
+                        frame = cv2.resize(frame, clip_size)
+                    writer.write(frame)
+            finally:
+                if writer is not None:
+                    writer.release()
+
+
+def evidence_recorder(config):
+    """Build the EvidenceRecorder described by a DetectionConfig, or None if disabled."""
+    if not config.save_evidence:
+        return None
+    return EvidenceRecorder(
+        config.evidence_path,
+        preroll=config.evidence_preroll,
+        postroll=config.evidence_postroll,
+        max_bytes=int(config.evidence_buffer_mb * 1024 * 1024),
+        fps=config.evidence_fps
+    )
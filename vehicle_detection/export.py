@@ -0,0 +1,199 @@
+import logging
+from pathlib import Path
+
+from vehicle_detection.database import DatabaseHandler, TABLE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# Columns encoded in the directory layout instead of the file contents
+PARTITION_COLUMNS = ('detection_date', 'camera_id')
+
+FORMATS = {
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+}
+
+
+def _require_pyarrow():
+    """Import pyarrow lazily so the rest of the package works without it."""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Exporting requires pyarrow. Install it with 'pip install pyarrow'.") from e
+    return pyarrow
+
+
+def validate_columns(table, columns):
+    """Check that ``table`` exists and has every one of ``columns``.
+
+    Raises:
+        ValueError: If the table or any of the columns is unknown
+    """
+    if table not in TABLE_COLUMNS:
+        raise ValueError(f"Unknown table: {table}")
+    unknown = [c for c in columns or [] if c not in TABLE_COLUMNS[table]]
+    if unknown:
+        raise ValueError(f"Unknown columns for {table}: {', '.join(unknown)}")
+
+
+def table_schema(table, columns=None):
+    """Build the Arrow schema for a projection of a database table."""
+    pa = _require_pyarrow()
+    types = {
+        'id': pa.int64(),
+        'camera_id': pa.string(),
+        'vehicle_id': pa.int64(),
+        'class_id': pa.int32(),
+        'violation_type': pa.string(),
+        'vehicle_type': pa.string(),
+        'confidence': pa.float64(),
+        'speed': pa.float64(),
+        'location_x': pa.int32(),
+        'location_y': pa.int32(),
+        'details': pa.string(),
+        'timestamp': pa.float64(),
+        'detection_date': pa.string(),
+        'clip_path': pa.string(),
+        'image_path': pa.string(),
+    }
+    return pa.schema([(name, types[name]) for name in (columns or TABLE_COLUMNS[table])])
+
+
+def _record_batch(schema, names, rows):
+    """Convert a chunk of row tuples into a record batch for ``schema``."""
+    pa = _require_pyarrow()
+    arrays = []
+    for field in schema:
+        index = names.index(field.name)
+        arrays.append(pa.array([row[index] for row in rows], type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _open_writer(path, schema, fmt):
+    pa = _require_pyarrow()
+    if fmt == 'parquet':
+        return pa.parquet.ParquetWriter(str(path), schema)
+    return pa.ipc.new_file(str(path), schema)
+
+
+def export_table(db_path, table, output_dir, fmt='parquet', columns=None,
+                 start_time=None, end_time=None, camera_id=None, chunk_size=50000):
+    """Export a table to files partitioned by date and camera.
+
+    Files are laid out Hive-style as
+    ``<output_dir>/<table>/detection_date=<date>/camera_id=<camera>/part-0.<ext>``.
+    Rows arrive from SQLite already sorted by partition, so only one writer
+    is open at a time and memory is bounded by ``chunk_size``.
+
+    Args:
+        db_path: Path to the SQLite database
+        table: 'vehicle_detections' or 'violations'
+        output_dir: Root directory for the exported files
+        fmt: 'parquet' or 'arrow' (Arrow IPC file)
+        columns: Columns to export (default: all)
+        start_time: Only export rows with timestamp >= start_time (epoch seconds)
+        end_time: Only export rows with timestamp < end_time (epoch seconds)
+        camera_id: Only export rows from this camera
+        chunk_size: Maximum number of rows held in memory at once
+
+    Returns:
+        list: Paths of the files written
+
+    Raises:
+        ValueError: If the format, the table or a column is unknown
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    validate_columns(table, columns)
+    _require_pyarrow()
+
+    columns = list(columns or TABLE_COLUMNS[table])
+    data_columns = [c for c in columns if c not in PARTITION_COLUMNS]
+    schema = table_schema(table, data_columns)
+    query_columns = data_columns + list(PARTITION_COLUMNS)
+
+    db = DatabaseHandler(db_path)
+    written = []
+    writer = None
+    partition = None
+    try:
+        for names, rows in db.iter_rows(table, query_columns, start_time, end_time,
+                                        camera_id, chunk_size=chunk_size):
+            date_index = names.index('detection_date')
+            camera_index = names.index('camera_id')
+            start = 0
+            # A chunk may straddle several partitions; split it at each boundary
+            while start < len(rows):
+                key = (rows[start][date_index], rows[start][camera_index])
+                end = start
+                while end < len(rows) and (rows[end][date_index], rows[end][camera_index]) == key:
+                    end += 1
+
+                if key != partition:
+                    if writer is not None:
+                        writer.close()
+                    partition = key
+                    path = (Path(output_dir) / table / f"detection_date={key[0]}" /
+                            f"camera_id={key[1]}" / f"part-0{FORMATS[fmt]}")
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    writer = _open_writer(path, schema, fmt)
+                    written.append(path)
+                    logger.info(f"Writing partition {path}")
+
+                writer.write_batch(_record_batch(schema, names, rows[start:end]))
+                start = end
+    finally:
+        if writer is not None:
+            writer.close()
+        db.close_connection()
+
+    return written
+
+
+class _ChunkSink:
+    """Minimal writable file object that hands buffered bytes back to a generator."""
+
+    def __init__(self):
+        self.chunks = []
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_arrow(db_path, table, columns=None, start_time=None, end_time=None,
+                 camera_id=None, chunk_size=10000):
+    """Yield a table as an Arrow IPC stream, one record batch at a time.
+
+    Used by the web API, where the response body is produced incrementally
+    and must never hold more than one chunk.
+    """
+    pa = _require_pyarrow()
+    columns = list(columns or TABLE_COLUMNS[table])
+    schema = table_schema(table, columns)
+    sink = _ChunkSink()
+    db = DatabaseHandler(db_path)
+    try:
+        writer = pa.ipc.new_stream(sink, schema)
+        for names, rows in db.iter_rows(table, columns, start_time, end_time,
+                                        camera_id, chunk_size=chunk_size):
+            writer.write_batch(_record_batch(schema, names, rows))
+            yield sink.drain()
+        writer.close()
+        yield sink.drain()
+    finally:
+        db.close_connection()
@@ -0,0 +1,48 @@
+import numpy as np
+
+# Resolution the original pixel-based zones were drawn for
+REFERENCE_SIZE = (1920, 1080)
+
+
+def is_normalized(points):
+    """True if every coordinate lies in [0, 1] (i.e. is a fraction of the frame size)."""
+    return all(0.0 <= float(value) <= 1.0 for point in points for value in point)
+
+
+def to_pixels(points, frame_size, reference_size=REFERENCE_SIZE):
+    """Scale a polygon or line to pixel coordinates of a frame.
+
+    Args:
+        points: [(x, y), ...] as fractions of the frame size. Older
+            configurations with pixel coordinates are read as pixels of
+            ``reference_size`` and rescaled.
+        frame_size: (width, height) of the frames the points apply to
+        reference_size: (width, height) pixel coordinates are relative to
+
+    Returns:
+        np.ndarray: int32 array of shape (len(points), 2)
+    """
+    points = np.asarray(points, np.float64).reshape(-1, 2)
+    if not is_normalized(points):
+        points = points / np.asarray(reference_size, np.float64)
+    return np.round(points * np.asarray(frame_size, np.float64)).astype(np.int32)
+
+
+class SceneGeometry:
+    def __init__(self, config, frame_size):
+        """Zones and lines of a DetectionConfig, scaled once to a stream's resolution.
+
+        Args:
+            config: DetectionConfig with normalized default_area,
+                red_light_line and restricted_areas
+            frame_size: (width, height) of the frames being processed
+        """
+        self.frame_size = tuple(int(value) for value in frame_size)
+        reference = tuple(config.zone_reference_size)
+        self.area = to_pixels(config.default_area, self.frame_size, reference)
+        self.red_light_line = [tuple(int(v) for v in point)
+                               for point in to_pixels(config.red_light_line, self.frame_size, reference)]
+        self.restricted_areas = [to_pixels(area, self.frame_size, reference)
+                                 for area in config.restricted_areas]
+        # Pixel thresholds were tuned on 1920-pixel-wide frames
+        self.pixel_scale = self.frame_size[0] / REFERENCE_SIZE[0]
@@ -0,0 +1,215 @@
+import cv2
+import logging
+import random
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
+from vehicle_detection.metrics import (DROPPED_FRAMES, SOURCE_CONNECTED, SOURCE_FRAME_AGE,
+                                       SOURCE_RECONNECTS, SOURCE_STALLS)
+
+STREAM_SCHEMES = ('rtsp', 'rtsps', 'rtmp', 'http', 'https', 'udp', 'tcp', 'srt')
+
+
+def is_stream_url(source):
+    """True if ``source`` is a network stream URL (RTSP, HTTP, ...) rather than a file."""
+    return isinstance(source, str) and urlparse(source).scheme.lower() in STREAM_SCHEMES
+
+
+class LiveSource:
+    def __init__(self, opener, name, buffer_frames=8, max_latency=0.5, stall_timeout=5.0,
+                 reconnect_delay=0.5, max_reconnect_delay=30.0):
+        """Reconnecting, latency-bounded reader for cameras and network streams.
+
+        A background thread reads from the capture returned by ``opener()``
+        as fast as the source delivers, so frames never pile up inside the
+        decoder or the network stack. Frames wait in a small buffer; read()
+        discards any older than ``max_latency`` (the newest is always kept),
+        so a slow pipeline processes the freshest image instead of falling
+        further behind. When the source fails or ends, the capture is
+        reopened with exponential backoff. read() returns (False, None)
+        if no frame arrives within ``stall_timeout``; callers should just
+        try again.
+
+        Implements the read/grab/get/isOpened/release subset of the
+        cv2.VideoCapture interface used by the detector.
+
+        Args:
+            opener: Callable returning a new opened capture
+            name: Source description used in logs
+            buffer_frames: Frames kept waiting for the consumer
+            max_latency: Seconds a buffered frame may wait before it is dropped
+            stall_timeout: Seconds without frames before a stall is counted
+            reconnect_delay: First delay before reconnecting, doubled per failed attempt
+            max_reconnect_delay: Upper bound of the reconnect delay
+        """
+        self.opener = opener
+        self.name = name
+        self.max_latency = max_latency
+        self.stall_timeout = stall_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._stream = 'default'
+        self.logger = logging.getLogger(__name__)
+        self.frames = deque(maxlen=buffer_frames)
+        self.condition = threading.Condition()
+        self.reconnects = 0
+        self.stalls = 0
+        self.stalled = False
+        self.dropped_frames = 0
+        self.last_frame_time = None
+
+        # The first connection is made up front so failures surface to the
+        # caller and the stream's size and frame rate are known
+        self.cap = opener()
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Failed to open video source: {name}")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+        self.width = self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)
+        self.height = self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
+        self.copy_frames = getattr(self.cap, 'pooled', False)
+
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='live-source', daemon=True)
+        self.thread.start()
+
+    @property
+    def stream(self):
+        """Stream label for metrics; may be set once the camera ID is known."""
+        return self._stream
+
+    @stream.setter
+    def stream(self, name):
+        self._stream = name
+        SOURCE_CONNECTED.set(int(self.cap is not None), stream=name)
+
+    def _run(self):
+        attempt = 0
+        while self.running:
+            if self.cap is None:
+                if not self._reconnect(attempt):
+                    attempt += 1
+                    continue
+                attempt = 0
+            try:
+                success, frame = self.cap.read()
+            except Exception as e:
+                self.logger.error(f"Error reading from {self.name}: {e}")
+                success = False
+            if not self.running:
+                break
+            if not success:
+                self.logger.warning(f"Lost video source {self.name}; reconnecting")
+                self._disconnect()
+                continue
+            if self.copy_frames:
+                frame = frame.copy()
+            with self.condition:
+                if len(self.frames) == self.frames.maxlen:
+                    self._drop(1)
+                self.frames.append((time.monotonic(), frame))
+                self.last_frame_time = time.monotonic()
+                self.stalled = False
+                self.condition.notify()
+        self._disconnect()
+
+    def _reconnect(self, attempt):
+        """Wait out the backoff delay for ``attempt`` and reopen the source."""
+        delay = min(self.reconnect_delay * 2 ** attempt, self.max_reconnect_delay)
+        # Jitter keeps cameras that dropped together from reconnecting in lockstep
+        time.sleep(delay * random.uniform(0.8, 1.0))
+        if not self.running:
+            return False
+        self.reconnects += 1
+        SOURCE_RECONNECTS.inc(stream=self.stream)
+        try:
+            cap = self.opener()
+        except Exception as e:
+            self.logger.warning(f"Reconnecting to {self.name} failed: {e}")
+            return False
+        if not cap.isOpened():
+            self.logger.warning(f"Reconnecting to {self.name} failed; next attempt in "
+                                f"{min(delay * 2, self.max_reconnect_delay):.1f}s")
+            cap.release()
+            return False
+        self.logger.info(f"Reconnected to {self.name}")
+        self.cap = cap
+        self.copy_frames = getattr(cap, 'pooled', False)
+        SOURCE_CONNECTED.set(1, stream=self.stream)
+        return True
+
+    def _disconnect(self):
+        if self.cap is not None:
+            try:
+                self.cap.release()
+            except Exception as e:
+                self.logger.debug(f"Error releasing {self.name}: {e}")
+            self.cap = None
+        SOURCE_CONNECTED.set(0, stream=self.stream)
+
+    def _drop(self, count):
+        for _ in range(count):
+            self.frames.popleft()
+        self.dropped_frames += count
+        DROPPED_FRAMES.inc(count, stream=self.stream, queue='ingest')
+
+    def read(self):
+        """Return the oldest buffered frame no older than max_latency."""
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.frames or not self.running,
+                                           timeout=self.stall_timeout):
+                # Count each outage once, however long it lasts
+                if not self.stalled:
+                    self.stalled = True
+                    self.stalls += 1
+                    SOURCE_STALLS.inc(stream=self.stream)
+                    self.logger.warning(f"No frames from {self.name} for {self.stall_timeout:.1f}s")
+                return False, None
+            if not self.frames:
+                return False, None
+            now = time.monotonic()
+            stale = 0
+            for received, _ in self.frames:
+                if now - received <= self.max_latency or stale == len(self.frames) - 1:
+                    break
+                stale += 1
+            if stale:
+                self._drop(stale)
+            received, frame = self.frames.popleft()
+        SOURCE_FRAME_AGE.set(now - received, stream=self.stream)
+        return True, frame
+
+    def grab(self):
+        return self.read()[0]
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.width
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.height
+        return 0.0
+
+    def isOpened(self):
+        return self.running
+
+    def release(self):
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        if self.thread is not threading.current_thread():
+            # A read blocked on the source returns once its own timeout expires
+            self.thread.join(timeout=self.stall_timeout)
+
+    def health(self):
+        """Connection state and counters for status reporting."""
+        with self.condition:
+            last_frame = self.last_frame_time
+        return {
+            'connected': self.cap is not None,
+            'reconnects': self.reconnects,
+            'stalls': self.stalls,
+            'dropped_frames': self.dropped_frames,
+            'seconds_since_frame': time.monotonic() - last_frame if last_frame else None,
+        }
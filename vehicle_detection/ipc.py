@@ -0,0 +1,148 @@
+import cv2
+import logging
+import threading
+import time
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from vehicle_detection.pipeline import FrameSink
+from vehicle_detection.metrics import REGISTRY, STAGE_SECONDS
+from vehicle_detection.state import to_plain
+from vehicle_detection.utils import draw_area
+
+FRAME_SLOTS = 3
+METRICS_INTERVAL = 2.0  # Seconds between metrics sent to the web tier
+
+
+class SharedFrameRing:
+    def __init__(self, shape, slots=FRAME_SLOTS, name=None):
+        """Fixed-size frames in shared memory, for handing video across processes.
+
+        Each slot has a sequence number that is odd while the slot is being
+        written. A reader copies a slot and checks the sequence before and
+        after, so it never returns a torn frame; a frame overwritten before
+        it was read is simply skipped.
+
+        Args:
+            shape: Frame shape (height, width, channels), uint8
+            slots: Number of frames in the ring
+            name: Name of an existing ring to attach to; None creates one
+        """
+        self.shape = tuple(shape)
+        self.slots = slots
+        frame_bytes = int(np.prod(self.shape))
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner,
+                                              size=8 * slots + frame_bytes * slots)
+        if not self.owner:
+            # Only the creating process should unlink the segment on exit
+            resource_tracker.unregister(self.shm._name, 'shared_memory')
+        self.sequences = np.ndarray((slots,), np.int64, self.shm.buf, 0)
+        self.frames = np.ndarray((slots,) + self.shape, np.uint8, self.shm.buf, 8 * slots)
+        if self.owner:
+            self.sequences[:] = 0
+        self.next_slot = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, frame):
+        """Copy ``frame`` into the next slot.
+
+        Returns:
+            tuple: (slot, sequence) identifying the frame for read()
+        """
+        slot = self.next_slot
+        self.next_slot = (slot + 1) % self.slots
+        self.sequences[slot] += 1
+        self.frames[slot][...] = frame
+        self.sequences[slot] += 1
+        return slot, int(self.sequences[slot])
+
+    def read(self, slot, sequence):
+        """Return a copy of the frame written as (slot, sequence), or None if it was overwritten."""
+        if self.sequences[slot] != sequence:
+            return None
+        frame = self.frames[slot].copy()
+        if self.sequences[slot] != sequence:
+            return None
+        return frame
+
+    def close(self):
+        # Views into the buffer must go before the segment can be closed
+        del self.sequences, self.frames
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class IPCSink(FrameSink):
+    def __init__(self, conn, ring, violation_detector, fps=15.0, evidence=None):
+        """Pipeline sink that publishes results to a web tier in another process.
+
+        Violations are detected and persisted here, next to inference. Counts
+        and new violations are sent as small pickled messages over ``conn``;
+        frames go through the shared memory ring at most ``fps`` times per
+        second, with only a (slot, sequence) notification on the connection.
+        No JPEG encoding happens in this process. This process's metrics are
+        sent every METRICS_INTERVAL seconds for the web tier's /metrics.
+
+        Args:
+            conn: multiprocessing Connection to the web tier
+            ring: SharedFrameRing the web tier reads frames from
+            violation_detector: ViolationDetector for this stream
+            fps: Maximum rate at which frames are published
+            evidence: Optional EvidenceRecorder (added to the pipeline before this sink)
+        """
+        self.conn = conn
+        self.ring = ring
+        self.violation_detector = violation_detector
+        self.evidence = evidence
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.last_frame_time = 0.0
+        self.last_metrics_time = 0.0
+        self.send_lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def send(self, *message):
+        """Send a message to the web tier (safe to call from any thread)."""
+        with self.send_lock:
+            self.conn.send(message)
+
+    def on_rows_written(self, table, buckets, rows):
+        """BatchedWriter listener forwarding committed rows to the web tier."""
+        self.send('rows', table, buckets, rows)
+
+    def on_start(self, processor):
+        self.processor = processor
+
+    def on_frame(self, event):
+        stream = self.processor.config.camera_id
+        if event.has_tracks:
+            with STAGE_SECONDS.time(stream=stream, stage='violations'):
+                new_violations = self.violation_detector.detect_violations(event.frame, event.result)
+            for violation in new_violations:
+                if self.evidence:
+                    violation.update(self.evidence.capture(violation, event) or {})
+                self.processor.writer.add_violation(violation, self.processor.config.camera_id)
+            self.send('state', self.processor.get_vehicle_counts(), to_plain(new_violations))
+
+        now = time.monotonic()
+        if now - self.last_frame_time >= self.interval:
+            self.last_frame_time = now
+            with STAGE_SECONDS.time(stream=stream, stage='drawing'):
+                draw_area(event.frame, self.processor.area_coordinates)
+            height, width = self.ring.shape[:2]
+            slot, sequence = self.ring.write(cv2.resize(event.frame, (width, height)))
+            self.send('frame', slot, sequence)
+
+        if now - self.last_metrics_time >= METRICS_INTERVAL:
+            self.last_metrics_time = now
+            self.send('metrics', REGISTRY.collect())
+        return True
+
+    def on_stop(self, processor):
+        try:
+            self.send('stopped')
+        except (OSError, EOFError):
+            pass
@@ -0,0 +1,212 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds; per-frame stages sit between 1 ms and a few 100 ms
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+               for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+
+class Metric:
+    metric_type = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        """A named metric with one value per combination of label values."""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def samples(self):
+        """Yield (sample name, labels, value) for the exposition format."""
+        with self.lock:
+            items = list(self.values.items())
+        for key, value in items:
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+
+class Counter(Metric):
+    metric_type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def set_total(self, value, **labels):
+        """Report a total counted elsewhere (e.g. refreshed by a collector)."""
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+
+class Gauge(Metric):
+    metric_type = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+
+class Histogram(Metric):
+    metric_type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, sum, count
+                state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the ``with`` block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self.lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self.values.items()]
+        for key, (counts, total, count) in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket', dict(labels, le=_format_value(bound)), cumulative
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, count
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """Process-wide collection of metrics, rendered in Prometheus text format.
+
+        collect() returns plain data that can be pickled, so a worker process
+        can ship its metrics to the web tier, which renders them together
+        with its own.
+        """
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.collectors = []
+
+    def _register(self, cls, name, documentation, labelnames, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def add_collector(self, collector):
+        """Call ``collector()`` before each collection, e.g. to refresh gauges."""
+        self.collectors.append(collector)
+
+    def collect(self):
+        """Return [(name, type, help, [(sample name, labels, value), ...]), ...]."""
+        for collector in list(self.collectors):
+            collector()
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return [(metric.name, metric.metric_type, metric.documentation, list(metric.samples()))
+                for metric in metrics]
+
+    def render(self, *extra_families):
+        """Render this registry plus families collected elsewhere as exposition text.
+
+        Samples with the same name and labels from several sources (e.g. a
+        stage timed both here and in an inference worker) are summed, since
+        a scrape must not contain a series twice.
+        """
+        merged = {}
+        for families in (self.collect(),) + extra_families:
+            for name, metric_type, documentation, samples in families:
+                if name not in merged:
+                    merged[name] = (metric_type, documentation, {})
+                series = merged[name][2]
+                for sample_name, labels, value in samples:
+                    key = (sample_name, tuple(sorted(labels.items())))
+                    if key in series:
+                        series[key] = (labels, series[key][1] + value)
+                    else:
+                        series[key] = (labels, value)
+
+        lines = []
+        for name, (metric_type, documentation, series) in merged.items():
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for (sample_name, _), (labels, value) in series.items():
+                lines.append(f'{sample_name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+# Pipeline stages: capture, inference, tracking, violations, drawing,
+# web_drawing, encoding, emit and db_flush
+STAGE_SECONDS = REGISTRY.histogram(
+    'traffic_stage_seconds', 'Time spent in each pipeline stage', ('stream', 'stage'))
+FRAMES = REGISTRY.counter(
+    'traffic_frames_total', 'Frames read and run through inference', ('stream',))
+DROPPED_FRAMES = REGISTRY.counter(
+    'traffic_dropped_frames_total', 'Frames replaced or skipped before delivery', ('stream', 'queue'))
+QUEUE_DEPTH = REGISTRY.gauge(
+    'traffic_queue_depth', 'Items waiting in an internal queue', ('stream', 'queue'))
+ACTIVE_TRACKS = REGISTRY.gauge(
+    'traffic_active_tracks', 'Tracked objects in the most recent frame', ('stream',))
+TRACKED_IDS = REGISTRY.gauge(
+    'traffic_tracked_ids', 'Track IDs remembered for counting', ('stream',))
+ROWS_WRITTEN = REGISTRY.counter(
+    'traffic_db_rows_written_total', 'Rows committed by the batched writer', ('stream', 'table'))
+VIEWERS = REGISTRY.gauge(
+    'traffic_stream_viewers', 'Clients watching a stream', ('stream', 'transport'))
+SOURCE_CONNECTED = REGISTRY.gauge(
+    'traffic_source_connected', 'Whether a live source is currently connected', ('stream',))
+SOURCE_RECONNECTS = REGISTRY.counter(
+    'traffic_source_reconnects_total', 'Attempts to reconnect to a live source', ('stream',))
+SOURCE_STALLS = REGISTRY.counter(
+    'traffic_source_stalls_total', 'Times a live source stopped delivering frames', ('stream',))
+SOURCE_FRAME_AGE = REGISTRY.gauge(
+    'traffic_source_frame_age_seconds', 'Time the latest live frame waited before processing', ('stream',))
+CONFIG_VERSION = REGISTRY.gauge(
+    'traffic_config_version', 'Runtime configuration version the pipeline is running', ('stream',))
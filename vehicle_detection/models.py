@@ -0,0 +1,110 @@
+import logging
+import threading
+import time
+import numpy as np
+from contextlib import contextmanager
+
+
+def _require_ultralytics():
+    # Imported on first use: ultralytics pulls in torch, which takes seconds
+    try:
+        from ultralytics import YOLO
+    except ImportError as e:
+        raise ImportError("Detection requires ultralytics (pip install ultralytics)") from e
+    return YOLO
+
+
+class ModelRegistry:
+    def __init__(self):
+        """Process-wide pool of loaded, warmed-up YOLO models.
+
+        Tracking keeps per-stream state on the model, so an instance is
+        checked out by one processor at a time with acquire() and handed
+        back with release(), which clears the tracker. Released instances
+        are reused, so restarting a stream skips loading weights, moving
+        them to the device and the first (slow) inference.
+        """
+        self.lock = threading.Lock()
+        # Model path -> [model, ...]. imgsz only picks the warm-up size; a
+        # model runs at any size, so it is not part of the key.
+        self.idle = {}
+        self.logger = logging.getLogger(__name__)
+
+    def acquire(self, model_path, imgsz=None, timer=None):
+        """Check out a warm model, loading one if none is idle.
+
+        Args:
+            model_path: Weights to load
+            imgsz: Inference size used for the warm-up
+            timer: Optional PhaseTimer the load and warm-up are recorded in
+        """
+        with self.lock:
+            idle = self.idle.get(model_path)
+            if idle:
+                self.logger.info(f"Reusing loaded model {model_path}")
+                return idle.pop()
+
+        timer = timer or PhaseTimer('model')
+        with timer.phase('model.import'):
+            YOLO = _require_ultralytics()
+        with timer.phase('model.load'):
+            model = YOLO(model_path)
+        with timer.phase('model.warmup'):
+            # The first inference initialises the device and predictor
+            size = imgsz or 640
+            model.predict(np.zeros((size, size, 3), np.uint8), verbose=False,
+                          **({'imgsz': imgsz} if imgsz else {}))
+        model.registry_key = model_path
+        return model
+
+    def release(self, model):
+        """Return a model to the pool, clearing its tracker state."""
+        # The next track() call creates fresh trackers (which is cheap)
+        predictor = getattr(model, 'predictor', None)
+        if predictor is not None and hasattr(predictor, 'trackers'):
+            del predictor.trackers
+        with self.lock:
+            self.idle.setdefault(model.registry_key, []).append(model)
+
+    def preload(self, model_path, imgsz=None):
+        """Load and warm a model ahead of the first acquire()."""
+        self.release(self.acquire(model_path, imgsz))
+
+
+class PhaseTimer:
+    def __init__(self, name):
+        """Wall-clock time spent in each named phase of a startup."""
+        self.name = name
+        self.phases = {}
+        self.started = time.perf_counter()
+        self.finished = None
+
+    @contextmanager
+    def phase(self, name):
+        """Add the duration of the ``with`` block to phase ``name``."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def finish(self):
+        """Stop the clock for total (again, if more phases were added since)."""
+        self.finished = time.perf_counter()
+
+    @property
+    def total(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def report(self):
+        """One-line summary for the log."""
+        phases = ', '.join(f'{name} {seconds * 1000:.0f} ms' for name, seconds in self.phases.items())
+        return f"{self.name} took {self.total * 1000:.0f} ms ({phases})"
+
+    def as_dict(self):
+        """Seconds per phase, plus the total."""
+        return dict({name: round(seconds, 4) for name, seconds in self.phases.items()},
+                    total=round(self.total, 4))
+
+
+MODELS = ModelRegistry()
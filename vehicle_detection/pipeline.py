@@ -0,0 +1,117 @@
+import cv2
+import logging
+from vehicle_detection.utils import process_frame, draw_area
+from vehicle_detection.metrics import STAGE_SECONDS
+
+
+class FrameEvent:
+    """Everything the pipeline produced for one frame, handed to each sink."""
+
+    __slots__ = ('frame', 'result', 'index', 'timestamp', 'fps', 'new_detections')
+
+    def __init__(self, frame, result, index, timestamp, fps, new_detections):
+        self.frame = frame
+        self.result = result
+        self.index = index
+        self.timestamp = timestamp
+        self.fps = fps
+        # (vehicle_id, class_id, confidence) for vehicles counted on this frame
+        self.new_detections = new_detections
+
+    @property
+    def has_tracks(self):
+        """True if the tracker returned boxes with IDs for this frame."""
+        return self.result is not None and self.result.boxes.id is not None
+
+
+class FrameSink:
+    """Base class for pipeline outputs.
+
+    Sinks are called in order on the processing thread. on_frame() may
+    return False to stop processing. on_config() is called between frames
+    after the processor switched to a new runtime configuration.
+    """
+
+    def on_start(self, processor):
+        pass
+
+    def on_config(self, processor):
+        pass
+
+    def on_frame(self, event):
+        return True
+
+    def on_stop(self, processor):
+        pass
+
+
+class DatabaseSink(FrameSink):
+    def __init__(self, writer, camera_id='default'):
+        """Queue newly counted vehicles on a BatchedWriter."""
+        self.writer = writer
+        self.camera_id = camera_id
+
+    def on_frame(self, event):
+        for vehicle_id, class_id, confidence in event.new_detections:
+            self.writer.add_detection(
+                vehicle_id=vehicle_id,
+                class_id=class_id,
+                confidence=confidence,
+                timestamp=event.timestamp,
+                camera_id=self.camera_id
+            )
+        return True
+
+    def on_stop(self, processor):
+        self.writer.flush()
+
+
+class AnnotationSink(FrameSink):
+    def __init__(self, area_coordinates):
+        """Draw boxes, the detection area and FPS onto the frame in place."""
+        self.area_coordinates = area_coordinates
+        self.stream = 'default'
+
+    def on_start(self, processor):
+        self.stream = processor.config.camera_id
+
+    def on_config(self, processor):
+        self.area_coordinates = processor.area_coordinates
+
+    def on_frame(self, event):
+        with STAGE_SECONDS.time(stream=self.stream, stage='drawing'):
+            if event.has_tracks:
+                process_frame(event.frame, event.result, self.area_coordinates)
+            draw_area(event.frame, self.area_coordinates)
+            cv2.putText(event.frame, f'FPS: {event.fps:.1f}', (20, 30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+        return True
+
+
+class DisplaySink(FrameSink):
+    def __init__(self, window_name='Vehicle Detection'):
+        """Show frames in an OpenCV window; pressing 'q' stops processing."""
+        self.window_name = window_name
+        self.available = True
+        self.logger = logging.getLogger(__name__)
+
+    def on_frame(self, event):
+        if not self.available:
+            return True
+        try:
+            cv2.imshow(self.window_name, event.frame)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                self.logger.info("Processing stopped by user")
+                return False
+        except cv2.error:
+            self.logger.warning("GUI display not available")
+            # Continue processing without display
+            self.available = False
+        return True
+
+    def on_stop(self, processor):
+        try:
+            cv2.destroyWindow(self.window_name)
+        except cv2.error:
+            self.logger.warning("Failed to destroy windows - GUI might not be available")
+
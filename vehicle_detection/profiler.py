@@ -0,0 +1,266 @@
+import cv2
+import json
+import logging
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+# Flow magnitude (analysis pixels per sample) above which a pixel counts as moving
+MOTION_THRESHOLD = 1.0
+# Fraction of moving pixels separating low/moderate/high motion scenes
+MOTION_LEVELS = ((0.01, 'low'), (0.05, 'moderate'), (float('inf'), 'high'))
+# Fraction of samples a pixel must be red in to belong to a light candidate
+RED_FRACTION = 0.2
+
+
+def _red_mask(frame):
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    return cv2.bitwise_or(cv2.inRange(hsv, (0, 120, 70), (10, 255, 255)),
+                          cv2.inRange(hsv, (170, 120, 70), (180, 255, 255)))
+
+
+def profile_chunk(video_path, start_frame, end_frame, step, size):
+    """Accumulate motion statistics over frames [start_frame, end_frame).
+
+    Seeks once, then walks the chunk sequentially, decoding every frame
+    with grab() but only retrieving every ``step``-th one. Retrieved frames
+    are downscaled to ``size`` before optical flow, which runs on a
+    3-level pyramid of the small image.
+
+    Returns:
+        dict: Sums that profile_video merges across chunks
+    """
+    cv2.setNumThreads(1)  # Parallelism comes from the chunk workers
+    width, height = size
+    totals = {
+        'samples': 0,
+        'pairs': 0,
+        'difference': 0.0,
+        'moving': 0.0,
+        'flow': np.zeros(2),
+        'flow_magnitude': 0.0,
+        'activity': np.zeros((height, width), np.float32),
+        'red': np.zeros((height, width), np.float32),
+    }
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open video {video_path}")
+    try:
+        if start_frame:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+        previous = None
+        index = start_frame
+        while end_frame is None or index < end_frame:
+            if not cap.grab():
+                break
+            sample = (index - start_frame) % step == 0
+            index += 1
+            if not sample:
+                continue
+            success, frame = cap.retrieve()
+            if not success:
+                break
+            small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+            totals['samples'] += 1
+            totals['red'] += _red_mask(small) > 0
+            if previous is not None:
+                flow = cv2.calcOpticalFlowFarneback(previous, gray, None, 0.5, 3, 9, 2, 5, 1.1, 0)
+                magnitude = np.linalg.norm(flow, axis=2)
+                moving = magnitude > MOTION_THRESHOLD
+                totals['pairs'] += 1
+                totals['difference'] += float(cv2.absdiff(previous, gray).mean())
+                totals['moving'] += float(moving.mean())
+                totals['activity'] += moving
+                totals['flow'] += flow[moving].sum(axis=0) if moving.any() else 0.0
+                totals['flow_magnitude'] += float(magnitude[moving].sum())
+            previous = gray
+    finally:
+        cap.release()
+    return totals
+
+
+def _merge(chunks):
+    merged = chunks[0]
+    for chunk in chunks[1:]:
+        for key, value in chunk.items():
+            merged[key] = merged[key] + value
+    return merged
+
+
+def compass_direction(dx, dy):
+    """Compass name of an image-space vector (y grows downwards)."""
+    if abs(dx) > abs(dy):
+        return 'east' if dx > 0 else 'west'
+    return 'south' if dy > 0 else 'north'
+
+
+def _normalize(points, size):
+    width, height = size
+    return [[round(float(x) / width, 4), round(float(y) / height, 4)] for x, y in points]
+
+
+def _monitored_area(activity, size):
+    """Polygon around the regions where most motion happened, or None."""
+    if activity.max() <= 0:
+        return None
+    mask = (activity >= 0.2 * activity.max()).astype(np.uint8)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, np.ones((5, 5), np.uint8))
+    points = cv2.findNonZero(mask)
+    if points is None:
+        return None
+    hull = cv2.convexHull(points)
+    polygon = cv2.approxPolyDP(hull, 0.02 * cv2.arcLength(hull, True), True).reshape(-1, 2)
+    return _normalize(polygon, size)
+
+
+def _light_candidates(red, samples, size, limit=5):
+    """Small, upright regions that were red in a good share of the samples."""
+    if not samples:
+        return []
+    width, height = size
+    fraction = red / samples
+    mask = (fraction >= RED_FRACTION).astype(np.uint8)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+    candidates = []
+    for x, y, w, h, area in stats[1:count]:
+        # Lights are small and taller than wide; ignore red vehicles and signage
+        if area < 2 or area > 0.01 * width * height or h < w:
+            continue
+        candidates.append({
+            'box': _normalize([(x, y), (x + w, y + h)], size),
+            'red_fraction': round(float(fraction[y:y + h, x:x + w].max()), 3),
+        })
+    candidates.sort(key=lambda candidate: candidate['red_fraction'], reverse=True)
+    return candidates[:limit]
+
+
+def suggest_stop_line(area, direction, candidates):
+    """Line across the monitored area, perpendicular to the flow of traffic.
+
+    It is placed level with the bottom of the strongest light candidate if
+    that falls within the area, else 70% of the way along the flow.
+    """
+    xs = [point[0] for point in area] if area else [0.1, 0.9]
+    ys = [point[1] for point in area] if area else [0.4, 1.0]
+    vertical = direction in ('north', 'south')
+    low, high = (min(ys), max(ys)) if vertical else (min(xs), max(xs))
+    forward = direction in ('south', 'east')
+    position = low + (0.7 if forward else 0.3) * (high - low)
+    if candidates:
+        light = candidates[0]['box'][1][1 if vertical else 0]
+        if low <= light <= high:
+            position = light
+    position = round(position, 4)
+    if vertical:
+        return [[min(xs), position], [max(xs), position]]
+    return [[position, min(ys)], [position, max(ys)]]
+
+
+def profile_video(video_path, workers=None, sample_fps=5.0, analysis_width=320):
+    """Profile a video's traffic in one parallel, sequential pass.
+
+    The file is split into one contiguous chunk per worker process; each
+    worker decodes its chunk front to back and samples ``sample_fps``
+    frames per second at ``analysis_width`` pixels wide.
+
+    Args:
+        video_path: Video file to profile
+        workers: Worker processes (default: CPU count)
+        sample_fps: Frames analysed per second of video
+        analysis_width: Width frames are downscaled to before analysis
+
+    Returns:
+        dict: The scene profile; coordinates are fractions of the frame size
+    """
+    logger = logging.getLogger(__name__)
+    if not os.path.exists(video_path):
+        raise FileNotFoundError(f"Video file not found: {video_path}")
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open video {video_path}")
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    started = time.perf_counter()
+    size = (analysis_width, max(2, round(height * analysis_width / width)))
+    step = max(1, round(fps / sample_fps))
+    workers = max(1, min(workers or os.cpu_count() or 1, frame_count // (step * 10) or 1))
+    # Chunk boundaries fall on sample positions; the last chunk reads to the end
+    # in case the container under-reports its frame count
+    chunk = -(-frame_count // workers // step) * step
+    bounds = [(i * chunk, (i + 1) * chunk if i < workers - 1 else None) for i in range(workers)]
+    logger.info(f"Profiling {video_path}: {frame_count} frames in {workers} chunk(s), "
+                f"every {step} frame(s) at {size[0]}x{size[1]}")
+
+    if workers == 1:
+        chunks = [profile_chunk(video_path, 0, None, step, size)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = list(executor.map(profile_chunk, [video_path] * workers,
+                                       [start for start, _ in bounds], [end for _, end in bounds],
+                                       [step] * workers, [size] * workers))
+    totals = _merge(chunks)
+
+    pairs = max(totals['pairs'], 1)
+    moving_fraction = totals['moving'] / pairs
+    level = next(name for bound, name in MOTION_LEVELS if moving_fraction < bound)
+    dx, dy = totals['flow']
+    moving_pixels = totals['moving'] * size[0] * size[1]
+    samples_per_second = fps / step
+    consistency = float(np.hypot(dx, dy) / totals['flow_magnitude']) if totals['flow_magnitude'] else 0.0
+    direction = compass_direction(dx, dy) if totals['flow_magnitude'] else None
+    area = _monitored_area(totals['activity'], size)
+    candidates = _light_candidates(totals['red'], totals['samples'], size)
+
+    profile = {
+        'video': {
+            'path': os.path.abspath(video_path),
+            'width': width,
+            'height': height,
+            'fps': fps,
+            'frames': frame_count,
+            'duration': frame_count / fps,
+        },
+        'analysis': {
+            'samples': totals['samples'],
+            'sample_fps': samples_per_second,
+            'analysis_size': list(size),
+            'workers': workers,
+            'elapsed_seconds': round(time.perf_counter() - started, 2),
+        },
+        'motion': {
+            'level': level,
+            'moving_fraction': round(moving_fraction, 4),
+            'mean_difference': round(totals['difference'] / pairs, 3),
+        },
+        'direction': {
+            'dominant': direction,
+            # Mean flow of moving pixels, in frame widths/heights per second
+            'mean_flow': [round(float(dx) / moving_pixels / size[0] * samples_per_second, 4),
+                          round(float(dy) / moving_pixels / size[1] * samples_per_second, 4)]
+                         if moving_pixels else [0.0, 0.0],
+            # 1.0 when all motion goes one way, near 0 for opposing lanes
+            'consistency': round(consistency, 3),
+        },
+        'light_candidates': candidates,
+        'suggested_zones': {
+            'default_area': area,
+            'red_light_line': suggest_stop_line(area, direction, candidates) if direction else None,
+        },
+        'suggested_rules': {
+            'wrong_way_direction': direction,
+        },
+    }
+    return profile
+
+
+def write_profile(profile, path):
+    """Write a profile as JSON."""
+    with open(path, 'w') as f:
+        json.dump(profile, f, indent=2)
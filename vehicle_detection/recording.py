@@ -0,0 +1,165 @@
+import bisect
+import cv2
+import json
+import logging
+import queue
+import threading
+from datetime import datetime
+from pathlib import Path
+from vehicle_detection.pipeline import FrameSink
+from vehicle_detection.metrics import DROPPED_FRAMES, QUEUE_DEPTH, STAGE_SECONDS
+
+INDEX_FILE = 'segments.jsonl'
+
+
+class SegmentIndex:
+    def __init__(self, output_path):
+        """Index of recorded segments, stored as one JSON line per segment.
+
+        Each entry has the segment ``file`` (relative to ``output_path``), the
+        wall-clock ``start`` and ``end`` of its frames, the number of
+        ``frames`` and the ``fps`` it was written at.
+        """
+        self.path = Path(output_path) / INDEX_FILE
+        self.lock = threading.Lock()
+
+    def append(self, entry):
+        with self.lock:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+
+    def entries(self):
+        """Return all segments, oldest first."""
+        if not self.path.exists():
+            return []
+        with self.lock:
+            with open(self.path) as f:
+                entries = [json.loads(line) for line in f if line.strip()]
+        return sorted(entries, key=lambda entry: entry['start'])
+
+    def find(self, timestamp):
+        """Locate the segment covering ``timestamp``.
+
+        Returns:
+            tuple: (segment path, playback offset in seconds), or None
+        """
+        entries = self.entries()
+        position = bisect.bisect_right([entry['start'] for entry in entries], timestamp) - 1
+        if position < 0 or timestamp > entries[position]['end']:
+            return None
+        entry = entries[position]
+        # Processing may not keep up with the segment frame rate, so map
+        # wall-clock time onto playback time proportionally
+        duration = entry['end'] - entry['start']
+        playback = entry['frames'] / entry['fps']
+        offset = (timestamp - entry['start']) / duration * playback if duration > 0 else 0.0
+        return self.path.parent / entry['file'], offset
+
+
+class SegmentedVideoSink(FrameSink):
+    def __init__(self, output_path, segment_seconds=60.0, fps=None, codec='mp4v',
+                 extension='.mp4', max_queue=64):
+        """Record annotated frames into fixed-duration video segments.
+
+        Frames are queued for a background thread that encodes them, so the
+        processing thread never touches the disk. When the queue is full
+        the newest frame is dropped (and counted); the segment stays
+        continuous and catches up once the backlog clears. Each finished
+        segment is added to a SegmentIndex for lookup by timestamp.
+
+        Args:
+            output_path: Directory for segments and the index
+            segment_seconds: Duration covered by each segment
+            fps: Frame rate written into segments; defaults to the processed frame rate
+            codec: FourCC of the video codec
+            extension: Segment file extension matching the codec's container
+            max_queue: Frames that may wait for the encoder
+        """
+        self.output_path = Path(output_path)
+        self.segment_seconds = segment_seconds
+        self.fps = fps
+        self.codec = codec
+        self.extension = extension
+        self.index = SegmentIndex(output_path)
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.stream = 'default'
+        self.logger = logging.getLogger(__name__)
+        self.thread = None
+        self.failed = False
+        self.copy_frames = False
+        # Current segment; only touched by the background thread
+        self.writer = None
+        self.segment = None
+
+    def on_start(self, processor):
+        self.output_path.mkdir(parents=True, exist_ok=True)
+        self.stream = processor.config.camera_id
+        # Pooled capture buffers are reused while frames wait in the queue
+        self.copy_frames = getattr(processor.cap, 'pooled', False)
+        if not self.fps:
+            source_fps = processor.source_fps if processor.source_fps > 0 else 15.0
+            self.fps = source_fps / (processor.config.frame_skip + 1)
+        self.thread = threading.Thread(target=self._run, name='segment-writer', daemon=True)
+        self.thread.start()
+
+    def on_frame(self, event):
+        try:
+            frame = event.frame.copy() if self.copy_frames else event.frame
+            self.queue.put_nowait((event.timestamp, frame))
+        except queue.Full:
+            DROPPED_FRAMES.inc(stream=self.stream, queue='recording')
+        QUEUE_DEPTH.set(self.queue.qsize(), stream=self.stream, queue='recording')
+        return True
+
+    def on_stop(self, processor):
+        if self.thread:
+            self.queue.put(None)
+            self.thread.join(timeout=30.0)
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            if self.failed:
+                continue
+            try:
+                with STAGE_SECONDS.time(stream=self.stream, stage='recording'):
+                    self._write(*item)
+            except RuntimeError as e:
+                # The writer can't be opened; keep draining so nothing blocks
+                self.logger.error(f"Recording disabled: {e}")
+                self.failed = True
+            except Exception as e:
+                self.logger.error(f"Error recording frame: {e}")
+        self._close_segment()
+
+    def _write(self, timestamp, frame):
+        height, width = frame.shape[:2]
+        if self.segment is not None and (timestamp - self.segment['start'] >= self.segment_seconds
+                                         or (width, height) != self.segment['size']):
+            self._close_segment()
+        if self.segment is None:
+            self._open_segment(timestamp, (width, height))
+        self.writer.write(frame)
+        self.segment['end'] = timestamp
+        self.segment['frames'] += 1
+
+    def _open_segment(self, timestamp, size):
+        name = datetime.fromtimestamp(timestamp).strftime('segment_%Y%m%d_%H%M%S_%f') + self.extension
+        self.writer = cv2.VideoWriter(str(self.output_path / name),
+                                      cv2.VideoWriter_fourcc(*self.codec), self.fps, size)
+        if not self.writer.isOpened():
+            self.writer = None
+            raise RuntimeError(f"Could not open video writer for {name} (codec {self.codec})")
+        self.segment = {'file': name, 'start': timestamp, 'end': timestamp, 'frames': 0, 'size': size}
+
+    def _close_segment(self):
+        if self.segment is None:
+            return
+        self.writer.release()
+        entry = {key: value for key, value in self.segment.items() if key != 'size'}
+        entry['fps'] = self.fps
+        self.index.append(entry)
+        self.writer = None
+        self.segment = None
@@ -0,0 +1,250 @@
+import dataclasses
+import logging
+import os
+import threading
+import time
+import yaml
+from vehicle_detection.geometry import SceneGeometry
+
+# Settings a running pipeline adopts at the next frame. Everything else
+# (model, capture, database, outputs) needs the stream to be restarted.
+RELOADABLE_FIELDS = (
+    'confidence_threshold',
+    'nms_threshold',
+    'frame_skip',
+    'pace_to_source_fps',
+    'default_area',
+    'red_light_line',
+    'restricted_areas',
+    'zone_reference_size',
+    'wrong_way_direction',
+    'detect_wrong_way',
+    'speed_threshold',
+    'speed_multiplier',
+    'meters_per_pixel',
+)
+# Set by the application that hosts the pipeline, so never reported as edits
+HOST_FIELDS = ('camera_id', 'display_output', 'google_api_key')
+DIRECTIONS = ('north', 'south', 'east', 'west')
+
+
+def _point(point):
+    x, y = point
+    return [float(x), float(y)]
+
+
+def _coerce(name, value):
+    """Check one reloadable setting and return it in canonical form.
+
+    Raises:
+        ValueError: If the value has the wrong type or is out of range
+    """
+    try:
+        if name in ('confidence_threshold', 'nms_threshold', 'speed_threshold',
+                    'speed_multiplier', 'meters_per_pixel'):
+            converted = float(value)
+        elif name == 'frame_skip':
+            converted = int(value)
+        elif name in ('default_area', 'red_light_line'):
+            converted = [_point(point) for point in value]
+        elif name == 'restricted_areas':
+            converted = [[_point(point) for point in area] for area in value]
+        elif name == 'zone_reference_size':
+            converted = [int(v) for v in value]
+        else:
+            converted = value
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid value for {name}: {value!r}") from e
+
+    problem = None
+    if name in ('confidence_threshold', 'nms_threshold') and not 0.0 <= converted <= 1.0:
+        problem = 'must be between 0 and 1'
+    elif name in ('speed_threshold', 'speed_multiplier', 'meters_per_pixel') and converted <= 0:
+        problem = 'must be positive'
+    elif name == 'frame_skip' and converted < 0:
+        problem = 'must not be negative'
+    elif name in ('pace_to_source_fps', 'detect_wrong_way') and not isinstance(converted, bool):
+        problem = 'must be true or false'
+    elif name == 'wrong_way_direction' and converted not in DIRECTIONS:
+        problem = f"must be one of {', '.join(DIRECTIONS)}"
+    elif name == 'default_area' and len(converted) < 3:
+        problem = 'needs at least 3 points'
+    elif name == 'restricted_areas' and any(len(area) < 3 for area in converted):
+        problem = 'needs at least 3 points per area'
+    elif name == 'red_light_line' and len(converted) != 2:
+        problem = 'needs exactly 2 points'
+    elif name == 'zone_reference_size' and (len(converted) != 2 or min(converted) <= 0):
+        problem = 'must be [width, height]'
+    if problem:
+        raise ValueError(f"{name} {problem}")
+    return converted
+
+
+def compile_rules(config, geometry):
+    """Violation rule parameters, converted to the stream's pixel units."""
+    return {
+        'speed_threshold': config.speed_threshold,
+        'speed_multiplier': config.speed_multiplier,
+        'meters_per_pixel': config.meters_per_pixel / geometry.pixel_scale,
+        'wrong_way_direction': config.wrong_way_direction,
+        'detect_wrong_way': config.detect_wrong_way,
+    }
+
+
+class ConfigSnapshot:
+    """One version of a stream's configuration with everything derived from it.
+
+    Snapshots are never modified; a change produces a new one.
+    """
+
+    __slots__ = ('version', 'config', 'geometry', 'rules', 'source', 'created_at')
+
+    def __init__(self, version, config, frame_size, source):
+        self.version = version
+        self.config = config
+        self.geometry = SceneGeometry(config, frame_size)
+        self.rules = compile_rules(config, self.geometry)
+        self.source = source
+        self.created_at = time.time()
+
+    def settings(self):
+        """The reloadable settings of this version, as JSON-friendly values."""
+        return {name: _coerce(name, getattr(self.config, name)) for name in RELOADABLE_FIELDS}
+
+
+class RuntimeConfig:
+    def __init__(self, config, frame_size):
+        """Versioned configuration that a running pipeline picks up between frames.
+
+        Updates are validated and compiled (zones scaled to the stream,
+        rules converted to pixels) on the caller's thread, then published
+        by replacing ``current``. The processing loop reads ``current`` once
+        per frame, so no frame sees half an update and processing never
+        waits for a recompile.
+
+        Args:
+            config: DetectionConfig the stream was started with
+            frame_size: (width, height) of the stream's frames
+        """
+        self.frame_size = frame_size
+        self.lock = threading.Lock()  # Serializes writers; readers never take it
+        self.logger = logging.getLogger(__name__)
+        self.current = ConfigSnapshot(1, config, frame_size, 'startup')
+
+    def update(self, values, source='api'):
+        """Publish a new version with ``values`` applied.
+
+        Args:
+            values: {setting: value}; may be a whole configuration file
+            source: Where the change came from ('api' or 'file'), for the log
+
+        Returns:
+            dict: ``version`` now current, the settings that ``changed`` and
+            those that were ignored because they need a restart
+
+        Raises:
+            ValueError: If a setting is unknown or invalid; nothing is applied
+        """
+        with self.lock:
+            current = self.current
+            changed = {}
+            restart_required = []
+            for name, value in values.items():
+                if name in RELOADABLE_FIELDS:
+                    value = _coerce(name, value)
+                    if value != _coerce(name, getattr(current.config, name)):
+                        changed[name] = value
+                elif name in HOST_FIELDS:
+                    continue
+                elif not hasattr(current.config, name):
+                    raise ValueError(f"Unknown setting: {name}")
+                elif value != getattr(current.config, name):
+                    restart_required.append(name)
+
+            if changed:
+                config = dataclasses.replace(current.config, **changed)
+                self.current = ConfigSnapshot(current.version + 1, config, self.frame_size, source)
+                self.logger.info(f"Configuration version {self.current.version} from {source}: "
+                                 f"{', '.join(sorted(changed))}")
+            if restart_required:
+                self.logger.warning(f"Ignoring {', '.join(restart_required)} from {source} "
+                                    f"until the stream is restarted")
+            return {
+                'version': self.current.version,
+                'changed': sorted(changed),
+                'restart_required': restart_required,
+            }
+
+    def describe(self):
+        """Current version, where it came from and its reloadable settings."""
+        snapshot = self.current
+        return {
+            'version': snapshot.version,
+            'source': snapshot.source,
+            'updated_at': snapshot.created_at,
+            'settings': snapshot.settings(),
+        }
+
+
+class ConfigWatcher:
+    def __init__(self, path, runtime, interval=1.0):
+        """Apply edits of a YAML configuration file to a RuntimeConfig.
+
+        The file's modification time is polled, which needs no extra
+        dependency and also works for files on network mounts. Only settings
+        whose value changed in the file are applied, so an edit does not
+        undo changes made through the API. An edit that fails to parse or
+        validate is logged and the running version kept.
+
+        Args:
+            path: Configuration file the stream was started with
+            runtime: RuntimeConfig to update
+            interval: Seconds between checks
+        """
+        self.path = path
+        self.runtime = runtime
+        self.interval = interval
+        self.logger = logging.getLogger(__name__)
+        self.mtime = self._mtime()
+        self.values = self._load() if self.mtime is not None else {}
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='config-watcher', daemon=True)
+        self.thread.start()
+
+    def _mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            mtime = self._mtime()
+            if mtime is None or mtime == self.mtime:
+                continue
+            self.mtime = mtime
+            self.reload()
+
+    def _load(self):
+        with open(self.path, 'r') as f:
+            values = yaml.safe_load(f) or {}
+        if not isinstance(values, dict):
+            raise ValueError("Expected a mapping of settings")
+        return values
+
+    def reload(self):
+        """Apply what changed in the file; returns the update result or None on error."""
+        try:
+            values = self._load()
+            edited = {name: value for name, value in values.items()
+                      if name not in self.values or self.values[name] != value}
+            result = self.runtime.update(edited, source='file')
+        except (OSError, yaml.YAMLError, ValueError, TypeError) as e:
+            self.logger.error(f"Not applying {self.path}: {e}")
+            return None
+        self.values = values
+        return result
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join(timeout=self.interval + 1.0)
@@ -0,0 +1,173 @@
+import threading
+from collections import deque
+
+
+def to_plain(value):
+    """Convert numpy scalars and tuples into JSON-friendly Python values."""
+    if isinstance(value, dict):
+        return {key: to_plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_plain(item) for item in value]
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+class StateChannel:
+    def __init__(self, max_violations=100):
+        """Versioned live state published as a snapshot followed by deltas.
+
+        State consists of named counter maps (e.g. vehicle counts) and an
+        append-only list of violations, each stamped with a monotonically
+        increasing ``seq``. Every change bumps ``version``. collect_delta()
+        returns only what changed since the previous call, so it can be
+        broadcast at its own rate independent of the video frame rate.
+
+        Clients keep the version they have applied. A delta whose
+        ``base_version`` is newer than that means updates were missed and the
+        client should ask for a fresh snapshot. Counter values in deltas are
+        absolute and violations carry their ``seq``, so applying a delta
+        that overlaps a snapshot is harmless.
+
+        Args:
+            max_violations: Number of recent violations included in snapshots
+        """
+        self.lock = threading.Lock()
+        self.version = 0
+        self.published_version = 0
+        self.counters = {}
+        self.violations = deque(maxlen=max_violations)
+        self.violation_seq = 0
+        self.pending_counters = {}
+        self.pending_violations = []
+
+    def update_counters(self, name, values):
+        """Replace counter map ``name``, recording only the keys that changed."""
+        values = to_plain(values)
+        with self.lock:
+            current = self.counters.setdefault(name, {})
+            changed = {key: value for key, value in values.items() if current.get(key) != value}
+            # Keys that disappeared (e.g. a bucket reset) are reported as zero
+            changed.update({key: 0 for key in current if key not in values})
+            if not changed:
+                return False
+            self.counters[name] = dict(values)
+            self.pending_counters.setdefault(name, {}).update(changed)
+            self.version += 1
+            return True
+
+    def append_violations(self, violations):
+        """Append violations, stamping each with the next sequence number."""
+        if not violations:
+            return []
+        with self.lock:
+            stamped = []
+            for violation in violations:
+                self.violation_seq += 1
+                violation = dict(to_plain(violation), seq=self.violation_seq)
+                self.violations.append(violation)
+                stamped.append(violation)
+            self.pending_violations.extend(stamped)
+            self.version += 1
+            return stamped
+
+    def snapshot(self):
+        """Return the full current state."""
+        with self.lock:
+            return {
+                'version': self.version,
+                'counters': {name: dict(values) for name, values in self.counters.items()},
+                'violations': list(self.violations),
+                'violation_seq': self.violation_seq,
+            }
+
+    def collect_delta(self):
+        """Return the changes since the previous call, or None if nothing changed."""
+        with self.lock:
+            if self.version == self.published_version:
+                return None
+            delta = {
+                'base_version': self.published_version,
+                'version': self.version,
+                'counters': self.pending_counters,
+                'violations': self.pending_violations,
+            }
+            self.published_version = self.version
+            self.pending_counters = {}
+            self.pending_violations = []
+            return delta
+
+
+class LiveSnapshot:
+    """Immutable view of the live state; replaced, never modified, on update."""
+
+    __slots__ = ('frame', 'vehicle_counts', 'violation_counts', 'recent_violations', 'version')
+
+    def __init__(self, frame, vehicle_counts, violation_counts, recent_violations, version):
+        self.frame = frame
+        self.vehicle_counts = vehicle_counts
+        self.violation_counts = violation_counts
+        self.recent_violations = recent_violations
+        self.version = version
+
+    @property
+    def total_violations(self):
+        return sum(self.violation_counts.values())
+
+
+class LiveState:
+    def __init__(self, violation_types=(), max_violations=100):
+        """Latest frame, counts and recent violations shared across threads.
+
+        Writers build a new LiveSnapshot under a lock and swap it in with a
+        single reference assignment. Readers take ``current`` without
+        locking and get a consistent view that later updates never mutate,
+        so they never block the processing thread. Recent violations are
+        kept in a bounded deque, so memory stays fixed however long the
+        system runs.
+
+        Args:
+            violation_types: Violation types counted from zero
+            max_violations: Number of recent violations kept
+        """
+        self.lock = threading.Lock()
+        self.recent = deque(maxlen=max_violations)
+        self.current = LiveSnapshot(None, {}, {v_type: 0 for v_type in violation_types}, (), 0)
+
+    def update(self, vehicle_counts=None, new_violations=()):
+        """Replace the vehicle counts and/or add violations.
+
+        The version only moves when the counts or violations actually
+        change, so caches keyed on it stay valid across idle frames.
+
+        Returns:
+            LiveSnapshot: The new snapshot, or the current one if nothing changed
+        """
+        with self.lock:
+            current = self.current
+            violation_counts = current.violation_counts
+            recent_violations = current.recent_violations
+            if new_violations:
+                violation_counts = dict(violation_counts)
+                for violation in new_violations:
+                    v_type = violation['type']
+                    if v_type in violation_counts:
+                        violation_counts[v_type] += 1
+                self.recent.extend(new_violations)
+                recent_violations = tuple(self.recent)
+            if vehicle_counts is not None and vehicle_counts != current.vehicle_counts:
+                vehicle_counts = dict(vehicle_counts)
+            else:
+                vehicle_counts = current.vehicle_counts
+                if not new_violations:
+                    return current
+            self.current = LiveSnapshot(current.frame, vehicle_counts, violation_counts,
+                                        recent_violations, current.version + 1)
+            return self.current
+
+    def set_frame(self, frame):
+        """Publish the latest annotated frame (not copied; don't modify it afterwards)."""
+        with self.lock:
+            current = self.current
+            self.current = LiveSnapshot(frame, current.vehicle_counts, current.violation_counts,
+                                        current.recent_violations, current.version)
@@ -0,0 +1,281 @@
+import logging
+import threading
+import time
+
+MJPEG_BOUNDARY = 'frame'
+
+
+class FrameBroadcaster:
+    def __init__(self, keepalive=5.0):
+        """Share the latest encoded frame with any number of viewers.
+
+        The producer encodes each frame once and publishes the bytes here.
+        Viewers always read the newest frame: a slow viewer simply skips the
+        frames it missed instead of building a queue, so producer cost does
+        not depend on how many viewers are connected.
+
+        Args:
+            keepalive: Seconds without a new frame after which the last frame
+                is re-sent, so disconnected viewers are noticed
+        """
+        self.keepalive = keepalive
+        self.condition = threading.Condition()
+        self.frame = None
+        self.sequence = 0
+        self.viewers = 0
+
+    def publish(self, frame_bytes):
+        """Make ``frame_bytes`` the latest frame and wake all viewers."""
+        with self.condition:
+            self.frame = frame_bytes
+            self.sequence += 1
+            self.condition.notify_all()
+
+    def wait_for_frame(self, last_sequence, timeout=None):
+        """Block until a frame newer than ``last_sequence`` is published.
+
+        Returns:
+            tuple: (sequence, frame bytes); on timeout the sequence is
+            unchanged and the frame is the current one (possibly None)
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.sequence != last_sequence, timeout)
+            return self.sequence, self.frame
+
+    def mjpeg_stream(self):
+        """Yield the stream as multipart/x-mixed-replace parts for an HTTP response."""
+        with self.condition:
+            self.viewers += 1
+        try:
+            sequence = 0
+            while True:
+                sequence, frame = self.wait_for_frame(sequence, self.keepalive)
+                if frame is None:
+                    continue
+                yield (f'--{MJPEG_BOUNDARY}\r\n'
+                       f'Content-Type: image/jpeg\r\n'
+                       f'Content-Length: {len(frame)}\r\n\r\n').encode('ascii') + frame + b'\r\n'
+        finally:
+            with self.condition:
+                self.viewers -= 1
+
+
+class LatestFrameSlot:
+    def __init__(self):
+        """Single-item handoff where a newer item replaces an unconsumed one."""
+        self.condition = threading.Condition()
+        self.item = None
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, item):
+        """Store ``item``, discarding any item the consumer has not taken yet."""
+        with self.condition:
+            if self.item is not None:
+                self.dropped += 1
+            self.item = item
+            self.condition.notify()
+
+    def take(self, timeout=None):
+        """Remove and return the newest item, or None after ``timeout`` seconds."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.item is not None or self.closed, timeout)
+            item, self.item = self.item, None
+            return item
+
+    def close(self):
+        """Release any take() waiting for an item."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class FramePublisher:
+    def __init__(self, publish, fps=10.0, name='frame-publisher'):
+        """Run frame encoding and delivery on its own thread.
+
+        The inference loop hands over frames with submit() and returns
+        immediately. This thread wakes at most ``fps`` times per second, takes
+        only the newest frame and calls ``publish`` with it; frames that arrive
+        in between are dropped. Slow encoding or network I/O therefore never
+        holds up detection.
+
+        Args:
+            publish: Callable invoked as ``publish(*item)`` for each frame sent
+            fps: Maximum publish rate
+            name: Thread name
+        """
+        self.publish = publish
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.slot = LatestFrameSlot()
+        self.logger = logging.getLogger(__name__)
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, *item):
+        """Offer a frame (and any accompanying state) for publishing."""
+        self.slot.put(item)
+
+    @property
+    def dropped(self):
+        return self.slot.dropped
+
+    def _run(self):
+        while self.running:
+            item = self.slot.take(timeout=0.5)
+            if item is None:
+                continue
+            started = time.monotonic()
+            try:
+                self.publish(*item)
+            except Exception as e:
+                self.logger.error(f"Error publishing frame: {e}")
+            # Pace to the display rate; frames submitted meanwhile replace each other
+            remaining = self.interval - (time.monotonic() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def stop(self):
+        self.running = False
+        self.slot.close()
+        self.thread.join(timeout=2.0)
+
+
+# Stream renditions as (width, height, JPEG quality, max fps), best first
+RENDITIONS = (
+    (1280, 720, 85, 15),
+    (800, 450, 80, 10),
+    (640, 360, 65, 8),
+    (480, 270, 50, 5),
+)
+DEFAULT_LEVEL = 1
+
+
+class AdaptiveClient:
+    """Delivery state for one connected client."""
+
+    def __init__(self, level):
+        self.level = level
+        self.in_flight = False  # A frame was sent and not acknowledged yet
+        self.sent_at = 0.0
+        self.lag = 0.0  # Smoothed acknowledgement lag in seconds
+        self.fast_acks = 0
+        self.skipped = 0
+
+
+class AdaptiveStreamer:
+    def __init__(self, encode, send, renditions=RENDITIONS, start_level=DEFAULT_LEVEL,
+                 max_lag=0.5, min_lag=0.15, max_skipped=3, step_up_after=20, ack_timeout=2.0):
+        """Deliver frames to each client at a rendition matched to its link.
+
+        Every frame is sent with an acknowledgement callback. A client whose
+        acks come back slowly, or which still owes an ack when its next frame
+        is due, steps down to a smaller/lower-quality/lower-rate rendition;
+        a client that acks quickly for a while steps back up. Each rendition
+        is encoded at most once per frame and shared by all clients on it.
+
+        Args:
+            encode: ``encode(frame, (width, height), quality)`` -> bytes or None
+            send: ``send(client_id, data, ack_callback)``
+            renditions: Rendition ladder, best first
+            start_level: Rendition index for new clients
+            max_lag: Ack lag (seconds) above which a client steps down
+            min_lag: Ack lag below which an ack counts towards stepping up
+            max_skipped: Frames skipped for a pending ack before stepping down
+            step_up_after: Consecutive fast acks required to step up
+            ack_timeout: Seconds after which a missing ack is given up on
+        """
+        self.encode = encode
+        self.send = send
+        self.renditions = renditions
+        self.start_level = start_level
+        self.max_lag = max_lag
+        self.min_lag = min_lag
+        self.max_skipped = max_skipped
+        self.step_up_after = step_up_after
+        self.ack_timeout = ack_timeout
+        self.clients = {}
+        self.lock = threading.Lock()
+
+    def add_client(self, client_id):
+        with self.lock:
+            self.clients[client_id] = AdaptiveClient(self.start_level)
+
+    def remove_client(self, client_id):
+        with self.lock:
+            self.clients.pop(client_id, None)
+
+    def encode_level(self, frame, level, encoded):
+        """Encode ``frame`` at rendition ``level``, reusing ``encoded`` if present."""
+        if level not in encoded:
+            width, height, quality, _ = self.renditions[level]
+            encoded[level] = self.encode(frame, (width, height), quality)
+        return encoded[level]
+
+    def _step(self, client, delta):
+        client.level = min(max(client.level + delta, 0), len(self.renditions) - 1)
+        client.lag = 0.0  # Measure the new rendition from scratch
+        client.fast_acks = 0
+        client.skipped = 0
+
+    def publish(self, frame, encoded=None):
+        """Send ``frame`` to every client whose next frame is due.
+
+        Args:
+            frame: Frame to deliver
+            encoded: Optional dict of already encoded renditions, updated in place
+
+        Returns:
+            dict: Rendition level -> encoded bytes produced for this frame
+        """
+        encoded = {} if encoded is None else encoded
+        now = time.monotonic()
+        due = []
+        with self.lock:
+            for client_id, client in self.clients.items():
+                if now - client.sent_at < 1.0 / self.renditions[client.level][3]:
+                    continue
+                if client.in_flight:
+                    if now - client.sent_at < self.ack_timeout:
+                        # Backpressure: the previous frame hasn't been acknowledged
+                        client.skipped += 1
+                        if client.skipped >= self.max_skipped:
+                            self._step(client, 1)
+                        continue
+                    # Ack lost or client stalled; treat it as a slow link
+                    self._step(client, 1)
+                client.in_flight = True
+                client.sent_at = now
+                client.skipped = 0
+                due.append((client_id, client.level))
+
+        for client_id, level in due:
+            data = self.encode_level(frame, level, encoded)
+            if data is not None:
+                self.send(client_id, data, self._ack_callback(client_id, now))
+        return encoded
+
+    def _ack_callback(self, client_id, sent_at):
+        def on_ack(*args):
+            with self.lock:
+                client = self.clients.get(client_id)
+                if client is None or client.sent_at != sent_at:
+                    return
+                client.in_flight = False
+                lag = time.monotonic() - sent_at
+                client.lag = 0.7 * client.lag + 0.3 * lag if client.lag else lag
+                if client.lag > self.max_lag:
+                    self._step(client, 1)
+                elif client.lag < self.min_lag:
+                    client.fast_acks += 1
+                    if client.fast_acks >= self.step_up_after:
+                        self._step(client, -1)
+                else:
+                    client.fast_acks = 0
+        return on_ack
+
+    def levels(self):
+        """Return a snapshot of client_id -> current rendition level."""
+        with self.lock:
+            return {client_id: client.level for client_id, client in self.clients.items()}
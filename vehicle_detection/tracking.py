@@ -0,0 +1,84 @@
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+
+class SeenTrackIds:
+    def __init__(self, max_size=10000, ttl=300.0):
+        """Bounded record of track IDs that have already been counted.
+
+        Tracker IDs grow without limit on a 24/7 stream, so a plain set grows
+        with uptime. IDs are kept in least-recently-seen order: every sighting
+        refreshes an ID, IDs unseen for ``ttl`` seconds expire, and the oldest
+        are evicted once ``max_size`` is reached. Counting stays exact while a
+        vehicle is still being tracked.
+
+        Args:
+            max_size: Maximum number of IDs remembered
+            ttl: Seconds after the last sighting before an ID is forgotten
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.last_seen = OrderedDict()
+
+    def add(self, track_id, now=None):
+        """Record a sighting of ``track_id``.
+
+        Returns:
+            bool: True if the ID was not already known (i.e. should be counted)
+        """
+        now = time.time() if now is None else now
+        self._expire(now)
+        is_new = track_id not in self.last_seen
+        self.last_seen[track_id] = now
+        self.last_seen.move_to_end(track_id)
+        if len(self.last_seen) > self.max_size:
+            self.last_seen.popitem(last=False)
+        return is_new
+
+    def _expire(self, now):
+        # Entries are ordered by last sighting, so expired ones are at the front
+        cutoff = now - self.ttl
+        while self.last_seen:
+            track_id, seen = next(iter(self.last_seen.items()))
+            if seen >= cutoff:
+                break
+            del self.last_seen[track_id]
+
+    def __contains__(self, track_id):
+        return track_id in self.last_seen
+
+    def __len__(self):
+        return len(self.last_seen)
+
+
+class RollingCounter:
+    def __init__(self, bucket_format='%Y-%m-%d'):
+        """Per-class counts that reset whenever the time bucket changes.
+
+        Args:
+            bucket_format: strftime format naming the bucket, e.g. '%Y-%m-%d'
+                for daily counts or '%Y-%m-%d %H' for hourly counts
+        """
+        self.bucket_format = bucket_format
+        self.bucket = None
+        self.current = {}
+        self.previous = {}  # Final counts of the last completed bucket
+
+    def _roll(self, now):
+        bucket = datetime.fromtimestamp(now).strftime(self.bucket_format)
+        if bucket != self.bucket:
+            if self.bucket is not None:
+                self.previous = self.current
+                self.current = {}
+            self.bucket = bucket
+
+    def increment(self, key, now=None):
+        """Count one occurrence of ``key`` in the current bucket."""
+        self._roll(time.time() if now is None else now)
+        self.current[key] = self.current.get(key, 0) + 1
+
+    def counts(self, now=None):
+        """Return a copy of the counts for the current bucket."""
+        self._roll(time.time() if now is None else now)
+        return dict(self.current)
@@ -1,9 +1,9 @@
 import cv2
 import numpy as np
-import cvzone
 
 def process_frame(frame, result, area_coordinates):
     """Process a single frame with detection results."""
+    import cvzone  # Deferred: only needed once there are boxes to label
     # Draw bounding boxes and labels
     for box in result.boxes:
         # Get box coordinates
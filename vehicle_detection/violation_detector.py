@@ -14,55 +14,11 @@ class ViolationDetector:
         """
         self.detector = detector
         self.logger = logging.getLogger(__name__)
-        
-        # Initialize violation detection parameters - even stricter thresholds for more detections
-        self.speed_threshold = 20  # km/h - extremely low threshold to catch more violations
         self.min_violation_confidence = 0.4  # Lower confidence threshold to detect more violations
-        self.speed_multiplier = 1.5  # Apply a 50% multiplier to calculated speeds to ensure violations
-        
-        # Using a combined ROI that covers both lanes
-        # These coordinates define a wider area that captures both lanes
-        
-        # Get frame dimensions (assuming 1920x1080 as base resolution)
-        w, h = 1920, 1080
-        
-        # Define the combined area for both lanes
-        combined_lanes_vertices = [
-            (int(w*0.1), h),         # bottom left
-            (int(w*0.9), h),         # bottom right
-            (int(w*0.9), int(h*0.4)), # top right
-            (int(w*0.1), int(h*0.4))  # top left
-        ]
         
-        # Updated red light line position to span across both lanes
-        # Place it at about 70% of the height from the top
-        red_light_y = int(h*0.7)
-        self.red_light_coordinates = [(int(w*0.1), red_light_y), (int(w*0.9), red_light_y)]
-        
-        # Direction of proper flow in the monitored lanes
-        self.wrong_way_direction = 'south'  # Maintaining the same direction for consistency
-        
-        # Define multiple no-parking zones covering both sides of the road
-        self.restricted_areas = [
-            # Left lane no-parking zone
-            np.array([
-                (int(w*0.15), int(h*0.6)), 
-                (int(w*0.35), int(h*0.6)),
-                (int(w*0.35), int(h*0.8)),
-                (int(w*0.15), int(h*0.8))
-            ], np.int32),
-            # Right lane no-parking zone
-            np.array([
-                (int(w*0.65), int(h*0.6)), 
-                (int(w*0.85), int(h*0.6)),
-                (int(w*0.85), int(h*0.8)),
-                (int(w*0.65), int(h*0.8))
-            ], np.int32)
-        ]
-        
-        # Save the monitored area using the combined vertices
-        # Ensure proper formatting for pointPolygonTest
-        self.monitored_lane = np.array(combined_lanes_vertices, dtype=np.int32)
+        # Zones and rule parameters of the detector's current configuration
+        self.settings = None
+        self.configure(detector.settings)
         
         # Vehicle tracking for speed calculation
         self.vehicle_positions = {}  # {vehicle_id: [(time, x, y), ...]}
@@ -75,6 +31,32 @@ class ViolationDetector:
         self.is_red_light = False
         self._simulate_traffic_light()
 
+    def configure(self, settings):
+        """Adopt the zones and rules of a runtime configuration snapshot.
+        
+        Args:
+            settings: ConfigSnapshot, already compiled for the stream
+        """
+        self.settings = settings
+        rules = settings.rules
+        # Rule parameters come from the (possibly calibrated) camera config
+        self.speed_threshold = rules['speed_threshold']  # km/h
+        self.speed_multiplier = rules['speed_multiplier']
+        self.meters_per_pixel = rules['meters_per_pixel']
+        
+        # Zones and lines, already scaled to the stream's resolution
+        geometry = settings.geometry
+        self.monitored_lane = geometry.area
+        self.red_light_coordinates = geometry.red_light_line
+        self.restricted_areas = geometry.restricted_areas
+        
+        # Pixel distances below were tuned on 1920-pixel-wide frames
+        self.pixel_scale = geometry.pixel_scale
+        
+        # Direction of proper flow in the monitored lanes
+        self.wrong_way_direction = rules['wrong_way_direction']
+        self.detect_wrong_way = rules['detect_wrong_way']
+
     def _simulate_traffic_light(self):
         """Traffic light simulation disabled as requested"""
         # Setting to always green (disabled)
@@ -92,6 +74,10 @@ class ViolationDetector:
         """
         violations = []
         
+        # The detector switches configuration between frames; follow it
+        if self.detector.settings is not self.settings:
+            self.configure(self.detector.settings)
+        
         try:
             # Get bounding boxes and IDs
             if not hasattr(result.boxes, 'id') or result.boxes.id is None:
@@ -162,7 +148,7 @@ class ViolationDetector:
                 center_y = (y1 + y2) // 2
                 
                 # Check if the vehicle is inside the monitored lane
-                inside_roi = cv2.pointPolygonTest(self.monitored_lane, (center_x, center_y), False) >= 0
+                inside_roi = cv2.pointPolygonTest(self.monitored_lane, (float(center_x), float(center_y)), False) >= 0
                 
                 # Skip vehicles outside the monitored lane
                 if not inside_roi:
@@ -184,6 +170,12 @@ class ViolationDetector:
                     if violation:
                         violations.append(violation)
                 
+                # Check for wrong-way driving once the direction is calibrated
+                if self.detect_wrong_way and len(self.vehicle_positions[vehicle_id]) >= 3:
+                    violation = self._check_wrong_way(vehicle_id, vehicle_type)
+                    if violation:
+                        violations.append(violation)
+                
                 # Check for illegal parking violations
                 if len(self.vehicle_positions[vehicle_id]) >= 5:
                     violation = self._check_illegal_parking(vehicle_id, vehicle_type, center_x, center_y)
@@ -227,8 +219,7 @@ class ViolationDetector:
         
         # Convert pixels to meters (approximate calibration)
         # This would need to be calibrated for the specific camera and scene
-        meters_per_pixel = 0.15  # Increased for more sensitive detection
-        dist_meters = dist_pixels * meters_per_pixel
+        dist_meters = dist_pixels * self.meters_per_pixel
         
         # Calculate speed in km/h
         speed_mps = dist_meters / time_diff  # meters per second
@@ -285,7 +276,7 @@ class ViolationDetector:
         crossed_line = False
         
         # Increase detection area around the line
-        buffer = 20  # pixels
+        buffer = 20 * self.pixel_scale  # pixels
         
         # Check if the vehicle is near the line with buffer
         if min(y1, y2) - buffer <= y <= max(y1, y2) + buffer:
@@ -299,7 +290,7 @@ class ViolationDetector:
                     # Check if the vehicle was moving (not stopped at the light)
                     dx = abs(pos[1] - prev_pos[1])
                     dy = abs(pos[2] - prev_pos[2])
-                    if dx > 3 or dy > 3:  # If there was significant movement
+                    if max(dx, dy) > 3 * self.pixel_scale:  # If there was significant movement
                         crossed_line = True
                     else:
                         # Vehicle is stopped at the light, not a violation
@@ -360,7 +351,7 @@ class ViolationDetector:
         
         # Verify movement is significant enough to count as wrong way
         movement_distance = np.sqrt(dx**2 + dy**2)
-        if movement_distance < 10:  # Require minimum movement to avoid false positives
+        if movement_distance < 10 * self.pixel_scale:  # Require minimum movement to avoid false positives
             return None
         
         # Check if not already reported recently
@@ -403,12 +394,12 @@ class ViolationDetector:
             total_movement += np.sqrt(dx**2 + dy**2)
         
         # Check if vehicle is stationary (very little movement)
-        is_stationary = total_movement < 15  # Stricter threshold for stationary detection
+        is_stationary = total_movement < 15 * self.pixel_scale  # Stricter threshold for stationary detection
         
         # Check if vehicle is in a no-parking zone
         in_restricted_area = False
         for area in self.restricted_areas:
-            if cv2.pointPolygonTest(area, (x, y), False) >= 0:
+            if cv2.pointPolygonTest(area, (float(x), float(y)), False) >= 0:
                 in_restricted_area = True
                 break
         
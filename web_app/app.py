@@ -1,18 +1,38 @@
 import os
+
+# Serve sockets from green threads instead of one OS thread per client when
+# TRAFFIC_ASYNC_MODE is 'eventlet' or 'gevent'. Monkey patching has to happen
+# before anything else is imported. Best combined with --inference-process,
+# so no CPU-bound inference shares the event loop.
+ASYNC_MODE = os.environ.get('TRAFFIC_ASYNC_MODE', 'threading')
+if ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+elif ASYNC_MODE == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+
 import cv2
-import time
 import base64
 import threading
 import logging
 import os
 from datetime import datetime
 from pathlib import Path
-from flask import Flask, render_template, Response, request, jsonify, redirect, url_for
-from flask_socketio import SocketIO
+from flask import (
+    Flask, render_template, Response, request, jsonify, redirect, url_for, stream_with_context, abort,
+    send_from_directory
+)
+from flask_socketio import SocketIO, join_room, emit
 from PIL import Image
 import io
 import sys
+import json
 import traceback
+import re
+import argparse
+import subprocess
+from multiprocessing.connection import Listener
 
 # Add parent directory to the path so we can import from vehicle_detection
 parent_dir = str(Path(__file__).parent.parent.absolute())
@@ -23,15 +43,27 @@ if parent_dir not in sys.path:
 ROOT_DIR = Path(__file__).parent.parent.absolute()
 
 from vehicle_detection.detector import VehicleDetectionProcessor
-from vehicle_detection.database import DatabaseHandler
 from vehicle_detection.utils import draw_area
 from vehicle_detection.config import DetectionConfig
 from vehicle_detection.violation_detector import ViolationDetector
+from vehicle_detection.database import DatabaseHandler, TABLE_COLUMNS
+from vehicle_detection.export import stream_arrow
+from vehicle_detection.cache import QueryCache
+from vehicle_detection.state import StateChannel, LiveState
+from vehicle_detection.pipeline import FrameSink
+from vehicle_detection.ipc import SharedFrameRing
+from vehicle_detection.models import MODELS
+from vehicle_detection.evidence import evidence_recorder
+from vehicle_detection.ingest import is_stream_url
+from vehicle_detection.metrics import REGISTRY, STAGE_SECONDS, DROPPED_FRAMES, VIEWERS
+from vehicle_detection.streaming import (
+    FrameBroadcaster, FramePublisher, AdaptiveStreamer, MJPEG_BOUNDARY, RENDITIONS, DEFAULT_LEVEL
+)
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'traffic_system_secret_key'
-socketio = SocketIO(app)
+socketio = SocketIO(app, async_mode=ASYNC_MODE)
 
 # Configure logging
 logging.basicConfig(
@@ -46,29 +78,23 @@ logger = logging.getLogger(__name__)
 logger.info(f"Application starting. Root directory: {ROOT_DIR}")
 
 # Global variables
-detector = None
-frame_queue = []
-latest_frame = None
-latest_vehicle_counts = {}
-latest_violations = []
-processing_active = False
-config_path = None
-video_path = None
 output_path = None
-
-# Current violations - will be updated by ViolationDetector
-current_violations = {
-    'speeding': 0,
-    'red_light': 0,
-    'wrong_way': 0,
-    'illegal_parking': 0,
-    'no_helmet': 0,
-    'unauthorized_person': 0
-}
+inference_process = os.environ.get('TRAFFIC_INFERENCE_PROCESS') == '1'  # Run detection in a worker process
+db_handlers = {}
+query_cache = QueryCache()
+state_publish_interval = 0.25  # Seconds between state deltas, independent of video rate
+state_publisher_started = False
+state_publisher_lock = threading.Lock()
+violation_backfill_limit = 500  # Violations sent per backfill message
+streams = {}  # Named camera streams, each with its own pipeline and viewers
+streams_lock = threading.Lock()
+DEFAULT_STREAM = 'default'
+STREAM_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+VIOLATION_TYPES = ['speeding', 'red_light', 'wrong_way', 'illegal_parking', 'no_helmet', 'unauthorized_person']
 
 
-def get_base64_image(frame):
-    """Convert OpenCV frame to base64 encoded string for web display"""
+def encode_jpeg(frame, size=(800, 450), quality=80):
+    """Encode an OpenCV frame as JPEG bytes for web display"""
     if frame is None:
         logger.warning("Cannot encode None frame")
         return None
@@ -79,23 +105,180 @@ def get_base64_image(frame):
             frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
         
         # Resize frame to reduce bandwidth usage
-        frame = cv2.resize(frame, (800, 450))
+        frame = cv2.resize(frame, size)
         
         # Compress image with lower quality for faster transmission
-        encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), 80]
+        encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
         success, buffer = cv2.imencode('.jpg', frame, encode_param)
         
         if not success:
             logger.error("Failed to encode frame to JPEG")
             return None
         
-        jpg_as_text = base64.b64encode(buffer).decode('utf-8')
-        return jpg_as_text
+        return buffer.tobytes()
     except Exception as e:
         logger.error(f"Error encoding frame: {e}")
         return None
 
 
+def send_frame(sid, jpeg, ack):
+    """Send a binary frame to one Socket.IO client, asking for an acknowledgement"""
+    socketio.emit('frame', jpeg, to=sid, callback=ack)
+
+
+class Stream:
+    """One named camera stream: its processor, live state and viewers.
+    
+    Socket.IO clients watching the stream are registered with its
+    AdaptiveStreamer (frames) and join its room (state deltas), so they only
+    receive data for the stream they are viewing. Frames are only drawn and
+    encoded while someone is watching.
+    """
+    
+    def __init__(self, name):
+        self.name = name
+        self.processor = None
+        # Latest frame, counts and recent violations; readers take
+        # live_state.current without locking
+        self.live_state = LiveState(VIOLATION_TYPES, max_violations=100)
+        # Versioned counts/violations sent to clients as deltas
+        self.state_channel = StateChannel()
+        self.state_channel.update_counters('violation_counts', self.live_state.current.violation_counts)
+        # Per-client adaptive delivery of Socket.IO frames
+        self.frame_streamer = AdaptiveStreamer(self.encode, self.send)
+        # Encoded frames shared by all /video_feed viewers
+        self.frame_broadcaster = FrameBroadcaster()
+    
+    @property
+    def room(self):
+        return f'stream:{self.name}'
+    
+    def encode(self, frame, size, quality):
+        with STAGE_SECONDS.time(stream=self.name, stage='encoding'):
+            return encode_jpeg(frame, size, quality)
+    
+    def send(self, sid, jpeg, ack):
+        with STAGE_SECONDS.time(stream=self.name, stage='emit'):
+            send_frame(sid, jpeg, ack)
+    
+    @property
+    def is_processing(self):
+        return self.processor is not None and self.processor.is_processing
+    
+    @property
+    def watched(self):
+        """True if any Socket.IO or MJPEG client is viewing this stream"""
+        return bool(self.frame_streamer.clients) or self.frame_broadcaster.viewers > 0
+    
+    def update_state(self, vehicle_counts, new_violations):
+        """Record the latest counts and new violations in the live state"""
+        snapshot = self.live_state.update(vehicle_counts, new_violations)
+        self.state_channel.update_counters('vehicle_counts', snapshot.vehicle_counts)
+        if new_violations:
+            self.state_channel.append_violations(new_violations)
+            self.state_channel.update_counters('violation_counts', snapshot.violation_counts)
+    
+    def status(self):
+        """Summary for the streams API"""
+        snapshot = self.live_state.current
+        return {
+            'name': self.name,
+            'processing': self.is_processing,
+            'video_source': str(self.processor.video_source) if self.processor else None,
+            'source_health': self.processor.source_health if self.processor else None,
+            'startup': self.processor.startup_timings if self.processor else None,
+            'config_version': self.processor.config_version if self.processor else None,
+            'viewers': len(self.frame_streamer.clients) + self.frame_broadcaster.viewers,
+            'vehicle_counts': snapshot.vehicle_counts,
+            'total_violations': snapshot.total_violations,
+        }
+
+
+def get_stream(name=None, create=False):
+    """Look up a stream by name (the default stream if None)"""
+    name = name or DEFAULT_STREAM
+    if not STREAM_NAME_PATTERN.match(name):
+        return None
+    with streams_lock:
+        stream = streams.get(name)
+        if stream is None and create:
+            stream = streams[name] = Stream(name)
+        return stream
+
+
+def collect_stream_metrics():
+    """Refresh per-stream gauges and totals before /metrics is rendered"""
+    for stream in list(streams.values()):
+        VIEWERS.set(len(stream.frame_streamer.clients), stream=stream.name, transport='socketio')
+        VIEWERS.set(stream.frame_broadcaster.viewers, stream=stream.name, transport='mjpeg')
+        publisher = stream.processor.publisher if stream.processor else None
+        if publisher:
+            DROPPED_FRAMES.set_total(publisher.dropped, stream=stream.name, queue='publisher')
+
+
+REGISTRY.add_collector(collect_stream_metrics)
+
+
+def request_stream(create=False):
+    """Stream named by the request's ``stream`` parameter, or 404"""
+    stream = get_stream(request.values.get('stream'), create=create)
+    if stream is None:
+        abort(404)
+    return stream
+
+
+def get_base64_image(frame):
+    """Convert OpenCV frame to base64 encoded string for web display"""
+    jpeg = encode_jpeg(frame)
+    if jpeg is None:
+        return None
+    return base64.b64encode(jpeg).decode('utf-8')
+
+
+def get_database_path():
+    """Path of the database the running streams (or the default config) write to"""
+    for stream in list(streams.values()):
+        if stream.processor and stream.processor.database_path:
+            return stream.processor.database_path
+    return DetectionConfig.database_path
+
+
+def get_evidence_path():
+    """Directory the running streams (or the default config) save violation evidence to"""
+    for stream in list(streams.values()):
+        if stream.processor and stream.processor.evidence_path:
+            return stream.processor.evidence_path
+    return os.path.abspath(DetectionConfig.evidence_path)
+
+
+def get_db():
+    """Shared DatabaseHandler for request handlers (connections are per thread)"""
+    path = get_database_path()
+    if path not in db_handlers:
+        db_handlers[path] = DatabaseHandler(path)
+    return db_handlers[path]
+
+
+def on_rows_written(table, buckets, rows):
+    """Batched writer listener, called once new rows are committed"""
+    # Drop cached results for buckets that got new rows
+    for detection_date, camera_id in buckets:
+        query_cache.invalidate((table, detection_date))
+    
+    # Push persisted violations (with their ids) to the violations feed
+    if table == 'violations':
+        socketio.emit('violations_new', {'violations': rows}, to='violations')
+
+
+def cached_json(key, ttl, compute, tags=()):
+    """Serve a cached, pre-serialized JSON body with ETag revalidation"""
+    entry = query_cache.get(key, ttl, compute, tags)
+    response = Response(entry.body, mimetype='application/json')
+    response.set_etag(entry.etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+
 def process_frame_for_web(frame, vehicle_counts, violations):
     """Process a frame for web display with overlays"""
     if frame is None:
@@ -111,18 +294,22 @@ def process_frame_for_web(frame, vehicle_counts, violations):
     
     # Draw violation information
     for i, violation in enumerate(violations[-5:]):  # Show only the 5 most recent violations
-        text = f"{violation['type']}: {violation['details']}"
+        text = f"{violation['type']}: {violation.get('details', violation.get('vehicle_type', ''))}"
         cv2.putText(frame, text, (20, frame.shape[0] - 30 - (i * 30)), 
                     cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
     
     return frame
 
 
-class FrameProcessor:
-    def __init__(self, video_path, config_path=None):
+class FrameProcessor(FrameSink):
+    def __init__(self, stream, video_path, config_path=None):
+        self.stream = stream
         # Handle numeric video sources (e.g., '0' for webcam)
         if isinstance(video_path, str) and video_path.isdigit():
             self.video_source = int(video_path)
+        elif is_stream_url(video_path):
+            # Network camera (RTSP, HTTP, ...); the detector reconnects as needed
+            self.video_source = video_path
         else:
             # Make sure file paths are absolute
             path = video_path
@@ -138,7 +325,7 @@ class FrameProcessor:
         logger.info(f"Initializing FrameProcessor with video: {self.video_source}")
         
         # Check if video exists
-        if isinstance(self.video_source, str) and not os.path.exists(self.video_source):
+        if self.is_missing_file():
             logger.error(f"Video file not found: {self.video_source}")
             # Try to find the video in some common locations
             potential_paths = [
@@ -165,8 +352,66 @@ class FrameProcessor:
         
         self.detector = None
         self.violation_detector = None
+        self.evidence = None
+        self.publisher = None
+        self.area_coordinates = None
+        # Rate at which frames are encoded; clients are paced per rendition
+        self.display_fps = max(rendition[3] for rendition in RENDITIONS)
         self.is_processing = False
-        self.thread = None
+    
+    def is_missing_file(self):
+        """True if the source is a video file that does not exist"""
+        return (isinstance(self.video_source, str) and not is_stream_url(self.video_source)
+                and not os.path.exists(self.video_source))
+    
+    @property
+    def config_version(self):
+        """Runtime configuration version the pipeline is running"""
+        if self.detector:
+            return self.detector.settings.version
+        return None
+    
+    def describe_config(self):
+        """Latest runtime configuration (version and reloadable settings), or None"""
+        if self.detector:
+            return self.detector.runtime.describe()
+        return None
+    
+    def update_config(self, values):
+        """Change reloadable settings; the pipeline adopts them at its next frame.
+        
+        Raises:
+            ValueError: If a setting is unknown or invalid
+        """
+        return self.detector.update_config(values, source='api')
+    
+    @property
+    def startup_timings(self):
+        """Seconds spent in each phase of the last start"""
+        if self.detector:
+            return self.detector.startup.as_dict()
+        return None
+    
+    @property
+    def source_health(self):
+        """Reconnect and stall counters of a live source, if any"""
+        if self.detector and self.detector.is_live:
+            return self.detector.cap.health()
+        return None
+    
+    @property
+    def database_path(self):
+        """Database the detector writes to, once started"""
+        if self.detector:
+            return self.detector.config.database_path
+        return None
+    
+    @property
+    def evidence_path(self):
+        """Absolute directory violation evidence is written to, once started"""
+        if self.detector:
+            return os.path.abspath(self.detector.config.evidence_path)
+        return None
         
     def start(self):
         if self.is_processing:
@@ -174,7 +419,7 @@ class FrameProcessor:
         
         try:
             # For file sources, check existence
-            if isinstance(self.video_source, str) and not os.path.exists(self.video_source):
+            if self.is_missing_file():
                 error_msg = f"Video file not found: {self.video_source}"
                 logger.error(error_msg)
                 return False, error_msg
@@ -187,20 +432,35 @@ class FrameProcessor:
                 logger.info(f"Current working directory: {os.getcwd()}")
                 logger.info(f"ROOT_DIR: {ROOT_DIR}")
             
-            # Initialize detector
+            # Initialize detector; it owns the only capture and inference loop,
+            # and this processor plugs into it as a sink. Files loop forever.
             logger.info(f"Creating VehicleDetectionProcessor with {self.video_source}")
-            self.detector = VehicleDetectionProcessor(self.video_source, self.config_path)
-            
-            # Initialize violation detector
-            logger.info("Creating ViolationDetector")
-            self.violation_detector = ViolationDetector(self.detector)
+            self.detector = VehicleDetectionProcessor(self.video_source, self.config_path, loop=True)
+            startup = self.detector.startup
+            with startup.phase('web_setup'):
+                self.detector.config.display_output = False
+                if self.stream.name != DEFAULT_STREAM:
+                    self.detector.config.camera_id = self.stream.name
+                self.detector.writer.add_listener(on_rows_written)
+                # Evidence buffers each frame before this sink hands it on for drawing
+                self.evidence = evidence_recorder(self.detector.config)
+                if self.evidence:
+                    self.detector.add_sink(self.evidence)
+                self.detector.add_sink(self)
+                self.area_coordinates = self.detector.area_coordinates
+                
+                # Initialize violation detector
+                logger.info("Creating ViolationDetector")
+                self.violation_detector = ViolationDetector(self.detector)
+                
+                # Encoding and emitting run on their own thread
+                self.publisher = FramePublisher(self._publish_frame, fps=self.display_fps)
             
             # Start processing
             self.is_processing = True
-            self.thread = threading.Thread(target=self._process_frames)
-            self.thread.daemon = True
-            self.thread.start()
-            logger.info("Processing started successfully")
+            self.detector.start_processing()
+            startup.finish()
+            logger.info(f"Processing started successfully on stream {self.stream.name}: {startup.report()}")
             return True
         except Exception as e:
             error_msg = f"Error starting frame processor: {e}"
@@ -212,105 +472,231 @@ class FrameProcessor:
         self.is_processing = False
         if self.detector:
             self.detector.stop_processing()
-        if self.thread:
-            self.thread.join(timeout=2.0)
+        if self.publisher:
+            self.publisher.stop()
     
-    def _process_frames(self):
-        global latest_frame, latest_vehicle_counts, latest_violations, current_violations
+    def _publish_frame(self, frame, vehicle_counts, violation_counts, recent_violations):
+        """Draw overlays, encode once and deliver a frame (runs on the publisher thread)"""
+        # Other sinks (the segment recorder) may still be holding this frame,
+        # so the overlays go on a copy
+        with STAGE_SECONDS.time(stream=self.stream.name, stage='web_drawing'):
+            frame = frame.copy()
+            if self.area_coordinates is not None:
+                frame = draw_area(frame, self.area_coordinates)
+            web_frame = process_frame_for_web(frame, vehicle_counts, recent_violations)
+        self.stream.live_state.set_frame(web_frame)
         
+        # JPEG bytes go out as binary attachments; no base64 inflation.
+        # Each rendition is encoded at most once, and MJPEG viewers share
+        # the default rendition with Socket.IO clients on that level.
+        encoded = {}
         try:
-            logger.info(f"Opening video capture for: {self.video_source}")
-            cap = cv2.VideoCapture(self.video_source)
-            if not cap.isOpened():
-                logger.error(f"Failed to open video: {self.video_source}")
-                
-                # Try with different backend
-                logger.info("Attempting with different backend...")
-                cap = cv2.VideoCapture(self.video_source, cv2.CAP_FFMPEG)
-                if not cap.isOpened():
-                    logger.error("All attempts to open video failed")
-                    self.is_processing = False
-                    return
-                else:
-                    logger.info("Successfully opened video with FFMPEG backend")
+            self.stream.frame_streamer.publish(web_frame, encoded)
+        except Exception as e:
+            logger.error(f"Error emitting frame: {e}")
+        if self.stream.frame_broadcaster.viewers:
+            jpeg = self.stream.frame_streamer.encode_level(web_frame, DEFAULT_LEVEL, encoded)
+            if jpeg:
+                self.stream.frame_broadcaster.publish(jpeg)
+    
+    def on_config(self, processor):
+        """Pipeline sink: draw the zones of a newly applied configuration"""
+        self.area_coordinates = processor.area_coordinates
+    
+    def on_frame(self, event):
+        """Pipeline sink: violations, live state and frame hand-off for the web"""
+        if event.has_tracks:
+            # Process for violations
+            with STAGE_SECONDS.time(stream=self.stream.name, stage='violations'):
+                new_violations = self.violation_detector.detect_violations(event.frame, event.result)
+            for violation in new_violations:
+                if self.evidence:
+                    violation.update(self.evidence.capture(violation, event) or {})
+                self.detector.writer.add_violation(violation, self.detector.config.camera_id)
+            self.stream.update_state(self.detector.get_vehicle_counts(), new_violations)
+        
+        # Hand the frame to the publisher thread and move on; it
+        # draws, encodes and emits at the display rate
+        self.submit_frame(event.frame)
+        return True
+    
+    def submit_frame(self, frame):
+        """Queue a frame for drawing, encoding and emitting with the current state"""
+        if not self.stream.watched:
+            return  # Nobody is viewing this stream; skip drawing and encoding
+        # Snapshot fields are never mutated, so they can be shared as-is
+        snapshot = self.stream.live_state.current
+        self.publisher.submit(
+            frame,
+            snapshot.vehicle_counts,
+            snapshot.violation_counts,
+            snapshot.recent_violations[-5:]
+        )
+
+
+class RemoteFrameProcessor(FrameProcessor):
+    """Runs capture, inference and violation detection in a worker process.
+    
+    The worker (inference_worker.py) connects back over a local authenticated
+    socket and sends counts, violations and committed database rows as small
+    messages. Frames travel through a shared memory ring, so only a slot
+    number crosses the socket. This process only draws overlays, encodes and
+    serves clients, which keeps inference from competing with socket handling
+    for the GIL (or the event loop in eventlet/gevent mode).
+    """
+    
+    # Frames are shared at the largest rendition size
+    frame_size = RENDITIONS[0][:2]
+    
+    def __init__(self, stream, video_path, config_path=None):
+        super().__init__(stream, video_path, config_path)
+        self.process = None
+        self.listener = None
+        self.conn = None
+        self.ring = None
+        self.worker_info = {}
+        self.worker_config = None  # Runtime configuration last reported by the worker
+        self.remote_metrics = []  # Latest metrics collected in the worker process
+    
+    @property
+    def database_path(self):
+        return self.worker_info.get('database_path')
+    
+    @property
+    def evidence_path(self):
+        return self.worker_info.get('evidence_path')
+    
+    @property
+    def config_version(self):
+        return self.worker_config['version'] if self.worker_config else None
+    
+    def describe_config(self):
+        return self.worker_config
+    
+    def update_config(self, values):
+        """Forward settings to the worker, which validates and applies them"""
+        if not self.conn:
+            raise ValueError('Inference worker is not connected yet')
+        self.conn.send(('config', values))
+        return {'version': self.config_version, 'forwarded': True}
+    
+    def start(self):
+        if self.is_processing:
+            return False
+        
+        if self.is_missing_file():
+            error_msg = f"Video file not found: {self.video_source}"
+            logger.error(error_msg)
+            return False, error_msg
+        
+        try:
+            authkey = os.urandom(16)
+            self.listener = Listener(('127.0.0.1', 0), authkey=authkey)
+            width, height = self.frame_size
+            self.ring = SharedFrameRing((height, width, 3))
             
-            frame_count = 0
+            host, port = self.listener.address
+            command = [
+                sys.executable, os.path.join(ROOT_DIR, 'inference_worker.py'),
+                '--video', str(self.video_source),
+                '--address', f'{host}:{port}',
+                '--frames', self.ring.name,
+                '--frame-size', f'{width}x{height}',
+                '--fps', str(self.display_fps),
+            ]
+            if self.config_path:
+                command += ['--config', self.config_path]
+            if self.stream.name != DEFAULT_STREAM:
+                command += ['--camera-id', self.stream.name]
+            logger.info(f"Starting inference worker for {self.video_source}")
+            self.process = subprocess.Popen(
+                command, cwd=ROOT_DIR, env=dict(os.environ, TRAFFIC_IPC_AUTHKEY=authkey.hex())
+            )
             
+            self.publisher = FramePublisher(self._publish_frame, fps=self.display_fps)
+            self.is_processing = True
+            socketio.start_background_task(self._receive)
+            return True
+        except Exception as e:
+            error_msg = f"Error starting inference worker: {e}"
+            logger.error(error_msg)
+            logger.error(traceback.format_exc())
+            self._cleanup()
+            return False
+    
+    def _receive(self):
+        """Apply messages from the worker until it stops or we are stopped"""
+        try:
+            self.conn = self.listener.accept()
             while self.is_processing:
-                success, frame = cap.read()
-                if not success:
-                    # If video ends, loop back to the beginning
-                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                if not self.conn.poll(0.5):
+                    if self.process.poll() is not None:
+                        logger.error(f"Inference worker exited with code {self.process.returncode}")
+                        break
                     continue
                 
-                frame_count += 1
-                
-                # Process frame with detector
-                # We're using our own processing logic here instead of detector.start_processing()
-                # to have more control over the real-time display
-                try:
-                    # Apply YOLO detection
-                    results = self.detector.model.track(
-                        frame, 
-                        persist=True,
-                        conf=self.detector.config.confidence_threshold,
-                        iou=self.detector.config.nms_threshold
-                    )
-                    
-                    if results and len(results) > 0 and hasattr(results[0].boxes, 'id') and results[0].boxes.id is not None:
-                        # Update vehicle counts
-                        self.detector._update_vehicle_data(results[0])
-                        latest_vehicle_counts = self.detector.get_vehicle_counts()
-                        
-                        # Process for violations
-                        new_violations = self.violation_detector.detect_violations(frame, results[0])
-                        if new_violations:
-                            latest_violations.extend(new_violations)
-                            # Update violation counts
-                            for violation in new_violations:
-                                v_type = violation['type']
-                                if v_type in current_violations:
-                                    current_violations[v_type] += 1
-                        
-                        # Draw area on frame
-                        processed_frame = draw_area(frame.copy(), self.detector.area_coordinates)
-                        
-                        # Process frame for web display
-                        web_frame = process_frame_for_web(
-                            processed_frame,
-                            latest_vehicle_counts,
-                            latest_violations
-                        )
-                        
-                        # Update latest frame
-                        latest_frame = web_frame
-                        
-                        # Emit frame to websocket
-                        if frame_count % 3 == 0:  # only emit every 3rd frame to reduce load
-                            frame_b64 = get_base64_image(web_frame)
-                            if frame_b64:
-                                logger.debug(f"Emitting frame {frame_count} to clients")
-                                try:
-                                    socketio.emit('frame_update', {
-                                        'frame': frame_b64,
-                                        'vehicle_counts': latest_vehicle_counts,
-                                        'violations': current_violations
-                                    })
-                                except Exception as e:
-                                    logger.error(f"Error emitting frame: {e}")
-                    
-                    # Control frame rate
-                    time.sleep(0.03)  # ~30 FPS max
-                
-                except Exception as e:
-                    logger.error(f"Error processing frame {frame_count}: {e}")
-                    time.sleep(0.1)  # Add delay on error
-            
-        except Exception as e:
-            logger.error(f"Error in frame processing loop: {e}")
+                message = self.conn.recv()
+                kind = message[0]
+                if kind == 'frame':
+                    # Unwatched streams don't even copy the frame out
+                    if not self.stream.watched:
+                        continue
+                    frame = self.ring.read(*message[1:])
+                    if frame is None:
+                        DROPPED_FRAMES.inc(stream=self.stream.name, queue='shared_ring')
+                    else:
+                        self.submit_frame(frame)
+                elif kind == 'state':
+                    self.stream.update_state(*message[1:])
+                elif kind == 'rows':
+                    on_rows_written(*message[1:])
+                elif kind == 'metrics':
+                    self.remote_metrics = message[1]
+                elif kind == 'hello':
+                    self.worker_info = message[1]
+                    logger.info(f"Inference worker {self.worker_info['pid']} connected")
+                elif kind == 'config':
+                    self.worker_config, error = message[1:]
+                    if error:
+                        logger.error(f"Inference worker rejected configuration: {error}")
+                elif kind == 'error':
+                    logger.error(f"Inference worker error: {message[1]}")
+                elif kind == 'stopped':
+                    break
+        except (EOFError, OSError) as e:
+            if self.is_processing:
+                logger.error(f"Lost connection to inference worker: {e}")
         finally:
-            if cap:
-                cap.release()
+            self.is_processing = False
+    
+    def stop(self):
+        self.is_processing = False
+        if self.conn:
+            try:
+                self.conn.send(('stop',))
+            except (OSError, EOFError):
+                pass
+        if self.process:
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                logger.warning("Inference worker did not stop in time, terminating it")
+                self.process.terminate()
+                self.process.wait()
+        if self.publisher:
+            self.publisher.stop()
+        self._cleanup()
+    
+    def _cleanup(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+        if self.listener:
+            self.listener.close()
+            self.listener = None
+        if self.ring:
+            self.ring.close()
+            self.ring = None
 
 
 @app.route('/')
@@ -321,15 +707,21 @@ def index():
 
 @app.route('/dashboard')
 def dashboard():
-    db_handler = DatabaseHandler('traffic.db')
-    daily_counts = db_handler.get_daily_counts()
+    today = datetime.now().strftime('%Y-%m-%d')
+    daily_counts = query_cache.get(
+        ('daily_counts', today), 30,
+        lambda: get_db().get_daily_counts(today),
+        tags=[('vehicle_detections', today)]
+    ).value
     return render_template('dashboard.html', vehicle_counts=daily_counts)
 
 
 @app.route('/violations')
 def violations():
     """Violations log page"""
-    return render_template('violations.html', violations=latest_violations)
+    recent = [violation for stream in list(streams.values())
+              for violation in stream.live_state.current.recent_violations]
+    return render_template('violations.html', violations=recent)
 
 
 @app.route('/settings')
@@ -340,11 +732,12 @@ def settings():
 
 @app.route('/start_processing', methods=['POST'])
 def start_processing():
-    """Start processing a video"""
-    global detector, processing_active, video_path, config_path
-    
-    if processing_active:
-        return jsonify({'status': 'error', 'message': 'Processing already active'})
+    """Start processing a video on a named stream (``stream``, default 'default')"""
+    stream = get_stream(request.form.get('stream'), create=True)
+    if stream is None:
+        return jsonify({'status': 'error', 'message': 'Invalid stream name'})
+    if stream.is_processing:
+        return jsonify({'status': 'error', 'message': f'Processing already active on stream {stream.name}'})
     
     data = request.form
     # Get video path with proper default
@@ -357,11 +750,14 @@ def start_processing():
     
     try:
         # Create frame processor
-        detector = FrameProcessor(video_path, config_path)
-        result = detector.start()
+        processor_class = RemoteFrameProcessor if inference_process else FrameProcessor
+        processor = processor_class(stream, video_path, config_path)
+        result = processor.start()
         
         if result is True:
-            processing_active = True
+            stream.processor = processor
+            # Viewers that opened the stream before it existed subscribe again
+            socketio.emit('stream_started', {'stream': stream.name})
             return jsonify({'status': 'success', 'message': 'Processing started successfully'})
         else:
             error_message = "Failed to start processing"
@@ -377,60 +773,317 @@ def start_processing():
 
 @app.route('/stop_processing', methods=['POST'])
 def stop_processing():
-    """Stop video processing"""
-    global detector, processing_active
-    
-    if not processing_active:
+    """Stop video processing on a named stream"""
+    stream = get_stream(request.form.get('stream'))
+    if stream is None or not stream.is_processing:
         return jsonify({'status': 'error', 'message': 'No active processing'})
     
     try:
-        if detector:
-            detector.stop()
-        processing_active = False
+        stream.processor.stop()
         return jsonify({'status': 'success', 'message': 'Processing stopped'})
     except Exception as e:
         logger.error(f"Error stopping processing: {e}")
         return jsonify({'status': 'error', 'message': str(e)})
 
 
+@app.route('/api/config', methods=['GET', 'POST'])
+def runtime_config():
+    """Read or change a running stream's reloadable settings.
+    
+    POST a JSON object of settings (e.g. ``confidence_threshold``,
+    ``default_area``); the stream adopts them between two frames without
+    restarting. The stream is chosen by the ``stream`` query parameter.
+    """
+    stream = get_stream(request.args.get('stream'))
+    if stream is None or not stream.is_processing:
+        return jsonify({'status': 'error', 'message': 'No active processing'}), 404
+    
+    if request.method == 'GET':
+        return jsonify(dict(stream.processor.describe_config() or {}, stream=stream.name))
+    
+    values = request.get_json(silent=True)
+    if not isinstance(values, dict):
+        return jsonify({'status': 'error', 'message': 'Expected a JSON object of settings'}), 400
+    try:
+        result = stream.processor.update_config(values)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    return jsonify(dict(result, status='success', stream=stream.name))
+
+
+@app.route('/video_feed')
+def video_feed():
+    """Live video as a multipart MJPEG stream (usable directly as an <img> src)"""
+    stream = request_stream()
+    return Response(
+        stream.frame_broadcaster.mjpeg_stream(),
+        mimetype=f'multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}',
+        headers={'Cache-Control': 'no-cache'}
+    )
+
+
 @app.route('/api/vehicle_counts')
 def get_vehicle_counts():
     """API endpoint to get current vehicle counts"""
-    return jsonify(latest_vehicle_counts)
+    stream = request_stream()
+    snapshot = stream.live_state.current
+    return cached_json(('vehicle_counts', stream.name, snapshot.version), 60, lambda: snapshot.vehicle_counts)
 
 
 @app.route('/api/violations')
 def get_violations():
     """API endpoint to get current violations"""
-    return jsonify({
-        'total': sum(current_violations.values()),
-        'counts': current_violations,
-        'recent': latest_violations[-10:] if latest_violations else []
+    stream = request_stream()
+    snapshot = stream.live_state.current
+    return cached_json(('violations', stream.name, snapshot.version), 60, lambda: {
+        'total': snapshot.total_violations,
+        'counts': snapshot.violation_counts,
+        'recent': list(snapshot.recent_violations[-10:])
     })
 
 
+@app.route('/evidence/<path:filename>')
+def evidence(filename):
+    """Violation evidence (clip or still) by the path stored with the violation"""
+    return send_from_directory(get_evidence_path(), filename)
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics for this process and any inference worker processes"""
+    remote = [stream.processor.remote_metrics for stream in list(streams.values())
+              if getattr(stream.processor, 'remote_metrics', None)]
+    return Response(REGISTRY.render(*remote), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/streams')
+def get_streams():
+    """API endpoint listing streams with their status"""
+    return jsonify({'streams': [stream.status() for stream in list(streams.values())]})
+
+
+def encode_cursor(after):
+    """Turn a (timestamp, id) keyset position into an opaque cursor string"""
+    if after is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(after).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+    if not cursor:
+        return None
+    try:
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return float(timestamp), int(row_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def history_response(table, filters):
+    """Serve a keyset-paginated page, or the whole result as NDJSON.
+
+    ``?format=ndjson`` streams every matching row, one JSON object per line,
+    straight from a database cursor. Otherwise a page of at most ``limit``
+    rows is returned with a ``next_cursor`` to pass back as ``cursor``.
+    """
+    filters['start_time'] = request.args.get('start', type=float)
+    filters['end_time'] = request.args.get('end', type=float)
+    try:
+        after = decode_cursor(request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    db = get_db()
+
+    if request.args.get('format') == 'ndjson':
+        def generate():
+            for row in db.iter_history(table, filters, after):
+                yield json.dumps(row) + '\n'
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    limit = max(1, min(request.args.get('limit', 100, type=int), 1000))
+    items, next_after = db.get_history_page(table, filters, after, limit)
+    return jsonify({'items': items, 'next_cursor': encode_cursor(next_after)})
+
+
+@app.route('/api/detections')
+def get_detections():
+    """Historical detections, filterable by camera, class and time"""
+    return history_response('vehicle_detections', {
+        'camera_id': request.args.get('camera'),
+        'class_id': request.args.get('class', type=int),
+    })
+
+
+@app.route('/api/violations/history')
+def get_violation_history():
+    """Historical violations, filterable by type, vehicle class, camera and time"""
+    return history_response('violations', {
+        'camera_id': request.args.get('camera'),
+        'violation_type': request.args.get('type'),
+        'vehicle_type': request.args.get('class'),
+    })
+
+
+@app.route('/api/export/<table>')
+def export_table_stream(table):
+    """Stream a table as an Arrow IPC stream.
+
+    Query parameters: columns (comma-separated), start, end (epoch seconds)
+    and camera. Rows are sent one chunk at a time.
+    """
+    if table not in TABLE_COLUMNS:
+        return jsonify({'status': 'error', 'message': f'Unknown table: {table}'}), 404
+
+    columns = request.args.get('columns')
+    columns = [c.strip() for c in columns.split(',')] if columns else None
+    unknown = [c for c in columns or [] if c not in TABLE_COLUMNS[table]]
+    if unknown:
+        return jsonify({'status': 'error', 'message': f"Unknown columns: {', '.join(unknown)}"}), 400
+
+    body = stream_arrow(
+        get_database_path(),
+        table,
+        columns=columns,
+        start_time=request.args.get('start', type=float),
+        end_time=request.args.get('end', type=float),
+        camera_id=request.args.get('camera')
+    )
+    return Response(
+        stream_with_context(body),
+        mimetype='application/vnd.apache.arrow.stream',
+        headers={'Content-Disposition': f'attachment; filename={table}.arrows'}
+    )
+
+
 @socketio.on('connect')
 def handle_connect():
     """Handle websocket connection"""
     logger.info('Client connected')
 
 
+def publish_state():
+    """Background task broadcasting each stream's state deltas to its room"""
+    while True:
+        socketio.sleep(state_publish_interval)
+        for stream in list(streams.values()):
+            delta = stream.state_channel.collect_delta()
+            if delta:
+                socketio.emit('state_delta', delta, to=stream.room)
+
+
+def event_stream(data, create=False):
+    """Stream named in a Socket.IO event payload (the default stream if absent)
+
+    Only /start_processing creates streams. For one that does not exist the
+    client gets a ``stream_error`` event and None is returned.
+    """
+    name = data.get('stream') if isinstance(data, dict) else None
+    stream = get_stream(name, create=create)
+    if stream is None:
+        emit('stream_error', {'stream': name or DEFAULT_STREAM, 'message': 'Unknown stream'})
+    return stream
+
+
+@socketio.on('state_subscribe')
+def handle_state_subscribe(data=None):
+    """Join a stream's live state room; the client starts from a full snapshot"""
+    global state_publisher_started
+    stream = event_stream(data)
+    if stream is None:
+        return
+    with state_publisher_lock:
+        if not state_publisher_started:
+            socketio.start_background_task(publish_state)
+            state_publisher_started = True
+    join_room(stream.room)
+    emit('state_snapshot', stream.state_channel.snapshot())
+
+
+@socketio.on('state_resync')
+def handle_state_resync(data=None):
+    """Client missed deltas; send it a fresh snapshot"""
+    stream = event_stream(data)
+    if stream is not None:
+        emit('state_snapshot', stream.state_channel.snapshot())
+
+
+@socketio.on('violations_subscribe')
+def handle_violations_subscribe(data=None):
+    """Join the violations feed, backfilling from the database.
+
+    ``since`` is the id of the last violation the client has. Without it the
+    client gets the most recent violations. The room is joined before the
+    backfill query so nothing written in between is lost; clients drop
+    duplicates by id.
+    """
+    join_room('violations')
+    since = (data or {}).get('since')
+    db = get_db()
+    if since is None:
+        items, _ = db.get_history_page('violations', limit=violation_backfill_limit)
+        violations, more = list(reversed(items)), False
+    else:
+        violations = db.get_rows_since('violations', int(since), violation_backfill_limit + 1)
+        more = len(violations) > violation_backfill_limit
+        violations = violations[:violation_backfill_limit]
+    emit('violations_backfill', {'violations': violations, 'more': more})
+
+
+@socketio.on('subscribe_frames')
+def handle_subscribe_frames(data=None):
+    """Start sending a stream's video frames to this client (pages without video never ask).
+    
+    A client watches one stream at a time; subscribing moves it off any other.
+    """
+    stream = event_stream(data)
+    if stream is None:
+        return
+    for other in list(streams.values()):
+        if other is not stream:
+            other.frame_streamer.remove_client(request.sid)
+    stream.frame_streamer.add_client(request.sid)
+
+
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle websocket disconnection"""
+    for stream in list(streams.values()):
+        stream.frame_streamer.remove_client(request.sid)
     logger.info('Client disconnected')
 
 
+def parse_args():
+    """Parse command line arguments for the web server"""
+    parser = argparse.ArgumentParser(description='Traffic Management System web application')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=5000, help='Port to listen on')
+    parser.add_argument('--inference-process', action='store_true', default=inference_process,
+                        help='Run capture and inference in a separate worker process')
+    parser.add_argument('--preload-model', type=str, metavar='PATH',
+                        help='Load and warm up this model at server start so the first stream starts quickly')
+    parser.add_argument('--debug', action='store_true', help='Enable Flask debug mode and reloader')
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
+    args = parse_args()
+    inference_process = args.inference_process
+    if args.preload_model and not inference_process:
+        # Workers load their own model, so preloading only helps in-process streams
+        socketio.start_background_task(MODELS.preload, args.preload_model)
+    
     # Run the app - using localhost for Windows compatibility
-    logger.info("Starting web server on http://localhost:5000")
+    logger.info(f"Starting web server on http://{args.host}:{args.port} "
+                f"(async mode: {socketio.async_mode}, inference process: {inference_process})")
     try:
-        socketio.run(app, host='127.0.0.1', port=5000, debug=True, allow_unsafe_werkzeug=True)
+        socketio.run(app, host=args.host, port=args.port, debug=args.debug, allow_unsafe_werkzeug=True)
     except Exception as e:
         logger.error(f"Error starting web server: {e}")
         # Try alternative method for older Flask versions
         try:
             logger.info("Trying alternative method to start server...")
-            app.run(host='127.0.0.1', port=5000, debug=True)
+            app.run(host=args.host, port=args.port, debug=args.debug)
         except Exception as e2:
             logger.error(f"Failed to start server with alternative method: {e2}")
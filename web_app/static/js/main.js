@@ -177,3 +177,85 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 });
+
+/**
+ * Stream shown by this page, from the ?stream= query parameter.
+ */
+window.currentStream = new URLSearchParams(window.location.search).get('stream') || 'default';
+
+/**
+ * Live state channel shared by all pages, for the current stream.
+ *
+ * The server sends a full snapshot when we subscribe, then versioned deltas
+ * containing only changed counters and new violations. If a delta starts
+ * from a version newer than ours, updates were missed and we ask for a
+ * fresh snapshot.
+ *
+ * Usage: window.subscribeLiveState(function(state, newViolations) { ... })
+ * where newViolations is empty for snapshots and holds a delta's additions.
+ */
+window.subscribeLiveState = (function() {
+    const maxViolations = 100;
+    const listeners = [];
+    const state = {
+        version: -1,
+        counters: {},
+        violations: []
+    };
+    let socket = null;
+    
+    function notify(newViolations) {
+        listeners.forEach(listener => listener(state, newViolations));
+    }
+    
+    function appendViolations(violations) {
+        const lastSeq = state.violations.length ? state.violations[state.violations.length - 1].seq : 0;
+        const fresh = violations.filter(violation => violation.seq > lastSeq);
+        state.violations = state.violations.concat(fresh).slice(-maxViolations);
+        return fresh;
+    }
+    
+    function applySnapshot(snapshot) {
+        state.version = snapshot.version;
+        state.counters = snapshot.counters || {};
+        state.violations = [];
+        appendViolations(snapshot.violations || []);
+        // A snapshot restates history; only deltas bring new violations
+        notify([]);
+    }
+    
+    function applyDelta(delta) {
+        if (delta.version <= state.version) {
+            return; // Already included in our snapshot
+        }
+        if (state.version < 0 || delta.base_version > state.version) {
+            socket.emit('state_resync', { stream: window.currentStream });
+            return;
+        }
+        Object.entries(delta.counters || {}).forEach(([name, changed]) => {
+            state.counters[name] = Object.assign(state.counters[name] || {}, changed);
+        });
+        state.version = delta.version;
+        notify(appendViolations(delta.violations || []));
+    }
+    
+    return function(listener) {
+        listeners.push(listener);
+        if (!socket && typeof io !== 'undefined') {
+            socket = io();
+            socket.on('connect', () => socket.emit('state_subscribe', { stream: window.currentStream }));
+            socket.on('state_snapshot', applySnapshot);
+            socket.on('state_delta', applyDelta);
+            socket.on('stream_started', data => {
+                if (data.stream === window.currentStream) {
+                    socket.emit('state_subscribe', { stream: window.currentStream });
+                }
+            });
+            if (socket.connected) {
+                socket.emit('state_subscribe', { stream: window.currentStream });
+            }
+        } else if (state.version >= 0) {
+            listener(state, []);
+        }
+    };
+})();
@@ -18,10 +18,24 @@ document.addEventListener('DOMContentLoaded', function() {
     console.log('Initializing Socket.IO connection...');
     const socket = io();
     let isStreaming = false;
+    let frameUrl = null;
     
     // Socket connection event handlers
     socket.on('connect', function() {
         console.log('Socket.IO connected successfully');
+        // Only pages that show video ask for frames, and only for their stream
+        socket.emit('subscribe_frames', { stream: window.currentStream });
+    });
+    
+    // Streams only exist once started; subscribe again when ours starts
+    socket.on('stream_started', function(data) {
+        if (data.stream === window.currentStream) {
+            socket.emit('subscribe_frames', { stream: window.currentStream });
+        }
+    });
+    
+    socket.on('stream_error', function(data) {
+        console.log(`Stream ${data.stream}: ${data.message}`);
     });
     
     socket.on('disconnect', function() {
@@ -55,7 +69,7 @@ document.addEventListener('DOMContentLoaded', function() {
             headers: {
                 'Content-Type': 'application/x-www-form-urlencoded',
             },
-            body: `video_path=${videoSource}`
+            body: `video_path=${encodeURIComponent(videoSource)}&stream=${encodeURIComponent(window.currentStream)}`
         })
         .then(response => response.json())
         .then(data => {
@@ -100,7 +114,11 @@ document.addEventListener('DOMContentLoaded', function() {
         if (!isStreaming) return;
         
         fetch('/stop_processing', {
-            method: 'POST'
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/x-www-form-urlencoded',
+            },
+            body: `stream=${encodeURIComponent(window.currentStream)}`
         })
         .then(response => response.json())
         .then(data => {
@@ -111,6 +129,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 stopBtn.disabled = true;
                 
                 // Reset video feed to placeholder
+                releaseFrameUrl();
                 videoFeed.src = 'https://via.placeholder.com/800x450?text=Press+Start+to+Begin+Stream';
                 
                 // Show notification
@@ -136,23 +155,44 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
     
-    // Handle incoming frames from Socket.IO
-    socket.on('frame_update', function(data) {
-        console.log('Received frame update');
-        if (data.frame) {
-            console.log('Setting video frame source');
-            videoFeed.src = 'data:image/jpeg;base64,' + data.frame;
-        } else {
-            console.warn('Received frame update without frame data');
+    // Handle incoming frames from Socket.IO (binary JPEG payloads).
+    // The acknowledgement lets the server adapt quality to this connection.
+    socket.on('frame', function(data, ack) {
+        if (typeof ack === 'function') {
+            ack();
         }
+        if (!data || !data.byteLength) {
+            console.warn('Received empty frame');
+            return;
+        }
+        
+        const previousUrl = frameUrl;
+        frameUrl = URL.createObjectURL(new Blob([data], { type: 'image/jpeg' }));
+        videoFeed.src = frameUrl;
         
+        // The previous frame has been replaced, so its blob can be freed
+        if (previousUrl) {
+            URL.revokeObjectURL(previousUrl);
+        }
+    });
+    
+    // Counts and violations arrive on the live state channel, separately from frames
+    window.subscribeLiveState(function(state, newViolations) {
         // Update vehicle counts
-        updateVehicleCounts(data.vehicle_counts);
+        updateVehicleCounts(state.counters.vehicle_counts);
         
         // Update violation counts
-        updateViolationCounts(data.violations);
+        updateViolationCounts(state.counters.violation_counts, newViolations);
     });
     
+    // Free the blob behind the currently displayed frame
+    function releaseFrameUrl() {
+        if (frameUrl) {
+            URL.revokeObjectURL(frameUrl);
+            frameUrl = null;
+        }
+    }
+    
     // Update vehicle counts in the UI
     function updateVehicleCounts(counts) {
         if (!counts) return;
@@ -178,7 +218,7 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     // Update violation counts in the UI
-    function updateViolationCounts(violations) {
+    function updateViolationCounts(violations, newViolations) {
         if (!violations) return;
         
         // Update violation counters
@@ -199,7 +239,7 @@ document.addEventListener('DOMContentLoaded', function() {
         }
         
         // Show violation alert if there are new violations
-        if (totalViolations > 0 && violationAlert) {
+        if (newViolations && newViolations.length > 0 && violationAlert) {
             violationAlert.classList.add('show-alert');
             setTimeout(() => {
                 violationAlert.classList.remove('show-alert');